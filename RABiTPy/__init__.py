@@ -5,10 +5,22 @@ The package provides functionality for capturing and tracking 2D biological data
 
 Modules:
 - capture: Contains functions for capturing 2D biological data.
+- frame_store: Contains the memory-mapped on-disk store for captured frames.
+- cache: Contains the in-memory cache for derived frames (grayscale, inverted, normalized).
+- gaussian_fit: Contains the vectorized 2D Gaussian centroid refinement.
+- tiling: Contains the overlapping tiling and mask stitching for large frames.
+- linking: Contains the online, frame-by-frame particle linkers, including a KD-tree linker for dense fields.
+- track_index: Contains the per-track index for direct access to the rows of each particle.
 
 """
+from .cache import FrameCache
 from .capture import Capture
+from .frame_store import FrameStore
+from .gaussian_fit import GaussianFitter
 from .identify import Identify
+from .linking import KDTreeLinker, OnlineLinker
 from .track import Tracker
 from .stats import Stats
+from .tiling import FrameTiler
+from .track_index import TrackIndex
 from .utils import Utility
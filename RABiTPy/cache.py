@@ -0,0 +1,400 @@
+"""
+The cache module provides the FrameCache class to keep derived frame representations
+(e.g. grayscale or normalized frames) in memory between calls, within a memory budget,
+and the SegmentationCache class to keep segmented masks on disk between sessions.
+"""
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+
+class FrameCache:
+    """
+    The FrameCache class keeps derived frame stacks keyed on the representation, its parameters and
+    a token of the source frames. The least recently used entries are evicted once the cached arrays
+    exceed the memory budget. If a spill directory is set, evicted entries are saved to disk instead
+    of being dropped and are memory-mapped back on the next hit. Each cache spills into its own
+    subdirectory, as the same keys are used by every cache.
+    """
+
+    DEFAULT_MAX_MEMORY_IN_BYTES = 2 * 1024 ** 3
+    SPILL_FILE_EXTENSION = 'npy'
+
+    def __init__(self, max_memory_in_bytes: int = DEFAULT_MAX_MEMORY_IN_BYTES, spill_directory: str | None = None):
+        """
+        Initializes a new instance of the FrameCache class.
+
+        Args:
+          max_memory_in_bytes (int, optional): The memory budget of the in-memory entries.
+            Defaults to DEFAULT_MAX_MEMORY_IN_BYTES.
+          spill_directory (str, optional): The directory to save evicted entries to, None to drop them.
+            The entries are saved in a subdirectory of their own, so caches can share the directory. Defaults to None.
+
+        Raises:
+          ValueError: If the memory budget is negative.
+        """
+        if max_memory_in_bytes is None or max_memory_in_bytes < 0:
+            raise ValueError('The memory budget should not be negative.')
+
+        self._max_memory_in_bytes: int = max_memory_in_bytes
+        self._spill_directory: str | None = os.path.join(spill_directory, uuid.uuid4().hex) if spill_directory else None
+        self._entries: OrderedDict = OrderedDict()
+        self._spilled_entries: dict = {}
+        self._memory_in_bytes: int = 0
+        self._hit_count: int = 0
+        self._miss_count: int = 0
+
+        if self._spill_directory:
+            os.makedirs(self._spill_directory, exist_ok=True)
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        """
+        Retrieves a cached array and marks it as the most recently used.
+
+        Args:
+          key (tuple): The key of the entry.
+
+        Returns:
+          np.ndarray | None: The read-only cached array (memory-mapped if it was spilled), None if not cached.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._hit_count += 1
+            return self._entries[key]
+        if key in self._spilled_entries:
+            self._hit_count += 1
+            return np.load(self._spilled_entries[key], mmap_mode='r')
+        self._miss_count += 1
+        return None
+
+    def put(self, key: tuple, array: np.ndarray) -> np.ndarray:
+        """
+        Caches an array. The array is made read-only, as it is shared by every caller of the same key.
+
+        Args:
+          key (tuple): The key of the entry.
+          array (np.ndarray): The array to cache.
+
+        Returns:
+          np.ndarray: The cached array.
+        """
+        self.invalidate(key)
+        array.setflags(write=False)
+        self._entries[key] = array
+        self._memory_in_bytes += array.nbytes
+        self.__evict_least_recently_used()
+        return array
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Retrieves a cached array, computing and caching it on a miss.
+
+        Args:
+          key (tuple): The key of the entry.
+          compute (Callable[[], np.ndarray]): Computes the array on a miss.
+
+        Returns:
+          np.ndarray: The cached array.
+        """
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, compute())
+        return array
+
+    def invalidate(self, key: tuple) -> None:
+        """
+        Removes an entry from memory and disk.
+
+        Args:
+          key (tuple): The key of the entry.
+        """
+        array = self._entries.pop(key, None)
+        if array is not None:
+            self._memory_in_bytes -= array.nbytes
+        spill_file_path = self._spilled_entries.pop(key, None)
+        if spill_file_path and os.path.exists(spill_file_path):
+            os.remove(spill_file_path)
+
+    def invalidate_representation(self, representation: str) -> None:
+        """
+        Removes all entries of a representation, whatever their parameters and source.
+
+        Args:
+          representation (str): The representation name, the first element of the keys.
+        """
+        for key in [key for key in self.__get_keys() if key[0] == representation]:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from memory and disk, and the spill subdirectory of this cache.
+        """
+        for key in self.__get_keys():
+            self.invalidate(key)
+        if self._spill_directory and os.path.isdir(self._spill_directory):
+            for file_name in os.listdir(self._spill_directory):
+                os.remove(os.path.join(self._spill_directory, file_name))
+            os.rmdir(self._spill_directory)
+
+    def get_memory_usage(self) -> int:
+        """
+        Retrieves the size of the in-memory entries.
+
+        Returns:
+          int: The size in bytes.
+        """
+        return self._memory_in_bytes
+
+    def get_max_memory(self) -> int:
+        """
+        Retrieves the memory budget of the in-memory entries.
+
+        Returns:
+          int: The budget in bytes.
+        """
+        return self._max_memory_in_bytes
+
+    def get_statistics(self) -> dict:
+        """
+        Retrieves the cache statistics.
+
+        Returns:
+          dict: The hit and miss counts, the number of in-memory and spilled entries and the memory usage.
+        """
+        return {
+            'hits': self._hit_count,
+            'misses': self._miss_count,
+            'entries': len(self._entries),
+            'spilled_entries': len(self._spilled_entries),
+            'memory_in_bytes': self._memory_in_bytes,
+        }
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries or key in self._spilled_entries
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._spilled_entries)
+
+    # Private Methods
+    def __get_keys(self) -> list:
+        """
+        Retrieves the keys of the in-memory and spilled entries.
+
+        Returns:
+          list: The keys.
+        """
+        return list(self._entries) + [key for key in self._spilled_entries if key not in self._entries]
+
+    def __evict_least_recently_used(self) -> None:
+        """
+        Evicts the least recently used entries until the in-memory entries fit the memory budget.
+        The most recently added entry is kept in memory even if it exceeds the budget on its own.
+        """
+        while self._memory_in_bytes > self._max_memory_in_bytes and len(self._entries) > 1:
+            key, array = self._entries.popitem(last=False)
+            self._memory_in_bytes -= array.nbytes
+            if self._spill_directory:
+                self.__spill(key, array)
+
+    def __spill(self, key: tuple, array: np.ndarray) -> None:
+        """
+        Saves an evicted entry to the spill directory.
+
+        Args:
+          key (tuple): The key of the entry.
+          array (np.ndarray): The evicted array.
+        """
+        os.makedirs(self._spill_directory, exist_ok=True)
+        key_hash = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        spill_file_path = os.path.join(self._spill_directory, f'{key_hash}.{FrameCache.SPILL_FILE_EXTENSION}')
+        np.save(spill_file_path, array)
+        self._spilled_entries[key] = spill_file_path
+
+
+class SegmentationCache:
+    """
+    The SegmentationCache class keeps segmented masks on disk, keyed on the content of the segmented frame,
+    the model name and the segmentation parameters, so unchanged frames are not segmented again, even in a
+    new session. The least recently used masks are deleted once the masks exceed the disk budget.
+    """
+
+    DEFAULT_MAX_DISK_USAGE_IN_BYTES = 4 * 1024 ** 3
+    MASK_FILE_EXTENSION = 'npy'
+
+    def __init__(self, cache_directory: str, max_disk_usage_in_bytes: int = DEFAULT_MAX_DISK_USAGE_IN_BYTES):
+        """
+        Initializes a new instance of the SegmentationCache class on a cache directory, picking up the masks
+        cached there by previous sessions.
+
+        Args:
+          cache_directory (str): The directory to save the masks to. It should not hold other files.
+          max_disk_usage_in_bytes (int, optional): The disk budget of the masks.
+            Defaults to DEFAULT_MAX_DISK_USAGE_IN_BYTES.
+
+        Raises:
+          ValueError: If the disk budget is negative.
+        """
+        if max_disk_usage_in_bytes is None or max_disk_usage_in_bytes < 0:
+            raise ValueError('The disk budget should not be negative.')
+
+        self._cache_directory: str = cache_directory
+        self._max_disk_usage_in_bytes: int = max_disk_usage_in_bytes
+        self._hit_count: int = 0
+        self._miss_count: int = 0
+
+        os.makedirs(cache_directory, exist_ok=True)
+        # Least recently used first, as the access time is not reliable on all file systems
+        mask_files = [entry for entry in os.scandir(cache_directory)
+                      if entry.is_file() and entry.name.endswith(f'.{SegmentationCache.MASK_FILE_EXTENSION}')]
+        mask_files.sort(key=lambda entry: entry.stat().st_mtime)
+        self._mask_file_sizes: OrderedDict = OrderedDict(
+            (os.path.splitext(entry.name)[0], entry.stat().st_size) for entry in mask_files)
+        self._disk_usage_in_bytes: int = sum(self._mask_file_sizes.values())
+        self.__evict_least_recently_used()
+
+    def get_key(self, frame: np.ndarray, model_name: str, params: dict) -> str:
+        """
+        Computes the key of a frame segmented by a model with some parameters.
+
+        Args:
+          frame (np.ndarray): The frame given to the model (e.g. the normalized frame).
+          model_name (str): The name of the model.
+          params (dict): The parameters of the segmentation.
+
+        Returns:
+          str: The hexadecimal content hash.
+        """
+        frame = np.ascontiguousarray(frame)
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(repr((frame.shape, frame.dtype.str, model_name, sorted(params.items()))).encode('utf-8'))
+        hasher.update(frame)
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        """
+        Retrieves a cached mask and marks it as the most recently used.
+
+        Args:
+          key (str): The key of the mask.
+
+        Returns:
+          np.ndarray | None: The cached mask, None if not cached.
+        """
+        if key not in self._mask_file_sizes:
+            self._miss_count += 1
+            return None
+        mask_file_path = self.__get_mask_file_path(key)
+        try:
+            mask = np.load(mask_file_path)
+        except (OSError, ValueError):
+            # Deleted or truncated by another process
+            self.invalidate(key)
+            self._miss_count += 1
+            return None
+        os.utime(mask_file_path)
+        self._mask_file_sizes.move_to_end(key)
+        self._hit_count += 1
+        return mask
+
+    def put(self, key: str, mask: np.ndarray) -> None:
+        """
+        Caches a mask. The file is written under a temporary name first, so an interrupted write
+        never leaves a truncated mask behind.
+
+        Args:
+          key (str): The key of the mask.
+          mask (np.ndarray): The mask to cache.
+        """
+        self.invalidate(key)
+        mask_file_path = self.__get_mask_file_path(key)
+        temporary_file_path = f'{mask_file_path}.tmp'
+        with open(temporary_file_path, 'wb') as mask_file:
+            np.save(mask_file, mask)
+        os.replace(temporary_file_path, mask_file_path)
+        self._mask_file_sizes[key] = os.path.getsize(mask_file_path)
+        self._disk_usage_in_bytes += self._mask_file_sizes[key]
+        self.__evict_least_recently_used()
+
+    def invalidate(self, key: str) -> None:
+        """
+        Removes a mask from disk.
+
+        Args:
+          key (str): The key of the mask.
+        """
+        mask_file_size = self._mask_file_sizes.pop(key, None)
+        if mask_file_size is None:
+            return
+        self._disk_usage_in_bytes -= mask_file_size
+        mask_file_path = self.__get_mask_file_path(key)
+        if os.path.exists(mask_file_path):
+            os.remove(mask_file_path)
+
+    def clear(self) -> None:
+        """
+        Removes all masks from disk.
+        """
+        for key in list(self._mask_file_sizes):
+            self.invalidate(key)
+
+    def get_directory(self) -> str:
+        """
+        Retrieves the directory of the cached masks.
+
+        Returns:
+          str: The directory path.
+        """
+        return self._cache_directory
+
+    def get_disk_usage(self) -> int:
+        """
+        Retrieves the size of the cached masks.
+
+        Returns:
+          int: The size in bytes.
+        """
+        return self._disk_usage_in_bytes
+
+    def get_statistics(self) -> dict:
+        """
+        Retrieves the cache statistics.
+
+        Returns:
+          dict: The hit and miss counts, the number of cached masks and the disk usage.
+        """
+        return {
+            'hits': self._hit_count,
+            'misses': self._miss_count,
+            'entries': len(self._mask_file_sizes),
+            'disk_usage_in_bytes': self._disk_usage_in_bytes,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._mask_file_sizes
+
+    def __len__(self) -> int:
+        return len(self._mask_file_sizes)
+
+    # Private Methods
+    def __get_mask_file_path(self, key: str) -> str:
+        """
+        Retrieves the path of the file of a mask.
+
+        Args:
+          key (str): The key of the mask.
+
+        Returns:
+          str: The file path.
+        """
+        return os.path.join(self._cache_directory, f'{key}.{SegmentationCache.MASK_FILE_EXTENSION}')
+
+    def __evict_least_recently_used(self) -> None:
+        """
+        Deletes the least recently used masks until the masks fit the disk budget.
+        """
+        while self._disk_usage_in_bytes > self._max_disk_usage_in_bytes and self._mask_file_sizes:
+            self.invalidate(next(iter(self._mask_file_sizes)))
@@ -3,10 +3,15 @@ The capture module provides the Capture class to retrieve file paths, store imag
 from a video, and perform related operations.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
+import numpy as np
 from tqdm import tqdm, trange
 import tifffile
 
+from .frame_store import FrameStore, TiffPageFrames
+from .writer import BackgroundWriter
 
 class Capture:
     """
@@ -16,10 +21,15 @@ class Capture:
 
     DEFAULT_FILE_DIRECTORY = 'input_files'
     DEFAULT_STORE_IMAGE_FILE_DIRECTORY = 'frames_from_video'
+    DEFAULT_FRAME_STORE_FILE_NAME = 'frame_store'
     SUPPORTED_INPUT_VIDEO_FILE_TYPES = ['avi', 'mp4', 'mpg', 'mpeg']
     DEFAULT_PIXEL_SCALE_FACTOR = 1
     DEFAULT_SCALE_UNITS = 'units'
     DEFAULT_CAPTURE_SPEED_IN_FPS = 15
+    SUPPORTED_DECODE_MODES = ['auto', 'sequential', 'seek']
+    DEFAULT_DECODE_MODE = 'auto'
+    DEFAULT_CHUNK_SIZE_IN_FRAMES = 100
+    FRAME_STRIDE_TOLERANCE = 1e-3
 
     def __init__(self, working_directory=DEFAULT_FILE_DIRECTORY):
         """
@@ -38,7 +48,8 @@ class Capture:
         self._pixel_scale_factor: float = 0.0
         self._scale_units: str = ''
         self._video_frames_store_path: str = ''
-        self._captured_frames: list = []
+        self._captured_frames: list | FrameStore | TiffPageFrames = []
+        self._background_writer_options: dict = {}
 
     def load_video(self, file_name=''):
         """
@@ -77,28 +88,47 @@ class Capture:
                                   scale_units: str = DEFAULT_SCALE_UNITS,
                                   capture_speed_in_fps=None,
                                   is_store_video_frames=False,
-                                  store_images_path=DEFAULT_STORE_IMAGE_FILE_DIRECTORY) -> list:
+                                  store_images_path=DEFAULT_STORE_IMAGE_FILE_DIRECTORY,
+                                  decode_mode: str = DEFAULT_DECODE_MODE,
+                                  is_use_frame_store: bool = False,
+                                  frame_store_path: str = DEFAULT_FRAME_STORE_FILE_NAME) -> list:
         """
         Processes the already loaded video into frames based on the given pixel to micrometer conversion factor and capture speed.
         The pixel_scale_factor is mandatory to process the video into frames else will give an error.
 
+        Frames are decoded sequentially and decimated by frame index whenever the video FPS is an integer
+        multiple of the capture speed, which runs at decoder speed. Otherwise the video is sampled by
+        seeking to each capture timestamp.
+
         Args:
           pixel_scale_factor (float, optional): The pixel scale factor. Defaults to DEFAULT_PIXEL_SCALE_FACTOR.
           scale_units (str, optional): The scale units. Defaults to DEFAULT_SCALE_UNITS.
           capture_speed_in_fps (int, optional): Capture speed in frames/sec. Defaults to given video FPS or 15. Note: If the user provides the capture speed in FPS, The time of the video might be different from the actual video time, although the total frames will be constant.
           is_store_video_frames (bool, optional): Flag to store video frames. Defaults to False.
           store_images_path (str, optional): Path to store images. Defaults to DEFAULT_STORE_IMAGE_FILE_DIRECTORY.
+          decode_mode (str, optional): How frames are read from the video. 'sequential' reads every frame in order and
+            keeps every n-th one, 'seek' seeks to the timestamp of each captured frame and 'auto' uses 'sequential'
+            whenever the capture speed can be derived by a frame stride, else 'seek'. Defaults to DEFAULT_DECODE_MODE.
+          is_use_frame_store (bool, optional): Flag to write the frames into a memory-mapped frame store on disk
+            instead of keeping them in memory. Defaults to False.
+          frame_store_path (str, optional): Path of the frame store, relative to the working directory.
+            Defaults to DEFAULT_FRAME_STORE_FILE_NAME.
 
         Returns:
-          list: The captured frames.
+          list | FrameStore: The captured frames.
 
         Raises:
-          ValueError: If the pixel to micrometer conversion factor is not provided.
+          ValueError: If the pixel to micrometer conversion factor is not provided, the decode mode is not supported
+            or the 'sequential' decode mode is requested for a capture speed that is not a stride of the video FPS.
         """
         try:
             if not pixel_scale_factor:
                 raise ValueError('Error: A valid Pixel Scale factor is mandatory to process the video and calculate the stats')
 
+            if decode_mode not in Capture.SUPPORTED_DECODE_MODES:
+                raise ValueError(
+                    f'Invalid decode mode: {decode_mode}. Available decode modes: {Capture.SUPPORTED_DECODE_MODES}')
+
             # If the user provides the capture speed in FPS, then use that value else use the video FPS
             if capture_speed_in_fps:
                 self._actual_fps = capture_speed_in_fps
@@ -106,12 +136,15 @@ class Capture:
             else:
                 self._actual_fps = self._default_fps
 
-            captured_frames = []
             self._pixel_scale_factor = pixel_scale_factor
             self._scale_units = scale_units
 
-            captured_frames = self.__capture_images_from_video(is_store_video_frames,
-                                                               store_images_path)
+            captured_frames = self.__create_frame_container(is_use_frame_store, frame_store_path)
+            captured_frames = self.__capture_images_from_video(captured_frames,
+                                                               is_store_video_frames,
+                                                               store_images_path,
+                                                               decode_mode)
+            captured_frames = self.__finalize_frame_container(captured_frames)
             self._captured_frames = captured_frames
             print(
                 f'Processed video into frames successfully with pixel scale factor: {self._pixel_scale_factor} {self._scale_units}'
@@ -120,12 +153,94 @@ class Capture:
         except ValueError as e:
             print(e)
 
+    def iter_frames(self, chunk_size: int = DEFAULT_CHUNK_SIZE_IN_FRAMES,
+                    capture_speed_in_fps=None,
+                    decode_mode: str = DEFAULT_DECODE_MODE):
+        """
+        Lazily decodes the already loaded video in chunks of frames, without keeping the whole video in memory.
+        Each chunk is decoded only when it is requested, so downstream stages can process a chunk while the
+        rest of the video is still undecoded.
+
+        Args:
+          chunk_size (int, optional): The number of frames per chunk. Defaults to DEFAULT_CHUNK_SIZE_IN_FRAMES.
+          capture_speed_in_fps (int, optional): Capture speed in frames/sec. Defaults to the video FPS.
+          decode_mode (str, optional): How frames are read from the video, see process_video_into_frames.
+            Defaults to DEFAULT_DECODE_MODE.
+
+        Yields:
+          tuple[list[int], list]: The global (0-based) indices of the frames in the chunk and the frames.
+
+        Raises:
+          ValueError: If no video is loaded, the chunk size is not positive or the decode mode is not supported.
+        """
+        if not self._video_file_path:
+            raise ValueError('No video loaded. Please load a video before iterating over its frames.')
+        if decode_mode not in Capture.SUPPORTED_DECODE_MODES:
+            raise ValueError(
+                f'Invalid decode mode: {decode_mode}. Available decode modes: {Capture.SUPPORTED_DECODE_MODES}')
+        self.__validate_chunk_size(chunk_size)
+        self._actual_fps = capture_speed_in_fps if capture_speed_in_fps else self._default_fps
+
+        video = cv2.VideoCapture(self._video_file_path)
+        try:
+            frames = self.__generate_frames_from_video(video, decode_mode)
+            yield from self.__chunk_frames(frames, chunk_size)
+        finally:
+            video.release()
+
+    def iter_images_as_frames(self, folder_path, chunk_size: int = DEFAULT_CHUNK_SIZE_IN_FRAMES):
+        """
+        Lazily loads the images from the given folder as chunks of frames, in the same order as load_images_as_frames.
+
+        Args:
+          folder_path (str): The path of the folder containing the images.
+          chunk_size (int, optional): The number of frames per chunk. Defaults to DEFAULT_CHUNK_SIZE_IN_FRAMES.
+
+        Yields:
+          tuple[list[int], list]: The global (0-based) indices of the frames in the chunk and the frames.
+
+        Raises:
+          FileNotFoundError: If the specified folder is not found.
+          ValueError: If the chunk size is not positive.
+        """
+        complete_folder_path = os.path.join(self._directory, folder_path)
+        if not os.path.isdir(complete_folder_path):
+            raise FileNotFoundError(f'Folder not found: {complete_folder_path}')
+        self.__validate_chunk_size(chunk_size)
+
+        image_files = self.__list_files(complete_folder_path)
+        frames = (cv2.imread(os.path.join(complete_folder_path, image_file)) for image_file in image_files)
+        yield from self.__chunk_frames((frame for frame in frames if frame is not None), chunk_size)
+
+    def iter_tiff_images_as_frames(self, file_name='', chunk_size: int = DEFAULT_CHUNK_SIZE_IN_FRAMES):
+        """
+        Lazily reads the pages of a multi-page TIFF file as chunks of frames.
+
+        Args:
+          file_name (str): The name of the TIFF file.
+          chunk_size (int, optional): The number of frames per chunk. Defaults to DEFAULT_CHUNK_SIZE_IN_FRAMES.
+
+        Yields:
+          tuple[list[int], list]: The global (0-based) indices of the frames in the chunk and the frames.
+
+        Raises:
+          FileNotFoundError: If the specified file is not found.
+          ValueError: If the chunk size is not positive.
+        """
+        file_path = os.path.join(self._directory, file_name)
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        self.__validate_chunk_size(chunk_size)
+
+        with tifffile.TiffFile(file_path) as tiff:
+            yield from self.__chunk_frames((page.asarray() for page in tiff.pages), chunk_size)
+
     def get_captured_frames(self):
         """
         Retrieves the captured frames.
 
         Returns:
-          list: The captured frames.
+          list | FrameStore: The captured frames.
         """
         return self._captured_frames
 
@@ -153,18 +268,35 @@ class Capture:
         """
         return self._pixel_scale_factor
 
-    def load_images_as_frames(self, folder_path, capture_speed_in_fps=DEFAULT_CAPTURE_SPEED_IN_FPS, pixel_scale_factor=DEFAULT_PIXEL_SCALE_FACTOR, scale_units=DEFAULT_SCALE_UNITS):
+    def load_images_as_frames(self, folder_path, capture_speed_in_fps=DEFAULT_CAPTURE_SPEED_IN_FPS, pixel_scale_factor=DEFAULT_PIXEL_SCALE_FACTOR, scale_units=DEFAULT_SCALE_UNITS,
+                              is_use_frame_store: bool = False, frame_store_path: str = DEFAULT_FRAME_STORE_FILE_NAME,
+                              is_parallel: bool = False, max_workers: int = None, is_preallocate_frames: bool = False):
         """
         Loads all images from the given folder as frames in alphabetical order of the filenames.
+        The images can be decoded by a pool of threads, which keeps the frame order.
 
         Args:
           folder_path (str): The path of the folder containing the images.
           capture_speed_in_fps (int, optional): The capture speed in frames per second. Defaults to DEFAULT_CAPTURE_SPEED_IN_FPS.
           pixel_scale_factor (float, optional): The pixel scale factor. Defaults to DEFAULT_PIXEL_SCALE_FACTOR.
           scale_units (str, optional): The scale units. Defaults to DEFAULT_SCALE_UNITS.
+          is_use_frame_store (bool, optional): Flag to write the frames into a memory-mapped frame store on disk
+            instead of keeping them in memory. Defaults to False.
+          frame_store_path (str, optional): Path of the frame store, relative to the working directory.
+            Defaults to DEFAULT_FRAME_STORE_FILE_NAME.
+          is_parallel (bool, optional): Flag to decode the images with a pool of threads. Defaults to False.
+          max_workers (int, optional): Maximum number of worker threads. If None, ThreadPoolExecutor
+            will choose a default.
+          is_preallocate_frames (bool, optional): Flag to decode the images straight into a single preallocated
+            (n_frames, H, W, C) array instead of a list. All images must have the same shape. Ignored when a
+            frame store is used, as the frame store is already contiguous. Defaults to False.
+
+        Returns:
+          list | np.ndarray | FrameStore: The loaded frames.
 
         Raises:
           FileNotFoundError: If the specified folder is not found.
+          ValueError: If the frames are preallocated and the images do not have the same shape.
         """
         self._default_fps = capture_speed_in_fps
         self._actual_fps = capture_speed_in_fps
@@ -176,17 +308,75 @@ class Capture:
             raise FileNotFoundError(f'Folder not found: {complete_folder_path}')
 
         image_files = self.__list_files(complete_folder_path)
-        frames = []
-        for index in trange(len(image_files), desc='Loading frames'):
-            image_path = os.path.join(complete_folder_path, image_files[index])
-            frame = cv2.imread(image_path)
-            if frame is not None:
-                frames.append(frame)
+        image_paths = [os.path.join(complete_folder_path, image_file) for image_file in image_files]
+        if is_preallocate_frames and not is_use_frame_store:
+            frames = self.__load_images_into_array(image_paths, is_parallel, max_workers)
+        else:
+            frames = self.__create_frame_container(is_use_frame_store, frame_store_path)
+            loaded_images = self.__read_images(image_paths, is_parallel, max_workers)
+            for frame in tqdm(loaded_images, total=len(image_paths), desc='Loading frames'):
+                if frame is not None:
+                    frames.append(frame)
+            frames = self.__finalize_frame_container(frames)
 
         self._captured_frames = frames
         print(f'{len(frames)} frames loaded from folder: {complete_folder_path}')
         return frames
 
+    def load_frame_store(self, frame_store_path=DEFAULT_FRAME_STORE_FILE_NAME):
+        """
+        Loads the frames of a previously written frame store. The frames are memory-mapped, not read into memory,
+        and the capture speed, pixel scale factor and scale units are restored from the store header.
+
+        Args:
+          frame_store_path (str, optional): Path of the frame store, relative to the working directory.
+            Defaults to DEFAULT_FRAME_STORE_FILE_NAME.
+
+        Returns:
+          FrameStore: The loaded frames.
+
+        Raises:
+          FileNotFoundError: If the frame store is not found.
+        """
+        frame_store = FrameStore(os.path.join(self._directory, frame_store_path), mode='r')
+        metadata = frame_store.get_metadata()
+        self._default_fps = metadata.get('default_fps', self._default_fps)
+        self._actual_fps = metadata.get('fps', self._actual_fps)
+        self._pixel_scale_factor = metadata.get('pixel_scale_factor', self._pixel_scale_factor)
+        self._scale_units = metadata.get('scale_units', self._scale_units)
+
+        self._captured_frames = frame_store
+        print(f'{len(frame_store)} frames loaded from frame store: {frame_store.get_store_path()}')
+        return frame_store
+
+    def configure_background_writer(self, max_workers: int = BackgroundWriter.DEFAULT_MAX_WORKERS,
+                                    max_queue_size: int = BackgroundWriter.DEFAULT_MAX_QUEUE_SIZE,
+                                    compression_level: int | None = None):
+        """
+        Configures the background writer that stores the frames as image files while they are captured.
+        An Identify object created afterwards uses the same options to save its masks.
+
+        Args:
+          max_workers (int, optional): Number of writer threads. Defaults to BackgroundWriter.DEFAULT_MAX_WORKERS.
+          max_queue_size (int, optional): Maximum number of frames waiting to be written.
+            Defaults to BackgroundWriter.DEFAULT_MAX_QUEUE_SIZE.
+          compression_level (int, optional): Deflate compression level from 0 to 9, None for the default encoding.
+            Defaults to None.
+        """
+        self._background_writer_options = {
+            'max_workers': max_workers,
+            'max_queue_size': max_queue_size,
+            'compression_level': compression_level,
+        }
+
+    def get_background_writer_options(self) -> dict:
+        """
+        Retrieves the options of the background writer.
+        Returns:
+          dict: The background writer options.
+        """
+        return dict(self._background_writer_options)
+
     def set_properties(self, pixel_scale_factor: float = DEFAULT_PIXEL_SCALE_FACTOR, scale_units: str = DEFAULT_SCALE_UNITS, capture_speed_in_fps=None):
         """
         Sets the properties of the Capture object.
@@ -208,15 +398,23 @@ class Capture:
         scale_units=DEFAULT_SCALE_UNITS,
         is_store_video_frames=True,
         store_images_path=DEFAULT_STORE_IMAGE_FILE_DIRECTORY,
+        is_use_frame_store=False,
+        frame_store_path=DEFAULT_FRAME_STORE_FILE_NAME,
+        is_lazy_load=False,
     ):
         """
         Loads TIFF images as frames from the specified file.
+        If the frames are stored, they are written by a background writer while the pages are being read.
         file_name: The name of the TIFF file.
         capture_speed_in_fps: The capture speed in frames per second.
         pixel_scale_factor: The pixel scale factor.
         scale_units: The scale units.
         is_store_video_frames: Flag to store video frames.
         store_images_path: Path to store images.
+        is_use_frame_store: Flag to write the frames into a memory-mapped frame store on disk.
+        frame_store_path: Path of the frame store, relative to the working directory.
+        is_lazy_load: Flag to keep the TIFF file open and read the pages on demand instead of loading them into memory.
+            Contiguous, uncompressed stacks are memory-mapped directly. The frame store is not used in this mode.
         """
         self._default_fps = capture_speed_in_fps
         self._actual_fps = capture_speed_in_fps
@@ -232,13 +430,20 @@ class Capture:
                 store_images_path
             )
 
-        with tifffile.TiffFile(file_path) as tiff:
-            frames = [page.asarray() for page in tiff.pages]
+        if is_lazy_load:
+            frames = self.__open_tiff_frames_lazily(file_path)
+        else:
+            with tifffile.TiffFile(file_path) as tiff:
+                frames = self.__create_frame_container(is_use_frame_store, frame_store_path)
+                for page in tiff.pages:
+                    frames.append(page.asarray())
+            frames = self.__finalize_frame_container(frames)
 
-            if is_store_video_frames:
+        if is_store_video_frames:
+            with self.__create_background_writer('tifffile') as frame_writer:
                 for index in trange(len(frames), desc="Saving frames"):
                     frame_number = str(index).zfill(len(str(len(frames))))
-                    tifffile.imwrite(
+                    frame_writer.submit(
                         os.path.join(
                             self._video_frames_store_path, f"frame_{frame_number}.tiff"
                         ),
@@ -251,26 +456,30 @@ class Capture:
 
     # Private Methods
     def __capture_images_from_video(self,
+                                    captured_frames,
                                     is_store_video_frames=False,
-                                    store_images_path=DEFAULT_STORE_IMAGE_FILE_DIRECTORY):
+                                    store_images_path=DEFAULT_STORE_IMAGE_FILE_DIRECTORY,
+                                    decode_mode=DEFAULT_DECODE_MODE):
         """
         Captures images from a video file.
 
         Args:
+          captured_frames (list | FrameStore): The container to capture the frames into.
           is_store_video_frames (bool, optional): Flag to store video frames. Defaults to False.
           store_images_path (str, optional): Path to store images. Defaults to DEFAULT_STORE_IMAGE_FILE_DIRECTORY.
+          decode_mode (str, optional): The decode mode to read the frames with. Defaults to DEFAULT_DECODE_MODE.
 
         Returns:
-          list: The captured frames.
+          list | FrameStore: The captured frames.
         """
         if is_store_video_frames:
             complete_store_path = self.__handle_folder_preprocess(store_images_path)
             self._video_frames_store_path = complete_store_path
 
-        captured_frames = []
         video = cv2.VideoCapture(self._video_file_path)
         try:
-            captured_frames = self.__capture_and_store_frames(video, is_store_video_frames)
+            captured_frames = self.__capture_and_store_frames(
+                video, captured_frames, is_store_video_frames, decode_mode)
         finally:
             video.release()
 
@@ -280,6 +489,186 @@ class Capture:
               )
         return captured_frames
 
+    def __read_images(self, image_paths, is_parallel=False, max_workers=None):
+        """
+        Reads the images in the given order, optionally with a pool of threads (OpenCV releases the GIL while decoding).
+
+        Args:
+          image_paths (list): The paths of the images.
+          is_parallel (bool, optional): Flag to decode the images with a pool of threads. Defaults to False.
+          max_workers (int, optional): Maximum number of worker threads. Defaults to None.
+
+        Yields:
+          np.ndarray | None: The decoded images, or None for files that can not be read as an image.
+        """
+        if not is_parallel:
+            for image_path in image_paths:
+                yield cv2.imread(image_path)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(cv2.imread, image_paths)
+
+    def __load_images_into_array(self, image_paths, is_parallel=False, max_workers=None):
+        """
+        Decodes the images straight into a single preallocated (n_frames, H, W, C) array.
+
+        Args:
+          image_paths (list): The paths of the images.
+          is_parallel (bool, optional): Flag to decode the images with a pool of threads. Defaults to False.
+          max_workers (int, optional): Maximum number of worker threads. Defaults to None.
+
+        Returns:
+          np.ndarray: The loaded frames. Files that can not be read as an image are left out.
+
+        Raises:
+          ValueError: If the images do not have the same shape.
+        """
+        first_frame_index, first_frame = next(
+            ((frame_index, frame) for frame_index, frame in enumerate(self.__read_images(image_paths))
+             if frame is not None), (None, None))
+        if first_frame is None:
+            return np.empty((0,), dtype=np.uint8)
+
+        frames = np.empty((len(image_paths),) + first_frame.shape, dtype=first_frame.dtype)
+        is_loaded = np.zeros(len(image_paths), dtype=bool)
+        # The first image is already decoded and the ones before it could not be read
+        frames[first_frame_index] = first_frame
+        is_loaded[first_frame_index] = True
+
+        def load_image_into_array(frame_index):
+            frame = cv2.imread(image_paths[frame_index])
+            if frame is None:
+                return
+            if frame.shape != first_frame.shape:
+                raise ValueError(
+                    f'Image {image_paths[frame_index]} with shape {frame.shape} does not match the '
+                    f'shape of the first image {first_frame.shape}.')
+            frames[frame_index] = frame
+            is_loaded[frame_index] = True
+
+        frame_indices = range(first_frame_index + 1, len(image_paths))
+        if is_parallel:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for _ in tqdm(executor.map(load_image_into_array, frame_indices),
+                              total=len(frame_indices), desc='Loading frames'):
+                    pass
+        else:
+            for frame_index in tqdm(frame_indices, desc='Loading frames'):
+                load_image_into_array(frame_index)
+
+        if not is_loaded.all():
+            # Move the loaded frames to the front and shrink the buffer in place, instead of copying the stack
+            loaded_frame_indices = np.flatnonzero(is_loaded)
+            for target_index, source_index in enumerate(loaded_frame_indices):
+                if target_index != source_index:
+                    frames[target_index] = frames[source_index]
+            frames.resize((len(loaded_frame_indices),) + first_frame.shape, refcheck=False)
+        return frames
+
+    def __open_tiff_frames_lazily(self, file_path):
+        """
+        Opens the pages of a TIFF file without reading them into memory. Contiguous, uncompressed stacks
+        are memory-mapped as a single array, all other files are read page by page on demand.
+
+        Args:
+          file_path (str): The path of the TIFF file.
+
+        Returns:
+          np.ndarray | TiffPageFrames: The frames of the TIFF file.
+        """
+        tiff_frames = TiffPageFrames(file_path)
+        try:
+            mapped_frames = tifffile.memmap(file_path, mode='r')
+        except ValueError:
+            return tiff_frames
+
+        if len(tiff_frames) == 1 and mapped_frames.shape == tiff_frames[0].shape:
+            mapped_frames = mapped_frames[np.newaxis]
+        if mapped_frames.ndim < 3 or mapped_frames.shape[0] != len(tiff_frames):
+            return tiff_frames
+        tiff_frames.close()
+        return mapped_frames
+
+    def __validate_chunk_size(self, chunk_size):
+        """
+        Checks if the chunk size is valid.
+
+        Args:
+          chunk_size (int): The number of frames per chunk.
+
+        Raises:
+          ValueError: If the chunk size is not positive.
+        """
+        if chunk_size is None or chunk_size <= 0:
+            raise ValueError('The chunk size should be a positive number of frames.')
+
+    def __chunk_frames(self, frames, chunk_size=DEFAULT_CHUNK_SIZE_IN_FRAMES):
+        """
+        Groups the frames into chunks, together with their global indices.
+
+        Args:
+          frames (iterable): The frames, in order.
+          chunk_size (int, optional): The number of frames per chunk. Defaults to DEFAULT_CHUNK_SIZE_IN_FRAMES.
+
+        Yields:
+          tuple[list[int], list]: The global (0-based) indices of the frames in the chunk and the frames.
+        """
+        chunk_indices, chunk_frames = [], []
+        for frame_index, frame in enumerate(frames):
+            chunk_indices.append(frame_index)
+            chunk_frames.append(frame)
+            if len(chunk_frames) == chunk_size:
+                yield chunk_indices, chunk_frames
+                chunk_indices, chunk_frames = [], []
+        if chunk_frames:
+            yield chunk_indices, chunk_frames
+
+    def __create_background_writer(self, backend=BackgroundWriter.DEFAULT_BACKEND):
+        """
+        Creates a background writer with the configured options.
+
+        Args:
+          backend (str, optional): The library to encode the frames with. Defaults to BackgroundWriter.DEFAULT_BACKEND.
+
+        Returns:
+          BackgroundWriter: The started background writer.
+        """
+        return BackgroundWriter(backend=backend, **self._background_writer_options)
+
+    def __create_frame_container(self, is_use_frame_store=False, frame_store_path=DEFAULT_FRAME_STORE_FILE_NAME):
+        """
+        Creates the container to load the frames into.
+
+        Args:
+          is_use_frame_store (bool, optional): Flag to create a memory-mapped frame store instead of a list. Defaults to False.
+          frame_store_path (str, optional): Path of the frame store, relative to the working directory.
+            Defaults to DEFAULT_FRAME_STORE_FILE_NAME.
+
+        Returns:
+          list | FrameStore: The empty frame container.
+        """
+        if not is_use_frame_store:
+            return []
+        return FrameStore(os.path.join(self._directory, frame_store_path), mode='w')
+
+    def __finalize_frame_container(self, frames):
+        """
+        Finalizes the frame container once all frames are loaded. A frame store is flushed to disk together
+        with the capture metadata and reopened read-only.
+
+        Args:
+          frames (list | FrameStore): The loaded frames.
+
+        Returns:
+          list | FrameStore: The loaded frames.
+        """
+        if isinstance(frames, FrameStore):
+            frames.set_metadata(fps=self._actual_fps, default_fps=self._default_fps,
+                                pixel_scale_factor=self._pixel_scale_factor, scale_units=self._scale_units)
+            frames.finalize()
+        return frames
+
     def __validate_the_file_name_and_type(self, file_name=''):
         """
         Validates the file name and type.
@@ -477,41 +866,125 @@ class Capture:
         """
         return int(video.get(cv2.CAP_PROP_FRAME_COUNT))
 
-    def __capture_and_store_frames(self, video, is_store_video_frames=False):
+    def __get_frame_stride(self):
+        """
+        Derives the frame stride that decimates the video FPS down to the capture speed.
+
+        Returns:
+          int | None: The number of video frames per captured frame, or None if the capture speed
+          is not an integer fraction of the video FPS.
+        """
+        if not self._default_fps or not self._actual_fps:
+            return None
+        frame_ratio = self._default_fps / self._actual_fps
+        frame_stride = round(frame_ratio)
+        if frame_stride < 1 or abs(frame_ratio - frame_stride) > Capture.FRAME_STRIDE_TOLERANCE:
+            return None
+        return frame_stride
+
+    def __generate_frames_from_video(self, video, decode_mode=DEFAULT_DECODE_MODE):
+        """
+        Generates the frames of the video to capture using the given decode mode.
+
+        Args:
+          video: The video object.
+          decode_mode (str, optional): The decode mode to read the frames with. Defaults to DEFAULT_DECODE_MODE.
+
+        Returns:
+          generator: The frames to capture, in order.
+
+        Raises:
+          ValueError: If the 'sequential' decode mode is requested and the capture speed can not be derived by a frame stride.
+        """
+        frame_stride = self.__get_frame_stride() if decode_mode != 'seek' else None
+        if decode_mode == 'sequential' and frame_stride is None:
+            raise ValueError(
+                f'Sequential decoding requires the video FPS ({self._default_fps}) to be an integer multiple '
+                f'of the capture speed ({self._actual_fps}). Use the "seek" or "auto" decode mode instead.')
+
+        if frame_stride is None:
+            return self.__read_frames_by_seeking(video)
+        return self.__read_frames_sequentially(video, frame_stride)
+
+    def __read_frames_sequentially(self, video, frame_stride=1):
+        """
+        Reads the video frames in order and keeps every frame_stride-th frame. The skipped frames are
+        only grabbed, not retrieved, so they are never converted into images.
+
+        Args:
+          video: The video object.
+          frame_stride (int, optional): The number of video frames per captured frame. Defaults to 1.
+
+        Yields:
+          np.ndarray: The captured frames.
+        """
+        frame_index = 0
+        while True:
+            if frame_index % frame_stride == 0:
+                has_frame, frame = video.read()
+                if not has_frame:
+                    break
+                yield frame
+            elif not video.grab():
+                break
+            frame_index += 1
+
+    def __read_frames_by_seeking(self, video):
+        """
+        Reads the video frames by seeking to the timestamp of every frame to capture.
+
+        Args:
+          video: The video object.
+
+        Yields:
+          np.ndarray: The captured frames.
+        """
+        frame_to_capture_in_ms = 0
+        capture_speed_in_ms = self.__convert_fps_to_ms()
+        while True:
+            video.set(cv2.CAP_PROP_POS_MSEC, frame_to_capture_in_ms)
+            has_frame, frame = video.read()
+
+            if not has_frame:
+                break
+
+            yield frame
+            frame_to_capture_in_ms += capture_speed_in_ms
+
+    def __capture_and_store_frames(self, video, captured_frames, is_store_video_frames=False, decode_mode=DEFAULT_DECODE_MODE):
         """
         Captures and stores frames from the video.
 
         Args:
           video: The video object.
+          captured_frames (list | FrameStore): The container to capture the frames into.
           is_store_video_frames (bool, optional): Flag to store video frames. Defaults to False.
+          decode_mode (str, optional): The decode mode to read the frames with. Defaults to DEFAULT_DECODE_MODE.
 
         Returns:
-          list: The captured frames.
+          list | FrameStore: The captured frames.
         """
-        frame_to_capture_in_ms = 0
         frame_counter = 0
         image_path_prefix = 'frame'
-        captured_frames = []
-        capture_speed_in_ms = self.__convert_fps_to_ms()
 
         total_frames = self.__get_total_frames(video)
-        with tqdm(total=total_frames, desc='Frame capture progress') as progress_bar:
-
-            while True:
-                video.set(cv2.CAP_PROP_POS_MSEC, frame_to_capture_in_ms)
-                has_frame, frame = video.read()
-
-                if not has_frame:
-                    break
+        frames_to_capture = self.__generate_frames_from_video(video, decode_mode)
+        frame_writer = self.__create_background_writer('cv2') if is_store_video_frames else None
+        try:
+            with tqdm(total=total_frames, desc='Frame capture progress') as progress_bar:
 
-                if is_store_video_frames:
-                    frame_counter += 1
-                    frame_number = str(frame_counter).zfill(len(str(total_frames)))
-                    cv2.imwrite(f'{self._video_frames_store_path}/{image_path_prefix}_{frame_number}.tiff', frame)
+                for frame in frames_to_capture:
+                    if frame_writer:
+                        frame_counter += 1
+                        frame_number = str(frame_counter).zfill(len(str(total_frames)))
+                        frame_writer.submit(
+                            f'{self._video_frames_store_path}/{image_path_prefix}_{frame_number}.tiff', frame)
 
-                captured_frames.append(frame)
-                progress_bar.update(1)
-                frame_to_capture_in_ms += capture_speed_in_ms
+                    captured_frames.append(frame)
+                    progress_bar.update(1)
+        finally:
+            if frame_writer:
+                frame_writer.close()
 
         return captured_frames
 
@@ -0,0 +1,528 @@
+"""
+The frame_store module provides the FrameStore class to keep captured frames in a single
+memory-mapped file on disk instead of holding every frame in memory, the TiffPageFrames
+class to read the pages of a multi-page TIFF file on demand, the PackedMaskStack class to keep
+binary masks bit-packed and the SharedFrameStack class to share frames with worker processes.
+"""
+import json
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import tifffile
+
+
+class FrameStore:
+    """
+    The FrameStore class stores equally sized frames contiguously in a single (n_frames, H, W[, C])
+    file on disk next to a small JSON header holding the frame layout and the capture metadata
+    (fps, pixel scale factor, scale units). Frames are served as zero-copy slices of a read-only
+    memory map, so resident memory scales with the frames in use and not with the video length.
+    """
+
+    DATA_FILE_EXTENSION = 'frames'
+    HEADER_FILE_EXTENSION = 'json'
+    SUPPORTED_MODES = ['r', 'w']
+    DEFAULT_CAPACITY_IN_FRAMES = 64
+
+    def __init__(self, store_path: str, mode: str = 'r', capacity: int = DEFAULT_CAPACITY_IN_FRAMES):
+        """
+        Initializes a new instance of the FrameStore class.
+
+        Args:
+          store_path (str): The path of the store without extension. The frames are kept in
+            '<store_path>.frames' and the header in '<store_path>.json'.
+          mode (str, optional): 'r' opens an existing store read-only, 'w' creates a new (empty) store
+            to append frames to. Defaults to 'r'.
+          capacity (int, optional): The initial number of frames to reserve on disk in 'w' mode.
+            The store grows automatically. Defaults to DEFAULT_CAPACITY_IN_FRAMES.
+
+        Raises:
+          ValueError: If the mode is not supported.
+          FileNotFoundError: If the store does not exist in 'r' mode.
+        """
+        if mode not in FrameStore.SUPPORTED_MODES:
+            raise ValueError(
+                f'Invalid mode: {mode}. Available modes: {FrameStore.SUPPORTED_MODES}')
+
+        self._store_path: str = store_path
+        self._data_file_path: str = f'{store_path}.{FrameStore.DATA_FILE_EXTENSION}'
+        self._header_file_path: str = f'{store_path}.{FrameStore.HEADER_FILE_EXTENSION}'
+        self._mode: str = mode
+        self._frame_shape: tuple = ()
+        self._dtype: np.dtype = np.dtype(np.uint8)
+        self._frame_count: int = 0
+        self._capacity: int = max(int(capacity), 1)
+        self._metadata: dict = {}
+        self._frames: np.memmap | None = None
+
+        if mode == 'r':
+            self.__load_header()
+            self.__map_frames('r')
+        else:
+            self.__remove_store_files()
+
+    def append(self, frame: np.ndarray) -> None:
+        """
+        Appends a frame to the end of the store. The first frame defines the frame shape and dtype.
+
+        Args:
+          frame (np.ndarray): The frame to append.
+
+        Raises:
+          ValueError: If the store is read-only or the frame does not match the frame layout of the store.
+        """
+        self.__validate_writable()
+        frame = np.asarray(frame)
+        if self._frames is None:
+            self._frame_shape = tuple(frame.shape)
+            self._dtype = frame.dtype
+            self.__map_frames('w+')
+        elif tuple(frame.shape) != self._frame_shape or frame.dtype != self._dtype:
+            raise ValueError(
+                f'Frame with shape {frame.shape} and dtype {frame.dtype} does not match the store '
+                f'layout {self._frame_shape} and dtype {self._dtype}.')
+
+        if self._frame_count == self._capacity:
+            self.__grow(self._capacity * 2)
+        self._frames[self._frame_count] = frame
+        self._frame_count += 1
+
+    def finalize(self) -> 'FrameStore':
+        """
+        Flushes the appended frames, trims the reserved space, writes the header and reopens
+        the store read-only.
+
+        Returns:
+          FrameStore: The store itself, to allow chaining.
+        """
+        if self._mode == 'r':
+            return self
+        self.__grow(self._frame_count)
+        self.__write_header()
+        self._mode = 'r'
+        self.__map_frames('r')
+        return self
+
+    def as_array(self) -> np.ndarray:
+        """
+        Retrieves all frames as a single (n_frames, H, W[, C]) array without copying them.
+
+        Returns:
+          np.ndarray: The memory-mapped frames.
+        """
+        if self._frames is None:
+            return np.empty((0,) + self._frame_shape, dtype=self._dtype)
+        return self._frames[:self._frame_count]
+
+    def get_metadata(self) -> dict:
+        """
+        Retrieves the metadata stored in the header.
+
+        Returns:
+          dict: The metadata (e.g. fps, pixel scale factor and scale units).
+        """
+        return dict(self._metadata)
+
+    def set_metadata(self, **metadata) -> None:
+        """
+        Updates the metadata stored in the header. The header is rewritten right away for finalized stores.
+
+        Args:
+          **metadata: The metadata entries to update. Values must be JSON serializable.
+        """
+        self._metadata.update(metadata)
+        if self._mode == 'r':
+            self.__write_header()
+
+    def get_frame_shape(self) -> tuple:
+        """
+        Retrieves the shape of a single frame.
+
+        Returns:
+          tuple: The frame shape.
+        """
+        return self._frame_shape
+
+    def get_store_path(self) -> str:
+        """
+        Retrieves the path of the store without extension.
+
+        Returns:
+          str: The store path.
+        """
+        return self._store_path
+
+    def get_data_file_path(self) -> str:
+        """
+        Retrieves the path of the file holding the frames.
+
+        Returns:
+          str: The data file path.
+        """
+        return self._data_file_path
+
+    def close(self) -> None:
+        """
+        Releases the memory map. Appended frames are finalized first.
+        """
+        if self._mode == 'w':
+            self.finalize()
+        self._frames = None
+
+    def __len__(self) -> int:
+        return self._frame_count
+
+    def __getitem__(self, index):
+        return self.as_array()[index]
+
+    def __iter__(self):
+        frames = self.as_array()
+        for frame_index in range(len(frames)):
+            yield frames[frame_index]
+
+    # Private Methods
+    def __validate_writable(self) -> None:
+        """
+        Checks if frames can be appended to the store.
+
+        Raises:
+          ValueError: If the store is read-only.
+        """
+        if self._mode != 'w':
+            raise ValueError('The frame store is read-only. Create a new store to append frames.')
+
+    def __get_frame_size_in_bytes(self) -> int:
+        """
+        Retrieves the size of a single frame in bytes.
+
+        Returns:
+          int: The frame size in bytes.
+        """
+        return int(np.prod(self._frame_shape, dtype=np.int64)) * self._dtype.itemsize
+
+    def __map_frames(self, mode: str) -> None:
+        """
+        Memory-maps the data file.
+
+        Args:
+          mode (str): The numpy memmap mode.
+        """
+        self._frames = None
+        frame_total = self._capacity if mode == 'w+' else self._frame_count
+        if frame_total == 0 or self.__get_frame_size_in_bytes() == 0:
+            return
+        self._frames = np.memmap(self._data_file_path, dtype=self._dtype, mode=mode,
+                                 shape=(frame_total,) + self._frame_shape)
+
+    def __grow(self, capacity: int) -> None:
+        """
+        Resizes the data file to hold the given number of frames and remaps it.
+
+        Args:
+          capacity (int): The number of frames the data file should hold.
+        """
+        if self._frames is not None:
+            self._frames.flush()
+        self._frames = None
+        with open(self._data_file_path, 'ab') as data_file:
+            data_file.truncate(capacity * self.__get_frame_size_in_bytes())
+        self._capacity = capacity
+        if capacity > 0:
+            self._frames = np.memmap(self._data_file_path, dtype=self._dtype, mode='r+',
+                                     shape=(capacity,) + self._frame_shape)
+
+    def __write_header(self) -> None:
+        """
+        Writes the frame layout and the metadata to the header file.
+        """
+        header = {
+            'frame_count': self._frame_count,
+            'frame_shape': list(self._frame_shape),
+            'dtype': self._dtype.str,
+            'metadata': self._metadata,
+        }
+        with open(self._header_file_path, 'w', encoding='utf-8') as header_file:
+            json.dump(header, header_file, indent=2)
+
+    def __load_header(self) -> None:
+        """
+        Loads the frame layout and the metadata from the header file.
+
+        Raises:
+          FileNotFoundError: If the header or the data file does not exist.
+        """
+        if not os.path.isfile(self._header_file_path) or not os.path.isfile(self._data_file_path):
+            raise FileNotFoundError(f'Frame store not found: {self._store_path}')
+        with open(self._header_file_path, 'r', encoding='utf-8') as header_file:
+            header = json.load(header_file)
+        self._frame_count = int(header['frame_count'])
+        self._frame_shape = tuple(header['frame_shape'])
+        self._dtype = np.dtype(header['dtype'])
+        self._metadata = header.get('metadata', {})
+        self._capacity = self._frame_count
+
+    def __remove_store_files(self) -> None:
+        """
+        Removes the files of an existing store at the same path.
+        """
+        for file_path in (self._data_file_path, self._header_file_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+class TiffPageFrames:
+    """
+    The TiffPageFrames class keeps a multi-page TIFF file open and decodes its pages only when they
+    are accessed, so a stack that is already on disk is not read into memory up front.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initializes a new instance of the TiffPageFrames class.
+
+        Args:
+          file_path (str): The path of the TIFF file.
+        """
+        self._file_path: str = file_path
+        self._tiff: tifffile.TiffFile | None = tifffile.TiffFile(file_path)
+        self._page_count: int = len(self._tiff.pages)
+        self._lock = threading.Lock()
+
+    def get_file_path(self) -> str:
+        """
+        Retrieves the path of the TIFF file.
+
+        Returns:
+          str: The file path.
+        """
+        return self._file_path
+
+    def close(self) -> None:
+        """
+        Closes the TIFF file.
+        """
+        if self._tiff is not None:
+            self._tiff.close()
+            self._tiff = None
+
+    def __len__(self) -> int:
+        return self._page_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[page_index] for page_index in range(*index.indices(self._page_count))]
+        if index < 0:
+            index += self._page_count
+        if index < 0 or index >= self._page_count:
+            raise IndexError(f'Page index {index} is out of range for {self._page_count} pages.')
+        if self._tiff is None:
+            raise ValueError('The TIFF file is closed.')
+        # The pages share a single file handle, so decode them one at a time
+        with self._lock:
+            return self._tiff.pages[index].asarray()
+
+    def __iter__(self):
+        for page_index in range(self._page_count):
+            yield self[page_index]
+
+
+class PackedMaskStack:
+    """
+    The PackedMaskStack class keeps a stack of binary masks bit-packed along the image rows
+    (one bit per pixel instead of one byte for bool or eight bytes for int masks). Masks are
+    unpacked to bool arrays only when they are accessed.
+    """
+
+    def __init__(self, frame_count: int, frame_shape: tuple):
+        """
+        Initializes a new instance of the PackedMaskStack class with all masks empty.
+
+        Args:
+          frame_count (int): The number of masks in the stack.
+          frame_shape (tuple): The (H, W) shape of a single mask.
+
+        Raises:
+          ValueError: If the frame shape is not two-dimensional.
+        """
+        if len(frame_shape) != 2:
+            raise ValueError(f'Masks should be two-dimensional, got shape {frame_shape}.')
+
+        self._frame_shape: tuple = tuple(frame_shape)
+        self._packed_masks: np.ndarray = np.zeros(
+            (frame_count, frame_shape[0], (frame_shape[1] + 7) // 8), dtype=np.uint8)
+
+    @classmethod
+    def from_masks(cls, masks) -> 'PackedMaskStack':
+        """
+        Packs a stack of masks. Non-zero pixels are set.
+
+        Args:
+          masks: The (N, H, W) masks as an array or a sequence of arrays.
+
+        Returns:
+          PackedMaskStack: The packed masks.
+        """
+        mask_stack = cls(len(masks), np.shape(masks[0]))
+        for mask_index, mask in enumerate(masks):
+            mask_stack.set_masks(mask_index, np.asarray(mask)[np.newaxis])
+        return mask_stack
+
+    def set_masks(self, start: int, masks: np.ndarray) -> None:
+        """
+        Packs a chunk of consecutive masks into the stack.
+
+        Args:
+          start (int): The index of the first mask of the chunk.
+          masks (np.ndarray): The (n, H, W) masks. Non-zero pixels are set.
+
+        Raises:
+          ValueError: If the masks do not match the mask shape of the stack.
+        """
+        if tuple(masks.shape[1:]) != self._frame_shape:
+            raise ValueError(
+                f'Masks with shape {masks.shape[1:]} do not match the stack mask shape {self._frame_shape}.')
+        self._packed_masks[start:start + len(masks)] = np.packbits(masks.astype(bool, copy=False), axis=-1)
+
+    def as_array(self) -> np.ndarray:
+        """
+        Unpacks all masks into a single array.
+
+        Returns:
+          np.ndarray: The (N, H, W) bool masks.
+        """
+        return self[:]
+
+    def invert(self) -> 'PackedMaskStack':
+        """
+        Inverts all masks without unpacking them.
+
+        Returns:
+          PackedMaskStack: A new stack with the inverted masks.
+        """
+        inverted_stack = PackedMaskStack(0, self._frame_shape)
+        inverted_stack._packed_masks = np.invert(self._packed_masks)
+        return inverted_stack
+
+    def get_frame_shape(self) -> tuple:
+        """
+        Retrieves the shape of a single mask.
+
+        Returns:
+          tuple: The (H, W) mask shape.
+        """
+        return self._frame_shape
+
+    def get_packed_masks(self) -> np.ndarray:
+        """
+        Retrieves the packed masks without copying them.
+
+        Returns:
+          np.ndarray: The (N, H, ceil(W / 8)) uint8 packed masks.
+        """
+        return self._packed_masks
+
+    def get_memory_usage(self) -> int:
+        """
+        Retrieves the size of the packed masks.
+
+        Returns:
+          int: The size in bytes.
+        """
+        return self._packed_masks.nbytes
+
+    def __len__(self) -> int:
+        return len(self._packed_masks)
+
+    def __getitem__(self, index) -> np.ndarray:
+        # The padding bits at the end of each row are dropped by the count
+        return np.unpackbits(self._packed_masks[index], axis=-1, count=self._frame_shape[1]).view(bool)
+
+    def __iter__(self):
+        for mask_index in range(len(self)):
+            yield self[mask_index]
+
+
+class SharedFrameStack:
+    """
+    The SharedFrameStack class copies a stack of frames once into a shared memory block, so worker
+    processes can read the frames without pickling each array. Bit-packed masks are shared packed.
+    The creating process owns the block and releases it on close.
+    """
+
+    def __init__(self, frames, chunk_size: int = 256):
+        """
+        Initializes a new instance of the SharedFrameStack class and copies the frames into shared memory.
+
+        Args:
+          frames: The frames as an array, a sequence of arrays, a FrameStore or a PackedMaskStack.
+          chunk_size (int, optional): The number of frames copied at once. Defaults to 256.
+        """
+        self._packed_width: int | None = None
+        if isinstance(frames, PackedMaskStack):
+            self._packed_width = frames.get_frame_shape()[1]
+            frames = frames.get_packed_masks()
+        elif isinstance(frames, FrameStore):
+            frames = frames.as_array()
+
+        first_frame = np.asarray(frames[0])
+        self._shape: tuple = (len(frames),) + first_frame.shape
+        self._dtype: np.dtype = first_frame.dtype
+        self._shared_memory = shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(self._shape, dtype=np.int64)) * self._dtype.itemsize, 1))
+        shared_frames = np.ndarray(self._shape, dtype=self._dtype, buffer=self._shared_memory.buf)
+        for start in range(0, len(frames), chunk_size):
+            stop = min(start + chunk_size, len(frames))
+            if isinstance(frames, np.ndarray):
+                shared_frames[start:stop] = frames[start:stop]
+            else:
+                for frame_index in range(start, stop):
+                    shared_frames[frame_index] = frames[frame_index]
+        del shared_frames
+
+    def get_spec(self) -> tuple:
+        """
+        Retrieves what a worker process needs to attach to the shared frames.
+
+        Returns:
+          tuple: The shared memory name, the stack shape, the dtype and the unpacked mask width
+            (None if the frames are not bit-packed).
+        """
+        return (self._shared_memory.name, self._shape, self._dtype.str, self._packed_width)
+
+    def close(self) -> None:
+        """
+        Releases the shared memory block.
+        """
+        if self._shared_memory is None:
+            return
+        self._shared_memory.close()
+        self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def __enter__(self) -> 'SharedFrameStack':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @staticmethod
+    def attach(spec: tuple) -> tuple:
+        """
+        Attaches to the shared frames from a worker process.
+
+        Args:
+          spec (tuple): The spec returned by get_spec.
+
+        Returns:
+          tuple: The shared memory block, which must be kept referenced while the frames are used,
+            and a frame accessor returning the (unpacked) frame of an index.
+        """
+        shared_memory_name, shape, dtype, packed_width = spec
+        shared_block = shared_memory.SharedMemory(name=shared_memory_name)
+        frames = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared_block.buf)
+        if packed_width is None:
+            return shared_block, frames.__getitem__
+        return shared_block, lambda frame_index: np.unpackbits(
+            frames[frame_index], axis=-1, count=packed_width).view(bool)
@@ -0,0 +1,400 @@
+"""
+The gaussian_fit module provides the GaussianFitter class to refine object centroids by fitting
+2D Gaussians, either per window with scipy's curve_fit or to many fit windows at once with a
+vectorized Levenberg-Marquardt solver.
+"""
+import numpy as np
+from scipy.optimize import curve_fit  # type: ignore
+
+
+class GaussianFitter:
+    """
+    The GaussianFitter class refines centroids with the same model, window and bounds as the per-detection
+    curve_fit refinement of Identify: a (2 * fit_window)-sized window is cut around each centroid, an
+    elliptical 2D Gaussian plus offset is fitted to it and the fitted center replaces the centroid unless it
+    moved more than fit_window. Centroids whose window leaves the frame, or whose fit fails, are kept.
+    All windows of the same shape are fitted together as one (K, h, w) batch.
+    """
+
+    DEFAULT_FIT_WINDOW = 7
+    DEFAULT_MAX_ITERATIONS = 100
+    DEFAULT_TOLERANCE = 1e-8
+    DEFAULT_MAX_BATCH_SIZE = 2048
+    MIN_SIGMA = 0.1
+    PARAMETER_COUNT = 6
+    BOUNDARY_STEP_FRACTION = 0.995
+    INITIAL_DAMPING = 1.0
+    MIN_DAMPING = 1e-10
+    MAX_DAMPING = 1e10
+
+    def __init__(self, fit_window: int = DEFAULT_FIT_WINDOW, max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                 tolerance: float = DEFAULT_TOLERANCE, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """
+        Initializes a new instance of the GaussianFitter class.
+
+        Args:
+          fit_window (int, optional): Half-size of the fit window. Defaults to DEFAULT_FIT_WINDOW.
+          max_iterations (int, optional): Maximum number of solver iterations. Defaults to DEFAULT_MAX_ITERATIONS.
+          tolerance (float, optional): Relative decrease of the squared residuals below which a fit has
+            converged. Defaults to DEFAULT_TOLERANCE.
+          max_batch_size (int, optional): Maximum number of windows fitted at once, to bound the memory of
+            the Jacobians. Defaults to DEFAULT_MAX_BATCH_SIZE.
+
+        Raises:
+          ValueError: If the fit window or the batch size is not positive.
+        """
+        if fit_window is None or fit_window <= 0:
+            raise ValueError('The fit window should be positive.')
+        if max_batch_size is None or max_batch_size <= 0:
+            raise ValueError('The batch size should be positive.')
+
+        self._fit_window: int = fit_window
+        self._max_iterations: int = max_iterations
+        self._tolerance: float = tolerance
+        self._max_batch_size: int = max_batch_size
+        self._lower_bounds: np.ndarray = np.array(
+            [0, 0, 0, GaussianFitter.MIN_SIGMA, GaussianFitter.MIN_SIGMA, 0], dtype=np.float64)
+        self._upper_bounds: np.ndarray = np.array(
+            [np.inf, fit_window, fit_window, fit_window, fit_window, np.inf], dtype=np.float64)
+
+    def refine_centroids(self, gray_frames: list, centroids_y: list, centroids_x: list) -> tuple[list, list]:
+        """
+        Refines the centroids of several frames. The windows of all frames are fitted together.
+
+        Args:
+          gray_frames (list): The frames to fit.
+          centroids_y (list): The 'centroid_y' values of the detections of each frame.
+          centroids_x (list): The 'centroid_x' values of the detections of each frame.
+
+        Returns:
+          tuple[list, list]: The refined 'centroid_y' and 'centroid_x' values of each frame (float64).
+        """
+        if len(gray_frames) == 0:
+            return [], []
+        frame_sizes = [len(frame_centroids_y) for frame_centroids_y in centroids_y]
+        frame_offsets = np.concatenate([[0], np.cumsum(frame_sizes)]).astype(np.int64)
+        initial_y = np.concatenate([np.asarray(frame_centroids_y, dtype=np.float64) for frame_centroids_y in centroids_y])
+        initial_x = np.concatenate([np.asarray(frame_centroids_x, dtype=np.float64) for frame_centroids_x in centroids_x])
+        refined_y = initial_y.copy()
+        refined_x = initial_x.copy()
+
+        # Group the windows of all frames by shape, with the detection indices offset into the flat arrays
+        windows_by_shape: dict = {}
+        for frame_position, gray_frame in enumerate(gray_frames):
+            frame_slice = slice(frame_offsets[frame_position], frame_offsets[frame_position + 1])
+            for window_shape, (detection_indices, xmins, ymins, windows) in self.__extract_windows(
+                    np.asarray(gray_frame), initial_y[frame_slice], initial_x[frame_slice]).items():
+                windows_by_shape.setdefault(window_shape, []).append(
+                    (detection_indices + frame_offsets[frame_position], xmins, ymins, windows))
+
+        for window_groups in windows_by_shape.values():
+            detection_indices, xmins, ymins, windows = (
+                np.concatenate(window_parts) for window_parts in zip(*window_groups))
+            for start in range(0, len(windows), self._max_batch_size):
+                batch = slice(start, min(start + self._max_batch_size, len(windows)))
+                params, is_fitted = self.fit_windows(windows[batch])
+                batch_indices = detection_indices[batch]
+                fitted_x = xmins[batch] + params[:, 1]
+                fitted_y = ymins[batch] + params[:, 2]
+                # Keep the initial centroid if the fit failed or moved further than the window
+                with np.errstate(invalid='ignore'):
+                    is_accepted = is_fitted & \
+                        (np.abs(fitted_x - initial_x[batch_indices]) <= self._fit_window) & \
+                        (np.abs(fitted_y - initial_y[batch_indices]) <= self._fit_window)
+                refined_x[batch_indices[is_accepted]] = fitted_x[is_accepted]
+                refined_y[batch_indices[is_accepted]] = fitted_y[is_accepted]
+
+        return np.split(refined_y, frame_offsets[1:-1]), np.split(refined_x, frame_offsets[1:-1])
+
+    def refine_centroids_with_curve_fit(self, gray_frame: np.ndarray, centroids_y: np.ndarray,
+                                        centroids_x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Refines the centroids of a frame one by one with scipy's curve_fit.
+
+        Args:
+          gray_frame (np.ndarray): The frame to fit.
+          centroids_y (np.ndarray): The 'centroid_y' values of the detections.
+          centroids_x (np.ndarray): The 'centroid_x' values of the detections.
+
+        Returns:
+          tuple[np.ndarray, np.ndarray]: The refined 'centroid_y' and 'centroid_x' values (float64).
+        """
+        refined_y = np.array(centroids_y, dtype=np.float64)
+        refined_x = np.array(centroids_x, dtype=np.float64)
+        for detection_index, initial_center in enumerate(zip(centroids_y, centroids_x)):
+            sub_image, xmin, ymin = self.__extract_subimage(gray_frame, initial_center)
+            if sub_image is None:
+                continue
+
+            try:
+                opt_param = self.__fit_gaussian_to_subimage(sub_image)
+                refined_x[detection_index], refined_y[detection_index] = self.__compute_refined_centroid(
+                    opt_param, xmin, ymin, initial_center)
+            except Exception:  # pylint: disable=W0703
+                continue
+        return refined_y, refined_x
+
+    def fit_windows(self, windows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Fits a 2D Gaussian to each window with a projected Levenberg-Marquardt solver, starting from the
+        same initial guess and within the same bounds as the curve_fit refinement.
+
+        Args:
+          windows (np.ndarray): The (K, h, w) windows.
+
+        Returns:
+          tuple[np.ndarray, np.ndarray]: The (K, 6) fitted (amplitude, xo, yo, sigma_x, sigma_y, offset)
+            parameters, in window coordinates, and the (K,) mask of successful fits.
+        """
+        window_count = len(windows)
+        intensities = windows.reshape(window_count, -1).astype(np.float64)
+        y_grid, x_grid = np.mgrid[0:windows.shape[1], 0:windows.shape[2]]
+        x_data = x_grid.ravel().astype(np.float64)
+        y_data = y_grid.ravel().astype(np.float64)
+
+        sigma_guess = max(self._fit_window / 2, 1)
+        params = np.column_stack([
+            intensities.max(axis=1),
+            np.full(window_count, self._fit_window / 2),
+            np.full(window_count, self._fit_window / 2),
+            np.full(window_count, sigma_guess),
+            np.full(window_count, sigma_guess),
+            intensities.min(axis=1)])
+        # Like curve_fit, windows whose initial guess is outside the bounds are not fitted
+        is_feasible = np.all((params >= self._lower_bounds) & (params <= self._upper_bounds), axis=1)
+
+        costs = np.sum((intensities - self.__evaluate_model(params, x_data, y_data)) ** 2, axis=1)
+        damping = np.full(window_count, GaussianFitter.INITIAL_DAMPING)
+        is_active = is_feasible & np.isfinite(costs)
+        diagonal = np.arange(GaussianFitter.PARAMETER_COUNT)
+
+        for _ in range(self._max_iterations):
+            active_indices = np.flatnonzero(is_active)
+            if len(active_indices) == 0:
+                break
+            active_params = params[active_indices]
+            active_intensities = intensities[active_indices]
+            model, jacobian = self.__evaluate_model_and_jacobian(active_params, x_data, y_data)
+
+            # Solve (J^T J + damping * diag(J^T J)) step = J^T residuals for all windows at once
+            normal_matrices = np.einsum('kpi,kpj->kij', jacobian, jacobian)
+            gradients = np.einsum('kpi,kp->ki', jacobian, active_intensities - model)
+            scaling = normal_matrices[:, diagonal, diagonal] + 1e-12
+            normal_matrices[:, diagonal, diagonal] += damping[active_indices, np.newaxis] * scaling
+
+            # Hold the parameters that sit on a bound and are pushed outwards, so the other parameters still move
+            is_held = ((active_params <= self._lower_bounds) & (gradients < 0)) | \
+                      ((active_params >= self._upper_bounds) & (gradients > 0))
+            is_free = ~is_held
+            normal_matrices *= is_free[:, :, np.newaxis] & is_free[:, np.newaxis, :]
+            normal_matrices[:, diagonal, diagonal] += is_held
+            gradients = np.where(is_held, 0, gradients)
+            steps = np.linalg.solve(normal_matrices, gradients[..., np.newaxis])[..., 0]
+
+            candidate_params = self.__take_feasible_steps(active_params, steps)
+            candidate_costs = np.sum(
+                (active_intensities - self.__evaluate_model(candidate_params, x_data, y_data)) ** 2, axis=1)
+            active_costs = costs[active_indices]
+            is_improved = np.isfinite(candidate_costs) & (candidate_costs < active_costs)
+
+            improved_indices = active_indices[is_improved]
+            params[improved_indices] = candidate_params[is_improved]
+            costs[improved_indices] = candidate_costs[is_improved]
+            damping[active_indices] = np.where(is_improved, np.maximum(damping[active_indices] / 10, GaussianFitter.MIN_DAMPING),
+                                               damping[active_indices] * 10)
+
+            relative_decrease = (active_costs - candidate_costs) / np.maximum(active_costs, np.finfo(np.float64).tiny)
+            is_step_small = np.linalg.norm(candidate_params - active_params, axis=1) < \
+                self._tolerance * (self._tolerance + np.linalg.norm(active_params, axis=1))
+            is_converged = (is_improved & (relative_decrease < self._tolerance)) | is_step_small | \
+                (damping[active_indices] > GaussianFitter.MAX_DAMPING)
+            is_active[active_indices[is_converged]] = False
+
+        # Windows still active after the last iteration did not converge
+        is_fitted = is_feasible & ~is_active & np.all(np.isfinite(params), axis=1) & np.isfinite(costs)
+        return params, is_fitted
+
+    # Private Methods
+    @staticmethod
+    def __2d_gaussian(coords, amplitude, xo, yo, sigma_x, sigma_y, offset):
+        """
+        A static 2D Gaussian model.
+        """
+        x, y = coords
+        return (amplitude * np.exp(-(((x - xo) ** 2) / (2 * sigma_x ** 2) +
+                                     ((y - yo) ** 2) / (2 * sigma_y ** 2))) + offset).ravel()
+
+    def __extract_subimage(self, gray_frame: np.ndarray, center: tuple):
+        """
+        Extracts a sub-image centered at `center` using a window of size fit_window.
+
+        Args:
+          gray_frame (np.ndarray): Grayscale image.
+          center (tuple): Center in (y, x) order.
+
+        Returns:
+          sub_image (np.ndarray): Extracted sub-image.
+          xmin, ymin (int): Top-left coordinates of the sub-image.
+          If the window exceeds image boundaries, returns (None, None, None).
+        """
+        x_center = center[1]  # center is (y, x)
+        y_center = center[0]
+        xmin = int(x_center - self._fit_window)
+        xmax = int(x_center + self._fit_window)
+        ymin = int(y_center - self._fit_window)
+        ymax = int(y_center + self._fit_window)
+
+        if xmin < 0 or ymin < 0 or xmax >= gray_frame.shape[1] or ymax >= gray_frame.shape[0]:
+            return None, None, None
+        sub_image = gray_frame[ymin:ymax, xmin:xmax]
+        return sub_image, xmin, ymin
+
+    def __fit_gaussian_to_subimage(self, sub_image: np.ndarray) -> np.ndarray:
+        """
+        Performs a 2D Gaussian fit on the given sub-image.
+
+        Args:
+          sub_image (np.ndarray): The extracted sub-image.
+
+        Returns:
+          np.ndarray: Optimized parameters.
+        """
+        x_vals, y_vals = np.meshgrid(
+            np.arange(sub_image.shape[1]), np.arange(sub_image.shape[0]))
+        x_data = x_vals.ravel()
+        y_data = y_vals.ravel()
+        intensity_data = sub_image.ravel()
+
+        amplitude_guess = np.max(sub_image)
+        sigma_guess = max(self._fit_window / 2, 1)
+        offset_guess = np.min(sub_image)
+        initial_guess = (amplitude_guess, self._fit_window / 2,
+                         self._fit_window / 2, sigma_guess, sigma_guess, offset_guess)
+        bounds = (tuple(self._lower_bounds), tuple(self._upper_bounds))
+
+        opt_param, _ = curve_fit(GaussianFitter.__2d_gaussian, (x_data, y_data), intensity_data,
+                                 p0=initial_guess, bounds=bounds)
+        return opt_param
+
+    def __compute_refined_centroid(self, opt_param: np.ndarray, xmin: int, ymin: int, initial_center: tuple):
+        """
+        Computes the refined centroid (in full-image coordinates) from the fitted parameters.
+
+        Args:
+          opt_param (np.ndarray): Optimized Gaussian parameters.
+          xmin, ymin (int): Top-left coordinates of the sub-image.
+          initial_center (tuple): Original centroid in (y, x) order.
+
+        Returns:
+          (refined_x, refined_y): The refined centroid.
+          If the shift exceeds fit_window, returns the initial centroid.
+        """
+        refined_x = xmin + opt_param[1]
+        refined_y = ymin + opt_param[2]
+        x_init = initial_center[1]
+        y_init = initial_center[0]
+        if abs(refined_x - x_init) > self._fit_window or abs(refined_y - y_init) > self._fit_window:
+            return x_init, y_init
+        return refined_x, refined_y
+
+    def __extract_windows(self, gray_frame: np.ndarray, centroids_y: np.ndarray, centroids_x: np.ndarray) -> dict:
+        """
+        Cuts the fit windows of a frame, with the same truncation and boundary checks as the curve_fit refinement.
+        Windows are grouped by shape, as the truncation can shorten windows at the top and left borders.
+
+        Args:
+          gray_frame (np.ndarray): The frame.
+          centroids_y (np.ndarray): The 'centroid_y' values, used as window rows.
+          centroids_x (np.ndarray): The 'centroid_x' values, used as window columns.
+
+        Returns:
+          dict: The (detection indices, xmin, ymin, windows) of each window shape.
+        """
+        with np.errstate(invalid='ignore'):
+            xmins = np.trunc(centroids_x - self._fit_window)
+            xmaxs = np.trunc(centroids_x + self._fit_window)
+            ymins = np.trunc(centroids_y - self._fit_window)
+            ymaxs = np.trunc(centroids_y + self._fit_window)
+            is_inside = (xmins >= 0) & (ymins >= 0) & (xmaxs < gray_frame.shape[1]) & (ymaxs < gray_frame.shape[0])
+
+        inside_indices = np.flatnonzero(is_inside)
+        xmins = xmins[inside_indices].astype(np.int64)
+        ymins = ymins[inside_indices].astype(np.int64)
+        window_heights = ymaxs[inside_indices].astype(np.int64) - ymins
+        window_widths = xmaxs[inside_indices].astype(np.int64) - xmins
+
+        windows_by_shape: dict = {}
+        for window_height, window_width in set(zip(window_heights.tolist(), window_widths.tolist())):
+            is_shape = (window_heights == window_height) & (window_widths == window_width)
+            rows = ymins[is_shape, np.newaxis] + np.arange(window_height)
+            columns = xmins[is_shape, np.newaxis] + np.arange(window_width)
+            windows = gray_frame[rows[:, :, np.newaxis], columns[:, np.newaxis, :]]
+            windows_by_shape[(window_height, window_width)] = (
+                inside_indices[is_shape], xmins[is_shape], ymins[is_shape], windows)
+        return windows_by_shape
+
+    def __take_feasible_steps(self, params: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        """
+        Takes the solver steps, keeping each parameter inside its bounds. A parameter whose step would
+        cross a bound moves most of the way to it instead, so it can approach an optimum on the bound
+        without getting stuck there (e.g. a zero amplitude, which flattens the other derivatives).
+
+        Args:
+          params (np.ndarray): The (K, 6) current parameters.
+          steps (np.ndarray): The (K, 6) solver steps.
+
+        Returns:
+          np.ndarray: The (K, 6) new parameters.
+        """
+        candidate_params = params + steps
+        candidate_params = np.where(
+            candidate_params > self._upper_bounds,
+            params + GaussianFitter.BOUNDARY_STEP_FRACTION * (self._upper_bounds - params), candidate_params)
+        candidate_params = np.where(
+            candidate_params < self._lower_bounds,
+            params + GaussianFitter.BOUNDARY_STEP_FRACTION * (self._lower_bounds - params), candidate_params)
+        return candidate_params
+
+    def __evaluate_model(self, params: np.ndarray, x_data: np.ndarray, y_data: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the 2D Gaussian model of each parameter set on the window pixels.
+
+        Args:
+          params (np.ndarray): The (K, 6) parameters.
+          x_data, y_data (np.ndarray): The (P,) pixel coordinates.
+
+        Returns:
+          np.ndarray: The (K, P) model intensities.
+        """
+        return self.__evaluate_model_and_jacobian(params, x_data, y_data, is_jacobian=False)[0]
+
+    def __evaluate_model_and_jacobian(self, params: np.ndarray, x_data: np.ndarray, y_data: np.ndarray,
+                                      is_jacobian: bool = True) -> tuple:
+        """
+        Evaluates the 2D Gaussian model and its derivatives with respect to the parameters.
+
+        Args:
+          params (np.ndarray): The (K, 6) parameters.
+          x_data, y_data (np.ndarray): The (P,) pixel coordinates.
+          is_jacobian (bool, optional): Whether to compute the Jacobian. Defaults to True.
+
+        Returns:
+          tuple: The (K, P) model intensities and the (K, P, 6) Jacobian (None if not computed).
+        """
+        amplitude, xo, yo, sigma_x, sigma_y, offset = (params[:, [index]] for index in range(GaussianFitter.PARAMETER_COUNT))
+        x_offsets = x_data - xo
+        y_offsets = y_data - yo
+        gaussian = np.exp(-(x_offsets ** 2 / (2 * sigma_x ** 2) + y_offsets ** 2 / (2 * sigma_y ** 2)))
+        model = amplitude * gaussian + offset
+        if not is_jacobian:
+            return model, None
+
+        scaled_gaussian = amplitude * gaussian
+        jacobian = np.stack([
+            gaussian,
+            scaled_gaussian * x_offsets / sigma_x ** 2,
+            scaled_gaussian * y_offsets / sigma_y ** 2,
+            scaled_gaussian * x_offsets ** 2 / sigma_x ** 3,
+            scaled_gaussian * y_offsets ** 2 / sigma_y ** 3,
+            np.ones_like(gaussian)], axis=-1)
+        return model, jacobian
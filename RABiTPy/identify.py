@@ -2,22 +2,26 @@
 The identify module provides the Identify class to perform object identification
 on frames using different methods.
 """
+import hashlib
+import multiprocessing
 import os
+import queue
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
 from typing import List
 
 import cv2
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import torch  # type: ignore
 from cellpose_omni import core, models  # type: ignore
 from cellpose_omni.models import MODEL_NAMES
 from matplotlib.lines import Line2D  # type: ignore
 from omnipose.utils import normalize99  # type: ignore
-from scipy.optimize import curve_fit  # type: ignore
 from skimage import measure
-from skimage.color import rgb2gray
 from skimage.filters import threshold_isodata  # pylint: disable=E0611
 from skimage.filters import threshold_li  # pylint: disable=E0611
 from skimage.filters import threshold_mean  # pylint: disable=E0611
@@ -27,11 +31,120 @@ from skimage.filters import threshold_triangle  # pylint: disable=E0611
 from skimage.filters import threshold_yen  # pylint: disable=E0611
 from skimage.filters import \
     try_all_threshold  # pylint: disable=E0611; pylint: disable=E0611
+from skimage.util import img_as_float32
 from tqdm import tqdm, trange
 
+from .cache import FrameCache, SegmentationCache
 from .capture import Capture
 from .constants import (OMNIPOSE_DEFAULT_PARAMS, AvailableOperations,
                         AvailableProps, PropsThreshold)
+from .frame_store import FrameStore, PackedMaskStack, SharedFrameStack
+from .gaussian_fit import GaussianFitter
+from .tiling import FrameTiler
+from .writer import BackgroundWriter
+
+# State of the worker processes, set once per process by the pool initializer
+_shared_frames_worker_state: dict = {}
+
+
+def _initialize_shared_frames_worker(shared_frames_spec: tuple) -> None:
+    """
+    Attaches a worker process to the shared working frames.
+    Args:
+        shared_frames_spec (tuple): The spec of the SharedFrameStack holding the frames.
+    Returns:
+        None
+    """
+    shared_block, get_frame = SharedFrameStack.attach(shared_frames_spec)
+    _shared_frames_worker_state['shared_block'] = shared_block
+    _shared_frames_worker_state['get_frame'] = get_frame
+
+
+def _initialize_gaussian_fit_worker(shared_frames_spec: tuple, fit_window: int, engine: str) -> None:
+    """
+    Attaches a worker process to the shared working frames and creates its Gaussian fitter.
+    Args:
+        shared_frames_spec (tuple): The spec of the SharedFrameStack holding the frames.
+        fit_window (int): Half-size of the window for the Gaussian fit.
+        engine (str): The Gaussian fit engine, 'curve_fit' or 'vectorized'.
+    Returns:
+        None
+    """
+    _initialize_shared_frames_worker(shared_frames_spec)
+    _shared_frames_worker_state['gaussian_fitter'] = GaussianFitter(fit_window)
+    _shared_frames_worker_state['engine'] = engine
+
+
+def _measure_region_props_of_shared_frames(frame_indices: List[int], properties: tuple) -> List[dict]:
+    """
+    Labels some of the shared frames and measures the properties of their regions.
+    Args:
+        frame_indices (List[int]): The indices of the frames.
+        properties (tuple): The skimage names of the properties to measure.
+    Returns:
+        List[dict]: The region property columns of each frame, in the order of the indices.
+    """
+    get_frame = _shared_frames_worker_state['get_frame']
+    return [measure.regionprops_table(measure.label(get_frame(frame_index)), properties=properties)
+            for frame_index in frame_indices]
+
+
+def _refine_centroids_of_shared_frames(frame_indices: List[int], centroids_y_list: List[np.ndarray],
+                                       centroids_x_list: List[np.ndarray]) -> tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Refines the centroids of some of the shared frames with the Gaussian fitter of the worker.
+    Args:
+        frame_indices (List[int]): The indices of the frames.
+        centroids_y_list (List[np.ndarray]): The 'centroid_y' values of the detections of each frame.
+        centroids_x_list (List[np.ndarray]): The 'centroid_x' values of the detections of each frame.
+    Returns:
+        tuple[List[np.ndarray], List[np.ndarray]]: The refined 'centroid_y' and 'centroid_x' values of each frame.
+    """
+    get_frame = _shared_frames_worker_state['get_frame']
+    gaussian_fitter = _shared_frames_worker_state['gaussian_fitter']
+    gray_frames = [get_frame(frame_index) for frame_index in frame_indices]
+    if _shared_frames_worker_state['engine'] == 'vectorized':
+        return gaussian_fitter.refine_centroids(gray_frames, centroids_y_list, centroids_x_list)
+
+    refined_centroids = [gaussian_fitter.refine_centroids_with_curve_fit(gray_frame, centroids_y, centroids_x)
+                         for gray_frame, centroids_y, centroids_x in zip(gray_frames, centroids_y_list, centroids_x_list)]
+    return [refined_y for refined_y, _ in refined_centroids], [refined_x for _, refined_x in refined_centroids]
+
+
+def _initialize_omnipose_worker(shared_frames_spec: tuple, model_name: str, use_gpu: bool, params: dict,
+                                thread_count: int) -> None:
+    """
+    Attaches a worker process to the shared normalized frames and creates its own omnipose model.
+    Args:
+        shared_frames_spec (tuple): The spec of the SharedFrameStack holding the normalized frames.
+        model_name (str): The name of the omnipose model.
+        use_gpu (bool): Whether the model uses the GPU.
+        params (dict): The parameters of the omnipose model.
+        thread_count (int): The number of threads of the worker, to not oversubscribe the CPUs.
+    Returns:
+        None
+    """
+    torch.set_num_threads(thread_count)
+    cv2.setNumThreads(thread_count)
+    _initialize_shared_frames_worker(shared_frames_spec)
+    _shared_frames_worker_state['omnipose_model'] = models.CellposeModel(gpu=use_gpu, model_type=model_name)
+    _shared_frames_worker_state['omnipose_params'] = params
+
+
+def _segment_shared_frames(start: int, stop: int) -> List[np.ndarray]:
+    """
+    Segments a batch of the shared normalized frames with the omnipose model of the worker.
+    Args:
+        start (int): The index of the first frame.
+        stop (int): The index after the last frame.
+    Returns:
+        List[np.ndarray]: The masks of the frames, in frame order.
+    """
+    get_frame = _shared_frames_worker_state['get_frame']
+    masks, _, _ = _shared_frames_worker_state['omnipose_model'].eval(
+        [get_frame(frame_index) for frame_index in range(start, stop)],
+        **_shared_frames_worker_state['omnipose_params'])
+    return list(masks)
 
 
 class Identify:
@@ -39,6 +152,27 @@ class Identify:
     The Identify class provides methods to perform object identification on frames
     using nominal thresholding and omnipose models.
     """
+    DEFAULT_CHUNK_SIZE_IN_FRAMES = 256
+    DEFAULT_FRAME_CACHE_FOLDER_NAME = 'frame_cache'
+    DEFAULT_SEGMENTATION_CACHE_FOLDER_NAME = 'segmentation_cache'
+    SHARDS_PER_WORKER = 4
+    SUPPORTED_GAUSSIAN_FIT_ENGINES = ['curve_fit', 'vectorized']
+    DEFAULT_GAUSSIAN_FIT_ENGINE = 'curve_fit'
+    SUPPORTED_GAUSSIAN_FIT_BACKENDS = ['thread', 'process']
+    DEFAULT_GAUSSIAN_FIT_BACKEND = 'thread'
+    REGION_PROPS_COLUMN_DTYPES = {
+        'label': np.int32,
+        'centroid_x': np.float32,
+        'centroid_y': np.float32,
+        'frame': np.int32,
+    }
+    GRAYSCALE_COEFFICIENTS = np.array([0.2125, 0.7154, 0.0721], dtype=np.float32)
+    # Single channel frames of these types are cached as they are, other frames as float32 grayscale
+    GRAYSCALE_CACHE_DTYPES = (np.uint8, np.uint16)
+    PIPELINE_QUEUE_SIZE = 2
+    PIPELINE_POLL_INTERVAL_IN_SECONDS = 0.1
+    DEFAULT_OMNIPOSE_THREADS_PER_WORKER = 1
+    BINARY_CHECK_SAMPLE_SIZE = 8
 
     def __init__(self, capture_frame_object: Capture):
         """
@@ -55,14 +189,29 @@ class Identify:
         self._parent = capture_frame_object
         self._captured_frames: List = capture_frame_object.get_captured_frames()
         self._working_frames: List = self._captured_frames
+        self._captured_frames_version: int = 0
+        self._working_frames_version: int = 0
+        self._is_working_frames_binary: bool | None = None
+        self._frame_cache: FrameCache = FrameCache()
+        self._chunk_size: int = Identify.DEFAULT_CHUNK_SIZE_IN_FRAMES
         self._directory: str = capture_frame_object.get_directory()
 
         self._region_props_dataframe: pd.DataFrame = pd.DataFrame()
+        self._region_props_properties: tuple = ()
+        self._region_props_fingerprints: List[str] = []
+        self._unfiltered_region_props_dataframe: pd.DataFrame | None = None
+        self._region_props_filters: List[PropsThreshold] = []
+        self._is_region_props_centroids_optimized: bool = False
 
         self._normalized_frames: List = []
         self._omnipose_model: models.CellposeModel | None = None
         self._omnipose_params: dict = {}
+        self._omnipose_model_name: str = ''
+        self._is_omnipose_gpu_activated: bool = False
+        self._segmentation_cache: SegmentationCache | None = None
         self._mask_store_path: str = ''
+        self._segmentation_timings: dict = {}
+        self._background_writer_options: dict = capture_frame_object.get_background_writer_options()
 
     def show_frames(self, images_to_show_count: int = 5, images_per_row: int = 5, use_gray_cmap: bool = False, image_size: tuple = (5, 5)) -> None:
         """
@@ -117,28 +266,27 @@ class Identify:
         plt.show()
 
     # Nominal Methods
-    def apply_grayscale_thresholding(self, threshold: float = 0.5, is_update_frames: bool = True) -> List:
+    def apply_grayscale_thresholding(self, threshold: float = 0.5, is_update_frames: bool = True, is_pack_masks: bool = False) -> np.ndarray | PackedMaskStack:
         """
         Applies grayscale thresholding to the captured frames.
+        The frames are converted to grayscale once and the threshold is applied to the whole stack at once.
         Args:
             threshold (float): The threshold value to use for thresholding.
             is_update_frames (bool): Whether to update the captured frames.
+            is_pack_masks (bool): Whether to bit-pack the binary frames to save memory. Default is False.
         Returns:
-            List: The updated frames after applying grayscale thresholding.
+            np.ndarray | PackedMaskStack: The (N, H, W) binary frames after applying grayscale thresholding.
         """
-        updated_frames: List = []
         if threshold < 0 or threshold > 1:
             raise ValueError(
                 'The threshold value should be between 0 and 1.')
 
-        for frame_index in trange(len(self._captured_frames), desc='Applying grayscale thresholding'):
-            gray_scale = rgb2gray(self._captured_frames[frame_index])
-            gray_scale_opp = 1 - gray_scale
-            binary_image = gray_scale_opp > threshold
-            updated_frames.append(binary_image)
+        updated_frames = self.__apply_to_grayscale_frames(
+            lambda gray_scale: (1 - gray_scale) > threshold,
+            desc='Applying grayscale thresholding', is_pack_masks=is_pack_masks)
 
         if is_update_frames:
-            self._working_frames = updated_frames
+            self.__set_working_frames(updated_frames, is_binary_frames=True)
 
         print('Threshold applied successfully.')
         return updated_frames
@@ -153,14 +301,15 @@ class Identify:
         Returns:
             None
         """
-        gray_image = rgb2gray(self._captured_frames[frame_index])
+        gray_image = self.__get_grayscale_frame(frame_index)
         fig, ax = try_all_threshold(gray_image, figsize=(10, 8), verbose=False)
         print("Following thresholding algorithms are applied: 'isodata', 'li', 'mean', 'minimum', 'otsu', 'triangle', 'yen'")
         plt.show()
 
-    def apply_algorithm_based_thresholding(self, algorithm: str = 'otsu', is_color_inverse: bool = False, is_update_frames: bool = True, **kwargs) -> List:
+    def apply_algorithm_based_thresholding(self, algorithm: str = 'otsu', is_color_inverse: bool = False, is_update_frames: bool = True, is_pack_masks: bool = False, **kwargs) -> np.ndarray | PackedMaskStack:
         """
         Applies algorithm-based thresholding to the captured frames.
+        The threshold value is computed per frame, and applied to each chunk of the grayscale stack at once.
         NOTE: If the dark objects over a light background are getting displayed, Put 'is_color_inverse' to True to correct it before moving to the next step.
         Args:
             algorithm (str): The algorithm to use for thresholding. 
@@ -168,11 +317,12 @@ class Identify:
                 Default is 'otsu'.
             is_update_frames (bool): Whether to update the captured frames.
             is_color_inverse (bool): Whether to invert the colors. Default is False.
+            is_pack_masks (bool): Whether to bit-pack the binary frames to save memory. Default is False.
             **kwargs: Additional keyword arguments for the thresholding algorithms. 
                 Check the skimage documentation for more information on other passable args
                 Link: https://scikit-image.org/docs/stable/api/skimage.filters.html
         Returns:
-            List: The updated frames after applying algorithm-based thresholding.
+            np.ndarray | PackedMaskStack: The (N, H, W) binary frames after applying algorithm-based thresholding.
         """
 
         # Mapping of available algorithms to their corresponding functions
@@ -192,20 +342,19 @@ class Identify:
 
         # Retrieve the threshold function based on the selected algorithm
         threshold_function = algorithm_function_map[algorithm]
-        updated_frames: List = []
 
-        for frame_index in trange(len(self._captured_frames), desc='Applying algorithm-based thresholding'):
-            gray_scale = rgb2gray(self._captured_frames[frame_index])
-            
+        def apply_threshold(gray_scale: np.ndarray) -> np.ndarray:
             # Invert the colors if required
             gray_scale = 1 - gray_scale if is_color_inverse else gray_scale
+            threshold_values = np.array([threshold_function(frame) for frame in gray_scale],
+                                        dtype=gray_scale.dtype)
+            return gray_scale > threshold_values[:, np.newaxis, np.newaxis]
 
-            threshold_value = threshold_function(gray_scale)
-            binary_image = gray_scale > threshold_value
-            updated_frames.append(binary_image)
+        updated_frames = self.__apply_to_grayscale_frames(
+            apply_threshold, desc='Applying algorithm-based thresholding', is_pack_masks=is_pack_masks)
 
         if is_update_frames:
-            self._working_frames = updated_frames
+            self.__set_working_frames(updated_frames, is_binary_frames=True)
 
         print(
             f'Selected {algorithm} Algorithm-based thresholding applied successfully.')
@@ -216,7 +365,7 @@ class Identify:
 
         return updated_frames
 
-    def apply_gaussian_adaptive_thresholding(self, block_size: int = 11, c: int = 2, is_color_inverse: bool = False, is_update_frames: bool = True) -> List:
+    def apply_gaussian_adaptive_thresholding(self, block_size: int = 11, c: int = 2, is_color_inverse: bool = False, is_update_frames: bool = True, is_pack_masks: bool = False) -> np.ndarray | PackedMaskStack:
         """
         Applies Gaussian adaptive thresholding to the captured frames.
         NOTE: If the dark objects over a light background are getting displayed, Put 'is_color_inverse' to True to correct it before moving to the next step.
@@ -225,34 +374,31 @@ class Identify:
             c (int): The constant to subtract from the mean. Default is 2.
             is_color_inverse (bool): Whether to invert the colors. Default is False.
             is_update_frames (bool): Whether to update the captured frames.
+            is_pack_masks (bool): Whether to bit-pack the binary frames to save memory. Default is False.
         Returns:
-            List: The updated frames after applying Gaussian adaptive thresholding.
+            np.ndarray | PackedMaskStack: The (N, H, W) binary frames after applying Gaussian adaptive thresholding.
         """
-        updated_frames: List = []
-        for frame_index in trange(len(self._captured_frames), desc='Applying Gaussian adaptive thresholding'):
-            gray_scale = rgb2gray(self._captured_frames[frame_index])
-            gray_scale = (gray_scale * 255).astype('uint8')
+        def apply_threshold(gray_scale: np.ndarray) -> np.ndarray:
+            gray_scale = np.rint(gray_scale * 255).astype('uint8')
 
             # Apply Gaussian adaptive thresholding
-            thresholded_image = cv2.adaptiveThreshold(
-                gray_scale, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c
-            )
+            thresholded_images = np.stack([cv2.adaptiveThreshold(
+                frame, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c
+            ) for frame in gray_scale])
 
-            # Convert thresholded image to binary format (True/False)
-            # This creates a boolean array (True/False)
-            binary_image = thresholded_image > 0
+            # Convert thresholded images to binary format (True/False)
+            binary_images = thresholded_images > 0
 
-            # Convert to 0/1 representation
-            binary_image = binary_image.astype(int)
-
-            # Invert the binary image if is_color_inverse is True
+            # Invert the binary images if is_color_inverse is True
             if is_color_inverse:
-                binary_image = 1 - binary_image  # Inverts the binary image
+                binary_images = ~binary_images
+            return binary_images
 
-            updated_frames.append(binary_image)
+        updated_frames = self.__apply_to_grayscale_frames(
+            apply_threshold, desc='Applying Gaussian adaptive thresholding', is_pack_masks=is_pack_masks)
 
         if is_update_frames:
-            self._working_frames = updated_frames
+            self.__set_working_frames(updated_frames, is_binary_frames=True)
 
         print('Gaussian adaptive thresholding applied successfully.')
         print(
@@ -261,83 +407,191 @@ class Identify:
         )
         return updated_frames
 
-    def apply_color_inverse(self, is_update_frames: bool = True) -> List:
+    def apply_color_inverse(self, is_update_frames: bool = True) -> np.ndarray:
         """
-        Applies color inverse to the captured frames.
+        Applies color inverse to the captured frames, chunk by chunk over the whole stack.
+        The inverted frames are kept in the frame cache.
         Args:
             is_update_frames (bool): Whether to update the captured frames.
         Returns:
-            List: The updated frames after applying color inverse.
+            np.ndarray: The read-only (N, H, W[, C]) frames after applying color inverse.
         """
-        updated_frames: List = []
-        for frame_index in trange(len(self._captured_frames), desc='Applying color inverse'):
-            inverted_frame = cv2.bitwise_not(
-                self._captured_frames[frame_index])
-            updated_frames.append(inverted_frame)
+        updated_frames = self._frame_cache.get_or_compute(
+            self.__get_frame_cache_key('inverted', 'captured'), self.__invert_captured_frames)
 
         if is_update_frames:
-            self._working_frames = updated_frames
+            self.__set_working_frames(updated_frames)
 
         print('Color inverse applied successfully.')
         return updated_frames
 
-    def generate_region_props_to_dataframe(self, view_props: List[AvailableProps]) -> pd.DataFrame:
+    def refresh_captured_frames(self) -> None:
+        """
+        Reloads the captured frames from the Capture object, e.g. after frames were appended to the acquisition
+        or the video was trimmed. The working frames are reset to the captured frames and the normalized frames
+        are dropped. The region properties are kept, so an incremental generation only measures the new or
+        changed frames once they are processed again.
+        Returns:
+            None
+        """
+        self._captured_frames = self._parent.get_captured_frames()
+        self._captured_frames_version += 1
+        self.__set_working_frames(self._captured_frames)
+        self._normalized_frames = []
+        print(f'{len(self._captured_frames)} captured frames loaded.')
+
+    def set_chunk_size(self, chunk_size: int = DEFAULT_CHUNK_SIZE_IN_FRAMES) -> None:
+        """
+        Sets the number of frames processed at once by the thresholding methods. Larger chunks are faster,
+        smaller chunks bound the temporary memory.
+        Args:
+            chunk_size (int): The number of frames per chunk. Default is DEFAULT_CHUNK_SIZE_IN_FRAMES.
+        Returns:
+            None
+        """
+        if chunk_size is None or chunk_size <= 0:
+            raise ValueError('The chunk size should be a positive number of frames.')
+        self._chunk_size = chunk_size
+
+    def configure_frame_cache(self, max_memory_in_bytes: int = FrameCache.DEFAULT_MAX_MEMORY_IN_BYTES,
+                              is_spill_to_disk: bool = False,
+                              spill_store_path: str = DEFAULT_FRAME_CACHE_FOLDER_NAME) -> None:
+        """
+        Configures the cache of the derived frames (grayscale, inverted and normalized frames).
+        The least recently used frames are evicted once the memory budget is exceeded. The current cache is cleared.
+        Args:
+            max_memory_in_bytes (int): The memory budget of the cached frames. Default is 2 GiB.
+            is_spill_to_disk (bool): Whether to save evicted frames to disk instead of dropping them. Default is False.
+            spill_store_path (str): The folder to save evicted frames to, relative to the directory. Default is 'frame_cache'.
+        Returns:
+            None
+        """
+        self._frame_cache.clear()
+        spill_directory = os.path.join(self._directory, spill_store_path) if is_spill_to_disk else None
+        self._frame_cache = FrameCache(max_memory_in_bytes, spill_directory)
+
+    def clear_frame_cache(self) -> None:
+        """
+        Clears the cached frames (grayscale, inverted and normalized frames). The next call computes them again.
+        Returns:
+            None
+        """
+        self._frame_cache.clear()
+        self._normalized_frames = []
+
+    def get_frame_cache_statistics(self) -> dict:
+        """
+        Retrieves the statistics of the frame cache.
+        Returns:
+            dict: The hit and miss counts, the number of in-memory and spilled entries and the memory usage.
+        """
+        return self._frame_cache.get_statistics()
+
+    def generate_region_props_to_dataframe(self, view_props: List[AvailableProps], is_parallel: bool = False, max_workers: int = None,
+                                           is_incremental: bool = False) -> pd.DataFrame:
         """
         Generates region properties for the captured frames.
+        In parallel mode, the working frames are copied once into shared memory and sharded across a process pool.
+        In incremental mode, only the working frames that are new or changed since the last generation with the same
+        view properties are measured. Their rows replace the rows of the same frames in an unfiltered copy of the
+        region properties, the rows of frames that no longer exist are dropped, and the filters applied since the
+        last full generation are applied again. Optimized centroids are not kept, so the Gaussian fit has to be run again.
         Args:
             view_props (List[AvailableProps]): The list of view properties to generate region properties for.
+            is_parallel (bool): Whether to measure the frames in parallel processes. Default is False.
+            max_workers (int): The maximum number of processes to use in parallel mode. None uses the number of CPUs.
+            is_incremental (bool): Whether to only measure the new or changed frames. Default is False.
         Returns:
             pd.DataFrame: The region properties dataframe.
         """
         if not view_props or len(view_props) == 0:
             raise ValueError('The view properties cannot be None or empty.')
 
-        region_props_dataframe = pd.DataFrame()
-        for frame_index in trange(len(self._working_frames), desc='Generating region properties'):
-            labelled_frame = measure.label(self._working_frames[frame_index])
-            properties = tuple(prop.value for prop in view_props)
-            region_props = measure.regionprops_table(
-                labelled_frame, properties=properties)
-
-            frame_dataframe = pd.DataFrame(region_props)
-            frame_dataframe.columns = self.__get_custom_column_names(
-                view_props)
-            frame_dataframe['frame'] = frame_index + 1
+        properties = tuple(prop.value for prop in view_props)
+        frame_fingerprints = [self.__get_frame_fingerprint(frame) for frame in tqdm(
+            self._working_frames, desc='Fingerprinting frames')] if is_incremental else []
+        is_merging = is_incremental and properties == self._region_props_properties \
+            and self._unfiltered_region_props_dataframe is not None
+        if is_merging:
+            frame_indices = [frame_index for frame_index, frame_fingerprint in enumerate(frame_fingerprints)
+                             if frame_index >= len(self._region_props_fingerprints)
+                             or self._region_props_fingerprints[frame_index] != frame_fingerprint]
+            print(f'{len(frame_indices)} of {len(frame_fingerprints)} frames are new or changed.')
+        else:
+            frame_indices = list(range(len(self._working_frames)))
 
-            region_props_dataframe = pd.concat(
-                [region_props_dataframe, frame_dataframe], ignore_index=True)
+        if is_parallel and len(frame_indices) > 0:
+            region_props_of_frames = self.__measure_region_props_in_parallel(frame_indices, properties, max_workers)
+        else:
+            region_props_of_frames = []
+            for frame_index in tqdm(frame_indices, desc='Generating region properties'):
+                region_props_of_frames.append(self.__measure_region_props_of_frame(
+                    self._working_frames[frame_index], properties))
+
+        region_props_dataframe = self.__build_region_props_dataframe(
+            region_props_of_frames, [frame_index + 1 for frame_index in frame_indices], view_props)
+        if is_merging:
+            region_props_dataframe = self.__merge_region_props_dataframes(
+                region_props_dataframe, frame_indices, len(frame_fingerprints))
+        else:
+            self._region_props_filters = []
+        # A shallow copy, as filtering and centroid optimization replace rows and columns instead of writing into them
+        self._unfiltered_region_props_dataframe = region_props_dataframe.copy(deep=False) if is_incremental else None
+        if self._region_props_filters:
+            region_props_dataframe = self.__filter_region_props(region_props_dataframe, self._region_props_filters)
+        if is_merging and self._is_region_props_centroids_optimized:
+            print('NOTE: The centroids are not optimized anymore, run optimize_centroids_using_gaussian_fit again.')
+        self._is_region_props_centroids_optimized = False
         self._region_props_dataframe = region_props_dataframe
+        self._region_props_properties = properties
+        self._region_props_fingerprints = frame_fingerprints
 
         print('Region properties generated successfully.')
         return region_props_dataframe
 
+    def iter_region_props(self, frame_chunks, view_props: List[AvailableProps], threshold: float = 0.5):
+        """
+        Generates region properties chunk by chunk for a stream of frames, e.g. from Capture.iter_frames, so
+        identification can run while the frames are still being decoded and with memory bounded by the chunk size.
+        Each frame is thresholded as in apply_grayscale_thresholding before its regions are measured.
+        Args:
+            frame_chunks (Iterable[tuple[list[int], list]]): The chunks of (0-based) global frame indices and frames.
+            view_props (List[AvailableProps]): The list of view properties to generate region properties for.
+            threshold (float): The threshold value to use for grayscale thresholding. Default is 0.5.
+        Yields:
+            pd.DataFrame: The region properties of each chunk, with 'frame' numbered from 1 as in
+                generate_region_props_to_dataframe.
+        """
+        if not view_props or len(view_props) == 0:
+            raise ValueError('The view properties cannot be None or empty.')
+        if threshold < 0 or threshold > 1:
+            raise ValueError(
+                'The threshold value should be between 0 and 1.')
+
+        properties = tuple(prop.value for prop in view_props)
+        for frame_indices, frames in frame_chunks:
+            region_props_of_frames = [
+                self.__measure_region_props_of_frame(
+                    self.__apply_grayscale_threshold_to_frame(frame, threshold), properties)
+                for frame in frames]
+            yield self.__build_region_props_dataframe(
+                region_props_of_frames, [frame_index + 1 for frame_index in frame_indices], view_props)
+
     def apply_filters_on_region_props(self, props_threshold: List[PropsThreshold], is_update_dataframes: bool = True) -> pd.DataFrame:
         """
         Applies filters on the region properties dataframe.
+        The applied filters are recorded, so an incremental generation of the region properties applies them again.
         Args:
             props_threshold (List[PropsThreshold]): The list of property thresholds to apply.
             is_update_dataframes (bool): Whether to update the region properties dataframe.
         Returns:
             pd.DataFrame: The filtered region properties dataframe.
         """
-        filtered_df = self._region_props_dataframe.copy()
-        for threshold_condition in props_threshold:
-            prop = threshold_condition['property']
-            operation = threshold_condition['operation']
-            value = threshold_condition['value']
-
-            # Applying the filter based on the operation
-            if operation == AvailableOperations.GREATER_THAN:
-                filtered_df = filtered_df[filtered_df[prop.value] > value]
-            elif operation == AvailableOperations.LESS_THAN:
-                filtered_df = filtered_df[filtered_df[prop.value] < value]
-            elif operation == AvailableOperations.EQUALS:
-                filtered_df = filtered_df[filtered_df[prop.value] == value]
-            else:
-                print(f'Invalid operation in props_threshold: {operation}')
+        filtered_df = self.__filter_region_props(self._region_props_dataframe, props_threshold)
 
         if is_update_dataframes:
             self._region_props_dataframe = filtered_df
+            self._region_props_filters = self._region_props_filters + list(props_threshold)
 
         print('Filters applied successfully.')
         return filtered_df
@@ -351,50 +605,170 @@ class Identify:
         """
         return MODEL_NAMES
 
-    def initialize_omnipose_model(self, model_name: str = 'bact_phase_omni', use_gpu: bool = False, params: dict = OMNIPOSE_DEFAULT_PARAMS) -> None:
+    def initialize_omnipose_model(self, model_name: str = 'bact_phase_omni', use_gpu: bool = False, params: dict = OMNIPOSE_DEFAULT_PARAMS,
+                                  is_prepare_frames: bool = True) -> None:
         """
         Initializes the omnipose model.
         Args:
             model_name (str): The name of the omnipose model to use.
             params (dict): The parameters to use for the omnipose model.
             use_gpu (bool): Whether to use the GPU for the omnipose model.
+            is_prepare_frames (bool): Whether to normalize all frames now. If False, the frames are normalized
+                by the masking, batch by batch while the model segments the previous batch when pipelined.
         Returns:
             None
         """
         is_gpu_activated = self.__activate_gpu() if use_gpu else False
         omnipose_model = models.CellposeModel(
             gpu=is_gpu_activated, model_type=model_name)
-        self.__prepare_frames_for_omnipose_model()
+        if is_prepare_frames:
+            self.__prepare_frames_for_omnipose_model()
         self._omnipose_model = omnipose_model
         self._omnipose_params = params
+        self._omnipose_model_name = model_name
+        self._is_omnipose_gpu_activated = is_gpu_activated
         print('Omnipose model initialized successfully.')
 
-    def apply_omnipose_masking(self, batch_size: int = 50, save_masks: bool = False, masks_store_path: str = 'masks', is_update_frames: bool = True) -> List:
+    def apply_omnipose_masking(self, batch_size: int = 50, save_masks: bool = False, masks_store_path: str = 'masks', is_update_frames: bool = True,
+                               is_pipelined: bool = False, tile_size: int | None = None, tile_overlap: int = FrameTiler.DEFAULT_OVERLAP,
+                               is_parallel: bool = False, max_workers: int = None,
+                               threads_per_worker: int = DEFAULT_OMNIPOSE_THREADS_PER_WORKER) -> List:
         """
-        Segments the objects using the omnipose model.
+        Segments the objects using the omnipose model. Masks are saved by a background writer, so the
+        segmentation of the next batch does not wait on disk.
+
+        When pipelined, the next batch is normalized and the masks of the previous batch are saved on
+        background threads while the model segments the current batch. The stages hand over batches
+        through bounded queues, so at most a few batches are held in memory at once.
+
+        When a tile size is given, the frames are split into overlapping tiles, the tiles of consecutive
+        frames are segmented together in batches of batch_size tiles, and the masks of the tiles are
+        stitched back into one mask per frame, with the labels merged across the tile seams.
+
+        When parallel, the batches are segmented by worker processes, each with its own omnipose model and
+        a few threads, and the masks are reassembled in frame order. The normalized frames are shared through
+        shared memory.
+
+        If the segmentation cache is configured, the masks of frames segmented before by the same model with
+        the same parameters are read from the cache, and only the other frames are segmented and cached.
         Args:
+            batch_size (int): The number of frames (or tiles, when tiled) to segment at once.
             save_masks (bool): Whether to save the masks.
             masks_store_path (str): The path to store the masks.
+            is_update_frames (bool): Whether to update the working frames with the masks.
+            is_pipelined (bool): Whether to overlap the normalization and saving with the segmentation.
+            tile_size (int | None): The height and width of the tiles, None to segment whole frames.
+            tile_overlap (int): The number of pixels shared by neighbouring tiles, larger than the objects.
+            is_parallel (bool): Whether to segment the batches in worker processes.
+            max_workers (int): The maximum number of processes. None uses the number of CPUs divided by
+                the threads per worker.
+            threads_per_worker (int): The number of threads of each worker process.
         Returns:
             List: The segmented masks.
+        Raises:
+            ValueError: If the omnipose model is not initialized, the tiles or the threads per worker are
+                invalid, more than one of tiled, pipelined and parallel segmentation is requested, or the masks
+                would be stored in the folder of the segmentation cache.
         """
         if not self._omnipose_model:
             raise ValueError('The omnipose model is not initialized.')
+        frame_tiler = FrameTiler(tile_size, tile_overlap) if tile_size is not None else None
+        if sum([frame_tiler is not None, is_pipelined, is_parallel]) > 1:
+            raise ValueError('Tiled, pipelined and parallel segmentation cannot be combined.')
+        if is_parallel and (threads_per_worker is None or threads_per_worker <= 0):
+            raise ValueError('The number of threads per worker should be positive.')
 
         if masks_store_path:
+            if self._segmentation_cache is not None and os.path.abspath(os.path.join(self._directory, masks_store_path)) == \
+                    os.path.abspath(self._segmentation_cache.get_directory()):
+                raise ValueError('The masks cannot be stored in the folder of the segmentation cache.')
             complete_store_path = self.__handle_folder_preprocess(
                 masks_store_path)
             self._mask_store_path = complete_store_path
 
-        masks = self.__get_masks_from_batch_wise_segmented_images(
-            batch_size=batch_size,
-            save_masks=save_masks)
+        segmentation_options = {
+            'batch_size': batch_size,
+            'frame_tiler': frame_tiler,
+            'is_pipelined': is_pipelined,
+            'is_parallel': is_parallel,
+            'max_workers': max_workers,
+            'threads_per_worker': threads_per_worker,
+        }
+        if self._segmentation_cache is not None:
+            tiling_params = {'tile_size': tile_size, 'tile_overlap': tile_overlap} if frame_tiler else {}
+            masks = self.__get_masks_through_segmentation_cache(
+                save_masks, {**self._omnipose_params, **tiling_params}, segmentation_options)
+        else:
+            masks = self.__get_masks_from_segmented_images(
+                None, save_masks, **segmentation_options)
         print('Objects segmented successfully using the omnipose model.')
 
         if is_update_frames:
-            self._working_frames = masks
+            self.__set_working_frames(masks)
         return masks
 
+    def get_segmentation_timings(self) -> dict:
+        """
+        Gets the time spent in each stage of the last omnipose masking.
+        Returns:
+            dict: The seconds spent normalizing, segmenting, waiting for normalized batches ('segment_wait'),
+                saving the masks ('postprocess') and in total.
+        """
+        return dict(self._segmentation_timings)
+
+    def configure_segmentation_cache(self, is_enabled: bool = True,
+                                     max_disk_usage_in_bytes: int = SegmentationCache.DEFAULT_MAX_DISK_USAGE_IN_BYTES,
+                                     cache_store_path: str = DEFAULT_SEGMENTATION_CACHE_FOLDER_NAME) -> None:
+        """
+        Configures the on-disk cache of the omnipose masks. The masks are keyed on the content of the normalized
+        frames, the model name and the segmentation parameters, so unchanged frames are not segmented again, even
+        after a restart. The least recently used masks are deleted once the disk budget is exceeded.
+        Args:
+            is_enabled (bool): Whether to use the segmentation cache. Default is True.
+            max_disk_usage_in_bytes (int): The disk budget of the cached masks. Default is 4 GiB.
+            cache_store_path (str): The folder of the cached masks, relative to the directory. It is kept
+                apart from the masks folder, which is emptied by every masking. Default is 'segmentation_cache'.
+        Returns:
+            None
+        """
+        self._segmentation_cache = SegmentationCache(
+            os.path.join(self._directory, cache_store_path), max_disk_usage_in_bytes) if is_enabled else None
+
+    def clear_segmentation_cache(self) -> None:
+        """
+        Deletes the cached masks. The next masking segments all frames again.
+        Returns:
+            None
+        """
+        if self._segmentation_cache is not None:
+            self._segmentation_cache.clear()
+
+    def get_segmentation_cache_statistics(self) -> dict:
+        """
+        Retrieves the statistics of the segmentation cache.
+        Returns:
+            dict: The hit and miss counts, the number of cached masks and the disk usage, empty if the cache is disabled.
+        """
+        return self._segmentation_cache.get_statistics() if self._segmentation_cache is not None else {}
+
+    def configure_background_writer(self, max_workers: int = BackgroundWriter.DEFAULT_MAX_WORKERS,
+                                    max_queue_size: int = BackgroundWriter.DEFAULT_MAX_QUEUE_SIZE,
+                                    compression_level: int | None = None) -> None:
+        """
+        Configures the background writer that saves the omnipose masks. Defaults to the options of the Capture object.
+        Args:
+            max_workers (int): Number of writer threads.
+            max_queue_size (int): Maximum number of masks waiting to be written.
+            compression_level (int | None): Deflate compression level from 0 to 9, None for the default encoding.
+        Returns:
+            None
+        """
+        self._background_writer_options = {
+            'max_workers': max_workers,
+            'max_queue_size': max_queue_size,
+            'compression_level': compression_level,
+        }
+
     # Utility Methods
     def plot_centroids(self, show_time=False) -> None:
         """
@@ -485,49 +859,400 @@ class Identify:
                 column_names.append(view_prop.value)
         return column_names
 
+    def __apply_grayscale_threshold_to_frame(self, frame: np.ndarray, threshold: float) -> np.ndarray:
+        """
+        Thresholds a single frame on its inverted grayscale intensity.
+        Args:
+            frame (np.ndarray): The frame to threshold.
+            threshold (float): The threshold value between 0 and 1.
+        Returns:
+            np.ndarray: The binary frame.
+        """
+        gray_scale = self.__convert_to_grayscale(np.asarray(frame)[np.newaxis])[0]
+        gray_scale_opp = 1 - gray_scale
+        return gray_scale_opp > threshold
+
+    def __stack_frames(self, frames, start: int, stop: int) -> np.ndarray:
+        """
+        Stacks a range of frames into a single array. Frames that are already held in an array are not copied.
+        Args:
+            frames: The frames (list, array or frame store).
+            start (int): The index of the first frame.
+            stop (int): The index after the last frame.
+        Returns:
+            np.ndarray: The (stop - start, H, W[, C]) frames.
+        """
+        if isinstance(frames, np.ndarray):
+            return frames[start:stop]
+        if isinstance(frames, FrameStore):
+            return frames.as_array()[start:stop]
+        return np.stack([frames[frame_index] for frame_index in range(start, stop)])
+
+    def __convert_to_grayscale(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Converts a stack of frames to grayscale with the luminance weights of skimage's rgb2gray.
+        Args:
+            frames (np.ndarray): The (N, H, W[, C]) frames.
+        Returns:
+            np.ndarray: The (N, H, W) float32 grayscale frames between 0 and 1.
+        """
+        float_frames = img_as_float32(frames)
+        if float_frames.ndim == 3:
+            return float_frames
+        return float_frames[..., :3] @ Identify.GRAYSCALE_COEFFICIENTS
+
+    def __set_working_frames(self, frames, is_binary_frames: bool | None = None) -> None:
+        """
+        Sets the working frames. The frame cache keys of the previous working frames no longer match.
+        Args:
+            frames: The new working frames.
+            is_binary_frames (bool | None): Whether the frames only hold 0 and 1 values, None if unknown.
+        Returns:
+            None
+        """
+        self._working_frames = frames
+        self._working_frames_version += 1
+        self._is_working_frames_binary = is_binary_frames
+
+    def __get_frame_cache_key(self, representation: str, source: str, params: tuple = ()) -> tuple:
+        """
+        Builds the frame cache key of a derived representation.
+        Args:
+            representation (str): The name of the representation (e.g. 'grayscale').
+            source (str): The source frames, 'captured' or 'working'.
+            params (tuple): The parameters of the representation.
+        Returns:
+            tuple: The key.
+        """
+        version = self._captured_frames_version if source == 'captured' else self._working_frames_version
+        return (representation, params, (source, version))
+
+    def __invert_captured_frames(self) -> np.ndarray:
+        """
+        Inverts the colors of the captured frames, chunk by chunk.
+        Returns:
+            np.ndarray: The (N, H, W[, C]) inverted frames.
+        """
+        total_frames = len(self._captured_frames)
+        inverted_frames = np.empty((total_frames,) + np.shape(self._captured_frames[0]),
+                                   dtype=np.asarray(self._captured_frames[0]).dtype)
+        for start in trange(0, total_frames, self._chunk_size, desc='Applying color inverse'):
+            stop = min(start + self._chunk_size, total_frames)
+            np.invert(self.__stack_frames(self._captured_frames, start, stop),
+                      out=inverted_frames[start:stop])
+        return inverted_frames
+
+    def __get_grayscale_frames(self) -> np.ndarray | None:
+        """
+        Gets the grayscale version of the captured frames from the frame cache. On a miss, the conversion
+        runs chunk by chunk and the stack is cached for the following thresholding calls. Single channel uint8 and
+        uint16 frames are cached as they are, so the cached values convert back to exactly the same float values.
+        Returns:
+            np.ndarray | None: The read-only (N, H, W) grayscale frames, in the dtype of __get_grayscale_cache_dtype,
+                None if the stack does not fit the memory budget of the frame cache.
+        """
+        grayscale_key = self.__get_frame_cache_key('grayscale', 'captured')
+        stack_size = len(self._captured_frames) * int(np.prod(np.shape(self._captured_frames[0])[:2])) \
+            * self.__get_grayscale_cache_dtype().itemsize
+        if grayscale_key not in self._frame_cache and stack_size > self._frame_cache.get_max_memory():
+            return None
+        return self._frame_cache.get_or_compute(grayscale_key, self.__convert_captured_frames_to_grayscale)
+
+    def __convert_captured_frames_to_grayscale(self) -> np.ndarray:
+        """
+        Converts the captured frames to grayscale, chunk by chunk.
+        Returns:
+            np.ndarray: The (N, H, W) grayscale frames, in the dtype of __get_grayscale_cache_dtype.
+        """
+        total_frames = len(self._captured_frames)
+        grayscale_dtype = self.__get_grayscale_cache_dtype()
+        grayscale_frames = np.empty((total_frames,) + np.shape(self._captured_frames[0])[:2], dtype=grayscale_dtype)
+        for start in trange(0, total_frames, self._chunk_size, desc='Converting frames to grayscale'):
+            stop = min(start + self._chunk_size, total_frames)
+            frames = self.__stack_frames(self._captured_frames, start, stop)
+            grayscale_frames[start:stop] = frames if grayscale_dtype == frames.dtype else self.__convert_to_grayscale(frames)
+        return grayscale_frames
+
+    def __get_grayscale_cache_dtype(self) -> np.dtype:
+        """
+        Gets the dtype of the cached grayscale frames: the dtype of the captured frames if they are single channel
+        uint8 or uint16 frames, float32 otherwise.
+        Returns:
+            np.dtype: The dtype.
+        """
+        first_frame = np.asarray(self._captured_frames[0])
+        if first_frame.ndim == 2 and first_frame.dtype in Identify.GRAYSCALE_CACHE_DTYPES:
+            return first_frame.dtype
+        return np.dtype(np.float32)
+
+    def __get_grayscale_frame(self, frame_index: int) -> np.ndarray:
+        """
+        Gets the grayscale version of a single captured frame, from the cached grayscale frames if available.
+        Args:
+            frame_index (int): The index of the frame.
+        Returns:
+            np.ndarray: The (H, W) float32 grayscale frame.
+        """
+        grayscale_key = self.__get_frame_cache_key('grayscale', 'captured')
+        if grayscale_key in self._frame_cache:
+            return img_as_float32(self._frame_cache.get(grayscale_key)[frame_index])
+        return self.__convert_to_grayscale(np.asarray(self._captured_frames[frame_index])[np.newaxis])[0]
+
+    def __apply_to_grayscale_frames(self, chunk_function, desc: str, is_pack_masks: bool = False) -> np.ndarray | PackedMaskStack:
+        """
+        Applies a vectorized function to the cached grayscale frames, chunk by chunk. If the grayscale stack does
+        not fit the frame cache, each chunk is converted from the captured frames instead.
+        Args:
+            chunk_function (Callable[[np.ndarray], np.ndarray]): Maps a (n, H, W) grayscale chunk to (n, H, W) binary frames.
+            desc (str): The description of the progress bar.
+            is_pack_masks (bool): Whether to bit-pack each chunk as soon as it is thresholded.
+        Returns:
+            np.ndarray | PackedMaskStack: The (N, H, W) binary frames.
+        """
+        grayscale_frames = self.__get_grayscale_frames()
+        total_frames = len(self._captured_frames)
+        frame_shape = np.shape(self._captured_frames[0])[:2]
+        if is_pack_masks:
+            binary_frames = PackedMaskStack(total_frames, frame_shape)
+        else:
+            binary_frames = np.empty((total_frames,) + frame_shape, dtype=bool)
+        for start in trange(0, total_frames, self._chunk_size, desc=desc):
+            stop = min(start + self._chunk_size, total_frames)
+            if grayscale_frames is not None:
+                grayscale_chunk = img_as_float32(grayscale_frames[start:stop])
+            else:
+                grayscale_chunk = self.__convert_to_grayscale(self.__stack_frames(self._captured_frames, start, stop))
+            if is_pack_masks:
+                binary_frames.set_masks(start, chunk_function(grayscale_chunk))
+            else:
+                binary_frames[start:stop] = chunk_function(grayscale_chunk)
+        return binary_frames
+
+    def __measure_region_props_of_frame(self, frame: np.ndarray, properties: tuple) -> dict:
+        """
+        Labels a single binary frame and measures the properties of its regions.
+        Args:
+            frame (np.ndarray): The binary frame.
+            properties (tuple): The skimage names of the properties to measure.
+        Returns:
+            dict: The region property columns of the frame, as returned by skimage's regionprops_table.
+        """
+        labelled_frame = measure.label(frame)
+        return measure.regionprops_table(labelled_frame, properties=properties)
+
+    def __measure_region_props_in_parallel(self, frame_indices: List[int], properties: tuple, max_workers: int = None) -> List[dict]:
+        """
+        Measures the region properties of some of the working frames in a process pool. The frames are shared
+        through shared memory and split into contiguous shards, whose results are merged in frame order.
+        Args:
+            frame_indices (List[int]): The indices of the frames to measure.
+            properties (tuple): The skimage names of the properties to measure.
+            max_workers (int): The maximum number of processes. None uses the number of CPUs.
+        Returns:
+            List[dict]: The region property columns of each frame, in the order of the indices.
+        """
+        total_frames = len(frame_indices)
+        worker_count = max_workers or os.cpu_count() or 1
+        shard_size = max(1, -(-total_frames // (worker_count * Identify.SHARDS_PER_WORKER)))
+        shard_starts = range(0, total_frames, shard_size)
+
+        region_props_of_frames: List[dict] = []
+        with SharedFrameStack(self._working_frames, self._chunk_size) as shared_frames:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_shared_frames_worker,
+                                     initargs=(shared_frames.get_spec(),)) as executor:
+                shard_results = executor.map(
+                    _measure_region_props_of_shared_frames,
+                    [frame_indices[start:start + shard_size] for start in shard_starts],
+                    [properties] * len(shard_starts))
+                for shard_result in tqdm(shard_results, total=len(shard_starts), desc='Generating region properties (Parallel)'):
+                    region_props_of_frames.extend(shard_result)
+        return region_props_of_frames
+
+    def __merge_region_props_dataframes(self, region_props_dataframe: pd.DataFrame, frame_indices: List[int],
+                                        total_frames: int) -> pd.DataFrame:
+        """
+        Merges the region properties of remeasured frames into the unfiltered region properties.
+        Args:
+            region_props_dataframe (pd.DataFrame): The region properties of the remeasured frames.
+            frame_indices (List[int]): The indices of the remeasured frames.
+            total_frames (int): The number of working frames.
+        Returns:
+            pd.DataFrame: The region properties of all frames, sorted by frame.
+        """
+        current_region_props = self._unfiltered_region_props_dataframe
+        frame_numbers = current_region_props['frame'].to_numpy()
+        is_kept = (frame_numbers <= total_frames) & ~np.isin(frame_numbers, np.asarray(frame_indices) + 1)
+        merged_region_props = pd.concat([current_region_props[is_kept], region_props_dataframe], ignore_index=True)
+        # A stable sort keeps the rows of each frame in label order
+        return merged_region_props.sort_values('frame', kind='stable', ignore_index=True)
+
+    def __filter_region_props(self, region_props_dataframe: pd.DataFrame, props_threshold: List[PropsThreshold]) -> pd.DataFrame:
+        """
+        Keeps the rows of the region properties that pass the property thresholds.
+        Args:
+            region_props_dataframe (pd.DataFrame): The region properties.
+            props_threshold (List[PropsThreshold]): The list of property thresholds to apply.
+        Returns:
+            pd.DataFrame: A filtered copy of the region properties.
+        """
+        filtered_df = region_props_dataframe.copy()
+        for threshold_condition in props_threshold:
+            prop = threshold_condition['property']
+            operation = threshold_condition['operation']
+            value = threshold_condition['value']
+
+            # Applying the filter based on the operation
+            if operation == AvailableOperations.GREATER_THAN:
+                filtered_df = filtered_df[filtered_df[prop.value] > value]
+            elif operation == AvailableOperations.LESS_THAN:
+                filtered_df = filtered_df[filtered_df[prop.value] < value]
+            elif operation == AvailableOperations.EQUALS:
+                filtered_df = filtered_df[filtered_df[prop.value] == value]
+            else:
+                print(f'Invalid operation in props_threshold: {operation}')
+        return filtered_df
+
+    def __get_frame_fingerprint(self, frame: np.ndarray) -> str:
+        """
+        Computes a fingerprint of the content of a frame.
+        Args:
+            frame (np.ndarray): The frame.
+        Returns:
+            str: The hexadecimal content hash.
+        """
+        frame = np.ascontiguousarray(frame)
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(repr((frame.shape, frame.dtype.str)).encode('utf-8'))
+        hasher.update(frame)
+        return hasher.hexdigest()
+
+    def __build_region_props_dataframe(self, region_props_of_frames: List[dict], frame_numbers, view_props: List[AvailableProps]) -> pd.DataFrame:
+        """
+        Builds the region properties dataframe of several frames at once. Each column is allocated once with
+        its final dtype and filled frame by frame, so the cost grows linearly with the number of frames.
+        Args:
+            region_props_of_frames (List[dict]): The region property columns of each frame.
+            frame_numbers (Iterable[int]): The (1-based) frame number of each frame, stored in the 'frame' column.
+            view_props (List[AvailableProps]): The list of measured view properties.
+        Returns:
+            pd.DataFrame: The region properties dataframe.
+        """
+        column_names = self.__get_custom_column_names(view_props)
+        region_counts = np.array([len(next(iter(region_props.values()), ()))
+                                  for region_props in region_props_of_frames], dtype=np.int64)
+        total_regions = int(region_counts.sum())
+
+        values_of_frames = [list(region_props.values()) for region_props in region_props_of_frames]
+        columns: dict = {}
+        for column_index, column_name in enumerate(column_names):
+            frame_columns = [values[column_index] for values in values_of_frames]
+            dtype = Identify.REGION_PROPS_COLUMN_DTYPES.get(
+                column_name, frame_columns[0].dtype if frame_columns else np.float64)
+            column = np.empty(total_regions, dtype=dtype)
+            offset = 0
+            for frame_column in frame_columns:
+                column[offset:offset + len(frame_column)] = frame_column
+                offset += len(frame_column)
+            columns[column_name] = column
+        columns['frame'] = np.repeat(
+            np.fromiter(frame_numbers, dtype=Identify.REGION_PROPS_COLUMN_DTYPES['frame'], count=len(region_counts)),
+            region_counts)
+        return pd.DataFrame(columns)
+
     def __prepare_frames_for_omnipose_model(self) -> None:
         """
         Prepares the captured frames for the omnipose model - Normalizing the frames.
         Returns:
             None
         """
-        if self._normalized_frames:
+        normalized_key = self.__get_frame_cache_key('normalize99', 'working')
+        if normalized_key in self._frame_cache:
+            self._normalized_frames = list(self._frame_cache.get(normalized_key))
             print('Frames are already prepared for the omnipose model.')
             return
-        is_binary_frames = self.__are_frames_binary(self._working_frames)
-        if is_binary_frames:
+
+        if self.__are_frames_binary(self._working_frames):
+            # Same frames in another dtype, so the cache keys of the working frames stay valid
             self._working_frames = self.__convert_to_uint8(
                 self._working_frames)
+            self._is_working_frames_binary = False
 
-        normalized_frames = []
+        normalized_frames = np.empty((len(self._working_frames),) + np.shape(self._working_frames[0])[:2],
+                                     dtype=np.float32)
         for frame_index in trange(len(self._working_frames), desc='Preparing frames for the omnipose model'):
-            gray_image = self._working_frames[frame_index] if is_binary_frames else cv2.cvtColor(
-                self._working_frames[frame_index], cv2.COLOR_BGR2GRAY)
-            normalized_frame = normalize99(gray_image)
-            normalized_frames.append(normalized_frame)
-        self._normalized_frames = normalized_frames
+            normalized_frames[frame_index] = self.__normalize_frame_for_omnipose_model(
+                self._working_frames[frame_index])
+        normalized_frames = self._frame_cache.put(normalized_key, normalized_frames)
+        self._normalized_frames = list(normalized_frames)
         print('Frames prepared successfully for the omnipose model.')
 
+    def __normalize_frame_for_omnipose_model(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Normalizes a working frame for the omnipose model.
+        Args:
+            frame (np.ndarray): The working frame, a single-channel image (e.g. a uint8 mask) or a BGR image.
+        Returns:
+            np.ndarray: The normalized grayscale frame.
+        """
+        gray_image = frame if np.ndim(frame) == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return normalize99(gray_image)
+
     def __are_frames_binary(self, frames: List) -> bool:
         """
-        Checks if all frames are binary (contain only True or False values).
+        Checks if all frames are binary (contain only 0 and 1 values). The binary-ness recorded when the working
+        frames were set (e.g. by thresholding) is used when known, and bool frames are binary by their dtype.
+        Otherwise, a few frames spread over the video are checked first, so non-binary videos are rejected after
+        a few frames, before the other frames are checked. The frames are checked without being copied.
         Args:
             frames (List): The frames to be checked.
         Returns:
             bool: True if all frames are binary, False otherwise.
         """
-        return all(np.array_equal(frame, frame.astype(bool)) for frame in frames)
+        if isinstance(frames, PackedMaskStack):
+            return True
+        is_working_frames = frames is self._working_frames
+        if is_working_frames and self._is_working_frames_binary is not None:
+            return self._is_working_frames_binary
+        if isinstance(frames, np.ndarray) and frames.dtype == bool:
+            return True
+
+        sampled_frame_indices = np.linspace(
+            0, len(frames) - 1, min(len(frames), Identify.BINARY_CHECK_SAMPLE_SIZE)).astype(int).tolist()
+        frame_indices = dict.fromkeys(sampled_frame_indices + list(range(len(frames))))
+        is_binary_frames = all(self.__is_frame_binary(frames[frame_index]) for frame_index in frame_indices)
+        if is_working_frames:
+            self._is_working_frames_binary = is_binary_frames
+        return is_binary_frames
+
+    def __is_frame_binary(self, frame: np.ndarray) -> bool:
+        """
+        Checks if a frame only holds 0 and 1 values, without copying integer frames.
+        Args:
+            frame (np.ndarray): The frame to be checked.
+        Returns:
+            bool: True if the frame is binary, False otherwise.
+        """
+        frame = np.asarray(frame)
+        if frame.dtype == bool or frame.size == 0:
+            return True
+        if np.issubdtype(frame.dtype, np.integer):
+            return frame.min() >= 0 and frame.max() <= 1
+        return bool(np.all((frame == 0) | (frame == 1)))
 
-    def __convert_to_uint8(self, binary_frames: List) -> List:
+    def __convert_to_uint8(self, binary_frames: List, uint8_frames: np.ndarray | None = None) -> np.ndarray:
         """
-        Converts binary frames to uint8 format.
+        Converts binary frames to uint8 format (0 or 255), writing them into a single contiguous stack
+        without intermediate copies.
         Args:
             binary_frames (List): The binary frames to be converted.
+            uint8_frames (np.ndarray | None): The stack to write the frames into, None to allocate it.
         Returns:
-            List: The converted frames in uint8 format.
+            np.ndarray: The converted frames in uint8 format.
         """
-        uint8_frames = [(frame.astype(np.uint8) * 255)
-                        for frame in binary_frames]
+        if uint8_frames is None:
+            uint8_frames = np.empty((len(binary_frames),) + np.shape(binary_frames[0]), dtype=np.uint8)
+        for frame_index in range(len(binary_frames)):
+            np.multiply(binary_frames[frame_index], np.uint8(255), out=uint8_frames[frame_index], casting='unsafe')
         return uint8_frames
 
     def __activate_gpu(self) -> bool:
@@ -584,131 +1309,559 @@ class Identify:
         print(f'total segmentation time: {net_time}s')
         return masks
 
-    def __process_batch_images_to_get_masks(self, batch_images: List, save_masks: bool = True, batch_start_index: int = 0) -> List:
+    def __save_masks(self, masks: List, mask_writer: BackgroundWriter, batch_start_index: int = 0, total_masks: int | None = None) -> None:
+        """
+        Queues the masks of a batch to be saved by the background writer.
+        Args:
+            masks (List): The masks of the batch.
+            mask_writer (BackgroundWriter): The background writer to save the masks with.
+            batch_start_index (int): The index of the first mask of the batch.
+            total_masks (int | None): The number of masks of all batches, None for the number of normalized frames.
+        Returns:
+            None
+        """
+        total_masks = len(self._normalized_frames) if total_masks is None else total_masks
+        for i, mask in enumerate(masks):
+            mask_index = batch_start_index + i
+            mask_number = str(mask_index).zfill(len(str(total_masks)))
+            mask_path = os.path.join(
+                self._mask_store_path, f'mask_{mask_number}.tiff')
+            mask_writer.submit(mask_path, mask)
+
+    def __process_batch_images_to_get_masks(self, batch_images: List, mask_writer: BackgroundWriter | None = None, batch_start_index: int = 0) -> List:
         """
         Processes the batch images to get the binary masks.
         Args:
             batch_images (List): The list of batch images to process.
-            save_masks (bool): Whether to save the masks.
+            mask_writer (BackgroundWriter | None): The background writer to save the masks with, None to not save them.
+            batch_start_index (int): The index of the first image of the batch.
         Returns:
             List: The binary masks.
         """
         masks = self.__get_segmented_masks(batch_images)
+        if mask_writer:
+            self.__save_masks(masks, mask_writer, batch_start_index)
+        return masks
+
+    def __get_masks_through_segmentation_cache(self, save_masks: bool, segmentation_params: dict, segmentation_options: dict) -> List:
+        """
+        Gets the masks of the normalized frames from the segmentation cache, segmenting and caching the missing ones.
+        Args:
+            save_masks (bool): Whether to save the masks.
+            segmentation_params (dict): The parameters the masks depend on, besides the frames and the model name.
+            segmentation_options (dict): The options of the segmentation of the missing masks.
+        Returns:
+            List: The masks.
+        """
+        if not self._normalized_frames:
+            self.__prepare_frames_for_omnipose_model()
+
+        segmentation_cache = self._segmentation_cache
+        mask_keys = [segmentation_cache.get_key(normalized_frame, self._omnipose_model_name, segmentation_params)
+                     for normalized_frame in tqdm(self._normalized_frames, desc='Looking up cached masks')]
+        masks = [segmentation_cache.get(mask_key) for mask_key in mask_keys]
+        missing_frame_indices = [frame_index for frame_index, mask in enumerate(masks) if mask is None]
+        print(f'{len(masks) - len(missing_frame_indices)} of {len(masks)} masks found in the segmentation cache.')
+
+        if missing_frame_indices:
+            missing_masks = self.__get_masks_from_segmented_images(
+                [self._normalized_frames[frame_index] for frame_index in missing_frame_indices],
+                False, **segmentation_options)
+            for frame_index, mask in zip(missing_frame_indices, missing_masks):
+                masks[frame_index] = mask
+                segmentation_cache.put(mask_keys[frame_index], mask)
+        else:
+            self._segmentation_timings = {'normalize': 0.0, 'segment': 0.0,
+                                          'segment_wait': 0.0, 'postprocess': 0.0, 'total': 0.0}
+
         if save_masks:
-            for i, mask in enumerate(masks):
-                mask_index = batch_start_index + i
-                mask_number = str(mask_index).zfill(len(str(masks)))
-                mask_path = os.path.join(
-                    self._mask_store_path, f'mask_{mask_number}.tiff')
-                cv2.imwrite(mask_path, mask)
+            with BackgroundWriter(backend='cv2', **self._background_writer_options) as mask_writer:
+                self.__save_masks(masks, mask_writer)
         return masks
 
-    def __get_masks_from_batch_wise_segmented_images(self, batch_size: int = 5, save_masks: bool = True) -> List:
+    def __get_masks_from_segmented_images(self, normalized_frames: List | None, save_masks: bool, batch_size: int = 5,
+                                          frame_tiler: FrameTiler | None = None, is_pipelined: bool = False,
+                                          is_parallel: bool = False, max_workers: int = None,
+                                          threads_per_worker: int = DEFAULT_OMNIPOSE_THREADS_PER_WORKER) -> List:
+        """
+        Gets the masks of the normalized frames with the requested segmentation.
+        Args:
+            normalized_frames (List | None): The normalized frames to segment, None for all prepared frames
+                (normalized on the fly when pipelined and not prepared).
+            save_masks (bool): Whether to save the masks.
+            batch_size (int): The number of frames (or tiles, when tiled) to segment at once.
+            frame_tiler (FrameTiler | None): The tiler of tiled segmentation, None to segment whole frames.
+            is_pipelined (bool): Whether to overlap the normalization and saving with the segmentation.
+            is_parallel (bool): Whether to segment the batches in worker processes.
+            max_workers (int): The maximum number of processes of parallel segmentation.
+            threads_per_worker (int): The number of threads of each worker process.
+        Returns:
+            List: The masks.
+        """
+        if is_pipelined:
+            return self.__get_masks_from_pipelined_segmented_images(
+                normalized_frames or self._normalized_frames or None,
+                batch_size=batch_size,
+                save_masks=save_masks)
+
+        if normalized_frames is None:
+            if not self._normalized_frames:
+                self.__prepare_frames_for_omnipose_model()
+            normalized_frames = self._normalized_frames
+        if frame_tiler:
+            return self.__get_masks_from_tiled_segmented_images(
+                normalized_frames,
+                frame_tiler,
+                batch_size=batch_size,
+                save_masks=save_masks)
+        if is_parallel:
+            return self.__get_masks_from_parallel_segmented_images(
+                normalized_frames,
+                batch_size=batch_size,
+                save_masks=save_masks,
+                max_workers=max_workers,
+                threads_per_worker=threads_per_worker)
+        return self.__get_masks_from_batch_wise_segmented_images(
+            normalized_frames,
+            batch_size=batch_size,
+            save_masks=save_masks)
+
+    def __get_masks_from_batch_wise_segmented_images(self, normalized_frames: List, batch_size: int = 5, save_masks: bool = True) -> List:
         """
         Gets the masks from the batch-wise segmented images.
         Args:
+            normalized_frames (List): The normalized frames to segment.
             batch_size (int): The batch size to use for segmentation.
             save_masks (bool): Whether to save the masks.
         Returns:
             List: The masks.
         """
         resultant_masks = []
-        for each in trange(0, len(self._normalized_frames), batch_size, desc='Segmenting images'):
-            batch_images = self._normalized_frames[each: each + batch_size]
-            binary_masks = self.__process_batch_images_to_get_masks(
-                batch_images, save_masks, each)
-            print(f'Batch {each // batch_size + 1} segmentation is complete')
-            resultant_masks += binary_masks
+        mask_writer = BackgroundWriter(backend='cv2', **self._background_writer_options) if save_masks else None
+        tic = time.time()
+        try:
+            for each in trange(0, len(normalized_frames), batch_size, desc='Segmenting images'):
+                batch_images = normalized_frames[each: each + batch_size]
+                binary_masks = self.__process_batch_images_to_get_masks(
+                    batch_images, mask_writer, each)
+                print(f'Batch {each // batch_size + 1} segmentation is complete')
+                resultant_masks += binary_masks
+        finally:
+            if mask_writer:
+                mask_writer.close()
+        total_time = time.time() - tic
+        self._segmentation_timings = {'normalize': 0.0, 'segment': total_time,
+                                      'segment_wait': 0.0, 'postprocess': 0.0, 'total': total_time}
         return resultant_masks
 
-    # Gaussian Fit Methods
-    def __2d_gaussian(self, coords, amplitude, xo, yo, sigma_x, sigma_y, offset):
+    def __get_masks_from_parallel_segmented_images(self, normalized_frames: List, batch_size: int = 5, save_masks: bool = True, max_workers: int = None,
+                                                   threads_per_worker: int = DEFAULT_OMNIPOSE_THREADS_PER_WORKER) -> List:
         """
-        A static 2D Gaussian model.
+        Gets the masks from the batch-wise segmented images, with the batches distributed among worker processes.
+        The workers are spawned, so they do not inherit the threads of the model of this process, and each one
+        creates its own omnipose model.
+        Args:
+            normalized_frames (List): The normalized frames to segment.
+            batch_size (int): The batch size to use for segmentation.
+            save_masks (bool): Whether to save the masks.
+            max_workers (int): The maximum number of processes. None uses the number of CPUs divided by
+                the threads per worker.
+            threads_per_worker (int): The number of threads of each worker process.
+        Returns:
+            List: The masks, in frame order.
         """
-        x, y = coords
-        return (amplitude * np.exp(-(((x - xo) ** 2) / (2 * sigma_x ** 2) +
-                                     ((y - yo) ** 2) / (2 * sigma_y ** 2))) + offset).ravel()
+        total_frames = len(normalized_frames)
+        if total_frames == 0:
+            return []
 
-    def __extract_subimage(self, gray_frame: np.ndarray, center: tuple, fit_window: int):
-        """
-        Extracts a sub-image centered at `center` using a window of size fit_window.
+        worker_count = max_workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        batch_starts = range(0, total_frames, batch_size)
+        resultant_masks = []
+        mask_writer = BackgroundWriter(backend='cv2', **self._background_writer_options) if save_masks else None
+        tic = time.time()
+        try:
+            with SharedFrameStack(normalized_frames, self._chunk_size) as shared_frames:
+                with ProcessPoolExecutor(max_workers=worker_count, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_initialize_omnipose_worker,
+                                         initargs=(shared_frames.get_spec(), self._omnipose_model_name,
+                                                   self._is_omnipose_gpu_activated, self._omnipose_params,
+                                                   threads_per_worker)) as executor:
+                    batch_results = executor.map(
+                        _segment_shared_frames,
+                        batch_starts,
+                        [min(start + batch_size, total_frames) for start in batch_starts])
+                    for batch_start, binary_masks in zip(batch_starts, tqdm(
+                            batch_results, total=len(batch_starts), desc='Segmenting images (Parallel)')):
+                        if mask_writer:
+                            self.__save_masks(binary_masks, mask_writer, batch_start, total_frames)
+                        resultant_masks += binary_masks
+        finally:
+            if mask_writer:
+                mask_writer.close()
+        total_time = time.time() - tic
+        self._segmentation_timings = {'normalize': 0.0, 'segment': total_time,
+                                      'segment_wait': 0.0, 'postprocess': 0.0, 'total': total_time}
+        print(f'total segmentation time: {total_time}s with {worker_count} worker processes')
+        return resultant_masks
 
+    def __get_masks_from_tiled_segmented_images(self, normalized_frames: List, frame_tiler: FrameTiler, batch_size: int = 5, save_masks: bool = True) -> List:
+        """
+        Gets the masks from the tile-wise segmented images. The tiles of consecutive frames are segmented
+        together, and each frame is stitched as soon as all of its tiles are segmented, so only the masks of
+        one batch of tiles are held besides the stitched masks.
         Args:
-            gray_frame (np.ndarray): Grayscale image.
-            center (tuple): Center in (y, x) order.
-            fit_window (int): Half-size of the window.
-
+            normalized_frames (List): The normalized frames to segment.
+            frame_tiler (FrameTiler): The tiler splitting the frames and stitching the masks.
+            batch_size (int): The number of tiles to segment at once.
+            save_masks (bool): Whether to save the masks.
         Returns:
-            sub_image (np.ndarray): Extracted sub-image.
-            xmin, ymin (int): Top-left coordinates of the sub-image.
-            If the window exceeds image boundaries, returns (None, None, None).
+            List: The masks.
         """
-        x_center = center[1]  # center is (y, x)
-        y_center = center[0]
-        xmin = int(x_center - fit_window)
-        xmax = int(x_center + fit_window)
-        ymin = int(y_center - fit_window)
-        ymax = int(y_center + fit_window)
+        total_frames = len(normalized_frames)
+        if total_frames == 0:
+            return []
+
+        frame_shape = np.shape(normalized_frames[0])[:2]
+        tile_boxes = frame_tiler.get_tile_boxes(frame_shape)
+        tiles_per_frame = len(tile_boxes)
+        total_tiles = total_frames * tiles_per_frame
 
-        if xmin < 0 or ymin < 0 or xmax >= gray_frame.shape[1] or ymax >= gray_frame.shape[0]:
-            return None, None, None
-        sub_image = gray_frame[ymin:ymax, xmin:xmax]
-        return sub_image, xmin, ymin
+        resultant_masks = []
+        pending_tile_masks: List = []
+        mask_writer = BackgroundWriter(backend='cv2', **self._background_writer_options) if save_masks else None
+        timings = {'normalize': 0.0, 'segment': 0.0, 'segment_wait': 0.0, 'postprocess': 0.0}
+        total_tic = time.time()
+        try:
+            for each in trange(0, total_tiles, batch_size, desc='Segmenting tiles'):
+                batch_tiles = []
+                for tile_number in range(each, min(each + batch_size, total_tiles)):
+                    frame_index, tile_index = divmod(tile_number, tiles_per_frame)
+                    y_start, y_stop, x_start, x_stop = tile_boxes[tile_index]
+                    batch_tiles.append(normalized_frames[frame_index][y_start:y_stop, x_start:x_stop])
+                tic = time.time()
+                pending_tile_masks += list(self.__get_segmented_masks(batch_tiles))
+                timings['segment'] += time.time() - tic
+
+                tic = time.time()
+                while len(pending_tile_masks) >= tiles_per_frame:
+                    frame_mask = frame_tiler.stitch_masks(frame_shape, pending_tile_masks[:tiles_per_frame])
+                    pending_tile_masks = pending_tile_masks[tiles_per_frame:]
+                    if mask_writer:
+                        self.__save_masks([frame_mask], mask_writer, len(resultant_masks), total_frames)
+                    resultant_masks.append(frame_mask)
+                timings['postprocess'] += time.time() - tic
+        finally:
+            if mask_writer:
+                mask_writer.close()
+        timings['total'] = time.time() - total_tic
+        self._segmentation_timings = timings
+        return resultant_masks
 
-    def __fit_gaussian_to_subimage(self, sub_image: np.ndarray, fit_window: int):
+    def __get_masks_from_pipelined_segmented_images(self, normalized_frames: List | None, batch_size: int = 5, save_masks: bool = True) -> List:
         """
-        Performs a 2D Gaussian fit on the given sub-image.
+        Gets the masks from the batch-wise segmented images, with the normalization of the next batch and the
+        saving of the previous batch running on background threads while the model segments the current batch.
+        Without normalized frames, the working frames are normalized batch by batch, and the normalized frames
+        are cached for later runs.
+        Args:
+            normalized_frames (List | None): The normalized frames to segment, None to normalize the working frames.
+            batch_size (int): The batch size to use for segmentation.
+            save_masks (bool): Whether to save the masks.
+        Returns:
+            List: The masks.
+        """
+        is_prepared = normalized_frames is not None
+        frame_source = normalized_frames if is_prepared else self._working_frames
+        total_frames = len(frame_source)
+        if total_frames == 0:
+            return []
+
+        normalized_key = self.__get_frame_cache_key('normalize99', 'working')
+        normalized_stack = None if is_prepared else np.empty(
+            (total_frames,) + np.shape(frame_source[0])[:2], dtype=np.float32)
+        batch_starts = range(0, total_frames, batch_size)
+        timings = {'normalize': 0.0, 'segment': 0.0, 'segment_wait': 0.0, 'postprocess': 0.0}
+        masks_of_batches: dict = {}
+        normalized_batches: queue.Queue = queue.Queue(maxsize=Identify.PIPELINE_QUEUE_SIZE)
+        segmented_batches: queue.Queue = queue.Queue(maxsize=Identify.PIPELINE_QUEUE_SIZE)
+        stop_event = threading.Event()
+        mask_writer = BackgroundWriter(backend='cv2', **self._background_writer_options) if save_masks else None
+
+        def normalize_batches() -> None:
+            try:
+                is_binary_frames = not is_prepared and self.__are_frames_binary(frame_source)
+                uint8_batch = np.empty((batch_size,) + np.shape(frame_source[0]), dtype=np.uint8) if is_binary_frames else None
+                for batch_start in batch_starts:
+                    tic = time.time()
+                    batch_stop = min(batch_start + batch_size, total_frames)
+                    if is_prepared:
+                        batch_images = frame_source[batch_start:batch_stop]
+                    else:
+                        batch_frames = frame_source[batch_start:batch_stop]
+                        if is_binary_frames:
+                            batch_frames = self.__convert_to_uint8(batch_frames, uint8_batch[:batch_stop - batch_start])
+                        for frame_index in range(batch_start, batch_stop):
+                            normalized_stack[frame_index] = self.__normalize_frame_for_omnipose_model(
+                                batch_frames[frame_index - batch_start])
+                        batch_images = list(normalized_stack[batch_start:batch_stop])
+                    timings['normalize'] += time.time() - tic
+                    if not self.__put_to_pipeline_queue(normalized_batches, (batch_start, batch_images), stop_event):
+                        return
+                self.__put_to_pipeline_queue(normalized_batches, None, stop_event)
+            except BaseException:
+                stop_event.set()
+                raise
+
+        def save_batches() -> None:
+            try:
+                while True:
+                    segmented_batch = self.__get_from_pipeline_queue(segmented_batches, stop_event)
+                    if segmented_batch is None:
+                        return
+                    tic = time.time()
+                    batch_start, masks = segmented_batch
+                    if mask_writer:
+                        self.__save_masks(masks, mask_writer, batch_start, total_frames)
+                    masks_of_batches[batch_start] = masks
+                    timings['postprocess'] += time.time() - tic
+            except BaseException:
+                stop_event.set()
+                raise
+
+        total_tic = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                stage_futures = [executor.submit(normalize_batches), executor.submit(save_batches)]
+                try:
+                    for _ in trange(len(batch_starts), desc='Segmenting images (Pipelined)'):
+                        tic = time.time()
+                        normalized_batch = self.__get_from_pipeline_queue(normalized_batches, stop_event)
+                        timings['segment_wait'] += time.time() - tic
+                        if normalized_batch is None:
+                            break
+                        batch_start, batch_images = normalized_batch
+                        tic = time.time()
+                        masks, _, _ = self._omnipose_model.eval(  # type: ignore
+                            batch_images, **self._omnipose_params)
+                        timings['segment'] += time.time() - tic
+                        if not self.__put_to_pipeline_queue(segmented_batches, (batch_start, masks), stop_event):
+                            break
+                    self.__put_to_pipeline_queue(segmented_batches, None, stop_event)
+                except BaseException:
+                    stop_event.set()
+                    raise
+                for stage_future in stage_futures:
+                    stage_future.result()
+        finally:
+            if mask_writer:
+                mask_writer.close()
+        timings['total'] = time.time() - total_tic
+        self._segmentation_timings = timings
+        print(f'total segmentation time: {timings["total"]}s (normalize: {timings["normalize"]}s, '
+              f'segment: {timings["segment"]}s, waiting for frames: {timings["segment_wait"]}s, '
+              f'save: {timings["postprocess"]}s)')
+
+        if not is_prepared:
+            self._normalized_frames = list(self._frame_cache.put(normalized_key, normalized_stack))
+        return [mask for batch_start in batch_starts for mask in masks_of_batches[batch_start]]
+
+    def __put_to_pipeline_queue(self, pipeline_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """
+        Puts an item into a pipeline queue, waiting while the queue is full unless the pipeline is stopped.
+        Args:
+            pipeline_queue (queue.Queue): The queue between two pipeline stages.
+            item: The item to put, None to mark the end of the stream.
+            stop_event (threading.Event): Set when a pipeline stage failed.
+        Returns:
+            bool: Whether the item was put.
+        """
+        while not stop_event.is_set():
+            try:
+                pipeline_queue.put(item, timeout=Identify.PIPELINE_POLL_INTERVAL_IN_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
 
+    def __get_from_pipeline_queue(self, pipeline_queue: queue.Queue, stop_event: threading.Event):
+        """
+        Gets an item from a pipeline queue, waiting while the queue is empty unless the pipeline is stopped.
         Args:
-            sub_image (np.ndarray): The extracted sub-image.
-            fit_window (int): Half-size of the window.
+            pipeline_queue (queue.Queue): The queue between two pipeline stages.
+            stop_event (threading.Event): Set when a pipeline stage failed.
+        Returns:
+            The item, None at the end of the stream or if the pipeline is stopped.
+        """
+        while not stop_event.is_set():
+            try:
+                return pipeline_queue.get(timeout=Identify.PIPELINE_POLL_INTERVAL_IN_SECONDS)
+            except queue.Empty:
+                continue
+        return None
 
+    # Gaussian Fit Methods
+    def __write_back_refined_centroids(self, frame_numbers: np.ndarray, labels: np.ndarray, refined_centers: np.ndarray) -> None:
+        """
+        Writes refined centroids back to the internal dataframe in one pass. The refined centroids are matched
+        to the rows by a hash join on (frame, label), and the centroid columns are replaced as a whole.
+
+        Args:
+            frame_numbers (np.ndarray): The frame number of each refined centroid.
+            labels (np.ndarray): The region label of each refined centroid.
+            refined_centers (np.ndarray): The (K, 2) refined centroids in (y, x) order.
         Returns:
-            opt_param (np.ndarray): Optimized parameters.
-            x_vals, y_vals (np.ndarray): Meshgrid arrays corresponding to the sub-image.
+            None
         """
-        x_vals, y_vals = np.meshgrid(
-            np.arange(sub_image.shape[1]), np.arange(sub_image.shape[0]))
-        x_data = x_vals.ravel()
-        y_data = y_vals.ravel()
-        intensity_data = sub_image.ravel()
+        region_props = self._region_props_dataframe
+        refined_centroids = pd.DataFrame({
+            'frame': frame_numbers.astype(region_props['frame'].dtype),
+            'label': labels.astype(region_props['label'].dtype),
+            'refined_y': refined_centers[:, 0],
+            'refined_x': refined_centers[:, 1],
+        }).drop_duplicates(['frame', 'label'], keep='last')
 
-        amplitude_guess = np.max(sub_image)
-        sigma_guess = max(fit_window / 2, 1)
-        offset_guess = np.min(sub_image)
-        initial_guess = (amplitude_guess, fit_window / 2,
-                         fit_window / 2, sigma_guess, sigma_guess, offset_guess)
-        bounds = ((0, 0, 0, 0.1, 0.1, 0), (np.inf, fit_window,
-                  fit_window, fit_window, fit_window, np.inf))
+        # A left merge keeps the row order of the region properties
+        matched_centroids = region_props[['frame', 'label']].merge(
+            refined_centroids, on=['frame', 'label'], how='left', sort=False)
+        is_refined = matched_centroids['refined_y'].notna().to_numpy()
 
-        opt_param, _ = curve_fit(self.__2d_gaussian, (x_data, y_data), intensity_data,
-                                 p0=initial_guess, bounds=bounds)
-        return opt_param, x_vals, y_vals
+        for column_name, refined_column_name in (('centroid_y', 'refined_y'), ('centroid_x', 'refined_x')):
+            column = region_props[column_name].to_numpy(copy=True)
+            column[is_refined] = matched_centroids[refined_column_name].to_numpy()[is_refined]
+            region_props[column_name] = column
 
-    def __compute_refined_centroid(self, opt_param: np.ndarray, xmin: int, ymin: int, initial_center: tuple, fit_window: int):
+    def __optimize_centroids_using_vectorized_gaussian_fit(self, fit_window: int = 7) -> None:
         """
-        Computes the refined centroid (in full-image coordinates) from the fitted parameters.
+        Optimizes the centroids of all frames with the vectorized Gaussian fit. Consecutive frames are
+        batched until they hold enough regions for a full fit batch, and the refined centroids are
+        written back to the internal dataframe as whole columns.
 
         Args:
-            opt_param (np.ndarray): Optimized Gaussian parameters.
-            xmin, ymin (int): Top-left coordinates of the sub-image.
-            initial_center (tuple): Original centroid in (y, x) order.
-            fit_window (int): Half-size of the window.
+            fit_window (int): Half-size of the window for the Gaussian fit.
+        Returns:
+            None
+        """
+        region_props = self._region_props_dataframe
+        initial_y = region_props['centroid_y'].to_numpy(dtype=np.float64)
+        initial_x = region_props['centroid_x'].to_numpy(dtype=np.float64)
+        refined_y = initial_y.copy()
+        refined_x = initial_x.copy()
+
+        # Positions of the regions of each frame, assuming frames are numbered starting at 1
+        positions_by_frame = region_props.groupby('frame', sort=True).indices
+        frame_numbers = [frame_num for frame_num in positions_by_frame
+                         if 1 <= frame_num <= len(self._captured_frames)]
+
+        gaussian_fitter = GaussianFitter(fit_window)
+        batch_frame_numbers: List[int] = []
+        batch_region_count = 0
+        for frame_position, frame_num in enumerate(tqdm(frame_numbers, desc="Processing frames (Vectorized)")):
+            batch_frame_numbers.append(frame_num)
+            batch_region_count += len(positions_by_frame[frame_num])
+            if batch_region_count < GaussianFitter.DEFAULT_MAX_BATCH_SIZE and frame_position < len(frame_numbers) - 1:
+                continue
+
+            batch_positions = [positions_by_frame[batch_frame_num] for batch_frame_num in batch_frame_numbers]
+            batch_refined_y, batch_refined_x = gaussian_fitter.refine_centroids(
+                [self._working_frames[batch_frame_num - 1] for batch_frame_num in batch_frame_numbers],
+                [initial_y[positions] for positions in batch_positions],
+                [initial_x[positions] for positions in batch_positions])
+            for positions, frame_refined_y, frame_refined_x in zip(batch_positions, batch_refined_y, batch_refined_x):
+                refined_y[positions] = frame_refined_y
+                refined_x[positions] = frame_refined_x
+            batch_frame_numbers = []
+            batch_region_count = 0
 
+        region_props['centroid_y'] = refined_y.astype(region_props['centroid_y'].dtype)
+        region_props['centroid_x'] = refined_x.astype(region_props['centroid_x'].dtype)
+
+    def __optimize_centroids_in_process_pool(self, fit_window: int = 7, max_workers: int = None,
+                                             engine: str = DEFAULT_GAUSSIAN_FIT_ENGINE) -> None:
+        """
+        Optimizes the centroids of all frames in a process pool. The detections are grouped by frame once,
+        the working frames are shared through shared memory, and each task only receives the centroids of
+        a run of consecutive frames and returns their refined centroids as arrays. The refined centroids
+        are written back to the internal dataframe as whole columns.
+
+        Args:
+            fit_window (int): Half-size of the window for the Gaussian fit.
+            max_workers (int): The maximum number of processes. None uses the number of CPUs.
+            engine (str): The Gaussian fit engine, 'curve_fit' or 'vectorized'.
         Returns:
-            (refined_x, refined_y): The refined centroid.
-            If the shift exceeds fit_window, returns the initial centroid.
+            None
+        """
+        region_props = self._region_props_dataframe
+        initial_y = region_props['centroid_y'].to_numpy(dtype=np.float64)
+        initial_x = region_props['centroid_x'].to_numpy(dtype=np.float64)
+        refined_y = initial_y.copy()
+        refined_x = initial_x.copy()
+
+        # Positions of the regions of each frame, assuming frames are numbered starting at 1
+        positions_by_frame = region_props.groupby('frame', sort=True).indices
+        frame_numbers = [frame_num for frame_num in positions_by_frame
+                         if 1 <= frame_num <= len(self._captured_frames)]
+
+        # Shards of consecutive frames holding about the same number of regions
+        worker_count = max_workers or os.cpu_count() or 1
+        total_region_count = sum(len(positions_by_frame[frame_num]) for frame_num in frame_numbers)
+        shard_region_count = max(1, -(-total_region_count // (worker_count * Identify.SHARDS_PER_WORKER)))
+        shards: List[List[int]] = []
+        shard_frame_numbers: List[int] = []
+        region_count = 0
+        for frame_num in frame_numbers:
+            shard_frame_numbers.append(frame_num)
+            region_count += len(positions_by_frame[frame_num])
+            if region_count >= shard_region_count:
+                shards.append(shard_frame_numbers)
+                shard_frame_numbers = []
+                region_count = 0
+        if shard_frame_numbers:
+            shards.append(shard_frame_numbers)
+
+        with SharedFrameStack(self._working_frames, self._chunk_size) as shared_frames:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_gaussian_fit_worker,
+                                     initargs=(shared_frames.get_spec(), fit_window, engine)) as executor:
+                shard_results = executor.map(
+                    _refine_centroids_of_shared_frames,
+                    [[frame_num - 1 for frame_num in shard] for shard in shards],
+                    [[initial_y[positions_by_frame[frame_num]] for frame_num in shard] for shard in shards],
+                    [[initial_x[positions_by_frame[frame_num]] for frame_num in shard] for shard in shards])
+                for shard, (shard_refined_y, shard_refined_x) in zip(
+                        shards, tqdm(shard_results, total=len(shards), desc="Processing frames (Process pool)")):
+                    for frame_num, frame_refined_y, frame_refined_x in zip(shard, shard_refined_y, shard_refined_x):
+                        refined_y[positions_by_frame[frame_num]] = frame_refined_y
+                        refined_x[positions_by_frame[frame_num]] = frame_refined_x
+
+        region_props['centroid_y'] = refined_y.astype(region_props['centroid_y'].dtype)
+        region_props['centroid_x'] = refined_x.astype(region_props['centroid_x'].dtype)
+
+    def __validate_gaussian_fit_backend(self, backend: str) -> None:
+        """
+        Validates the Gaussian fit backend.
+        Args:
+            backend (str): The Gaussian fit backend.
+        Raises:
+            ValueError: If the backend is not supported.
+        """
+        if backend not in Identify.SUPPORTED_GAUSSIAN_FIT_BACKENDS:
+            raise ValueError(
+                f'Invalid backend: {backend}. Available backends: {Identify.SUPPORTED_GAUSSIAN_FIT_BACKENDS}')
+
+    def __validate_gaussian_fit_engine(self, engine: str) -> None:
+        """
+        Checks if the Gaussian fit engine is supported.
+
+        Args:
+            engine (str): The Gaussian fit engine.
+        Raises:
+            ValueError: If the engine is not supported.
         """
-        refined_x = xmin + opt_param[1]
-        refined_y = ymin + opt_param[2]
-        x_init = initial_center[1]
-        y_init = initial_center[0]
-        if abs(refined_x - x_init) > fit_window or abs(refined_y - y_init) > fit_window:
-            return x_init, y_init
-        return refined_x, refined_y
+        if engine not in Identify.SUPPORTED_GAUSSIAN_FIT_ENGINES:
+            raise ValueError(
+                f'Invalid engine: {engine}. Available engines: {Identify.SUPPORTED_GAUSSIAN_FIT_ENGINES}')
 
-    def __process_gaussian_fit_on_a_frame(self, gray_frame: np.ndarray, frame_index: pd.DataFrame, fit_window: int = 7) -> tuple[dict, dict]:
+    def __process_gaussian_fit_on_a_frame(self, gray_frame: np.ndarray, frame_index: pd.DataFrame, fit_window: int = 7,
+                                          engine: str = DEFAULT_GAUSSIAN_FIT_ENGINE) -> tuple[dict, dict]:
         """
         Processes the Gaussian fit on a single frame.
 
@@ -716,6 +1869,7 @@ class Identify:
             gray_frame (np.ndarray): Grayscale image.
             frame_index (int): The index of the frame to process.
             fit_window (int): Half-size of the window for the Gaussian fit.
+            engine (str): 'curve_fit' fits each region with scipy, 'vectorized' fits all regions of the frame at once.
         Returns:
             initial_centroids (dict): Initial centroids in (y, x) order.
             gaussian_centroids (dict): Refined centroids in (y, x) order.
@@ -727,42 +1881,34 @@ class Identify:
         if frame_region_props.empty:
             return None  # Skip empty frames
 
-        initial_centroids = {}
-        gaussian_centroids = {}
-
-        for _, row in frame_region_props.iterrows():
-            initial_center = (row['centroid_y'], row['centroid_x'])
-            label = row['label']
-
-            initial_centroids[label] = initial_center
-
-            sub_image, xmin, ymin = self.__extract_subimage(
-                gray_frame, initial_center, fit_window)
-            if sub_image is None:
-                gaussian_centroids[label] = initial_center
-                continue
+        labels = frame_region_props['label'].to_numpy()
+        initial_y = frame_region_props['centroid_y'].to_numpy(dtype=np.float64)
+        initial_x = frame_region_props['centroid_x'].to_numpy(dtype=np.float64)
+        gaussian_fitter = GaussianFitter(fit_window)
+        if engine == 'vectorized':
+            (refined_y,), (refined_x,) = gaussian_fitter.refine_centroids(
+                [gray_frame], [initial_y], [initial_x])
+        else:
+            refined_y, refined_x = gaussian_fitter.refine_centroids_with_curve_fit(
+                gray_frame, initial_y, initial_x)
 
-            try:
-                opt_param, _, _ = self.__fit_gaussian_to_subimage(
-                    sub_image, fit_window)
-                refined_x, refined_y = self.__compute_refined_centroid(
-                    opt_param, xmin, ymin, initial_center, fit_window)
-                gaussian_centroids[label] = (refined_y, refined_x)
-            except Exception:  # pylint: disable=W0703
-                gaussian_centroids[label] = initial_center
+        initial_centroids = dict(zip(labels, zip(initial_y, initial_x)))
+        gaussian_centroids = dict(zip(labels, zip(refined_y, refined_x)))
         return initial_centroids, gaussian_centroids
 
-    def visualize_gaussian_fit_on_a_frame(self, frame_index: int, fit_window: int = 7) -> None:
+    def visualize_gaussian_fit_on_a_frame(self, frame_index: int, fit_window: int = 7, engine: str = DEFAULT_GAUSSIAN_FIT_ENGINE) -> None:
         """
         Visualizes the Gaussian fit on all centroids in a frame.
 
         Args:
             frame_index (int): The index of the frame to visualize.
             fit_window (int): Half-size of the window for the Gaussian fit.
+            engine (str): The Gaussian fit engine, 'curve_fit' or 'vectorized'. Default is 'curve_fit'.
 
         Returns:
             None
         """
+        self.__validate_gaussian_fit_engine(engine)
         if self._region_props_dataframe.empty:
             print(
                 "Region properties dataframe is empty. Please generate region properties first.")
@@ -775,7 +1921,7 @@ class Identify:
         gray_frame = self._working_frames[frame_index - 1]
 
         initial_centroids, refined_centroids = self.__process_gaussian_fit_on_a_frame(
-            gray_frame, frame_index, fit_window)
+            gray_frame, frame_index, fit_window, engine)
 
         plt.figure(figsize=(10, 8))
         plt.imshow(gray_frame, cmap='gray')
@@ -793,26 +1939,51 @@ class Identify:
         plt.legend(handles=legend_elements, loc='upper right')
         plt.show()
 
-    def optimize_centroids_using_gaussian_fit(self, fit_window: int = 7, max_workers: int = None) -> None:
+    def optimize_centroids_using_gaussian_fit(self, fit_window: int = 7, max_workers: int = None,
+                                              engine: str = DEFAULT_GAUSSIAN_FIT_ENGINE,
+                                              backend: str = DEFAULT_GAUSSIAN_FIT_BACKEND) -> None:
         """
         Optimizes the centroid coordinates in the internal region properties dataframe using
         parallel processing with threads. Each frame is processed independently: for each region
         in a frame, a sub-image is extracted and a 2D Gaussian fit is performed. If the refined
         centroid is within acceptable bounds, the internal dataframe is updated accordingly.
 
-        This version uses ThreadPoolExecutor for parallel processing.
+        The 'curve_fit' engine uses ThreadPoolExecutor and fits each region with scipy. The 'vectorized'
+        engine extracts the windows of many frames at once and fits them together with GaussianFitter,
+        with the same window, bounds and fallbacks.
+
+        The 'process' backend runs either engine in a process pool instead, which avoids contention on
+        the GIL: the frames are shared through shared memory and each worker only receives the centroids
+        of its frames.
 
         Args:
             fit_window (int): The search window size around the detected centroid (default is 7).
-            max_workers (int): Maximum number of worker threads. If None, ThreadPoolExecutor
-                            will choose a default.
+            max_workers (int): Maximum number of worker threads or processes. If None, the executor
+                            will choose a default. Not used by the 'vectorized' engine with the 'thread' backend.
+            engine (str): The Gaussian fit engine, 'curve_fit' or 'vectorized'. Default is 'curve_fit'.
+            backend (str): The parallel backend, 'thread' or 'process'. Default is 'thread'.
         Returns:
             None
+        Raises:
+            ValueError: If the engine or the backend is not supported.
         """
+        self.__validate_gaussian_fit_engine(engine)
+        self.__validate_gaussian_fit_backend(backend)
         if self._region_props_dataframe.empty:
             print(
                 "Region properties dataframe is empty. Please generate region properties first.")
             return
+        self._is_region_props_centroids_optimized = True
+
+        if backend == 'process':
+            self.__optimize_centroids_in_process_pool(fit_window, max_workers, engine)
+            print("Centroids optimized successfully using Gaussian fit.")
+            return
+
+        if engine == 'vectorized':
+            self.__optimize_centroids_using_vectorized_gaussian_fit(fit_window)
+            print("Centroids optimized successfully using Gaussian fit.")
+            return
 
         num_frames = len(self._captured_frames)
         # Assuming frames are numbered starting at 1
@@ -838,14 +2009,10 @@ class Identify:
                     results[frame_num] = None
 
         # Update the internal dataframe using the refined centroids
-        for frame_num, result in tqdm(results.items(), desc="Updating centroids"):
-            if result is None:
-                continue
-            for label, refined_center in result.items():
-                self._region_props_dataframe.loc[
-                    (self._region_props_dataframe['frame'] == frame_num) &
-                    (self._region_props_dataframe['label'] == label),
-                    ['centroid_y', 'centroid_x']
-                ] = refined_center
+        frame_results = [(frame_num, result) for frame_num, result in results.items() if result]
+        self.__write_back_refined_centroids(
+            np.concatenate([np.full(len(result), frame_num) for frame_num, result in frame_results] or [[]]),
+            np.array([label for _, result in frame_results for label in result]),
+            np.array([center for _, result in frame_results for center in result.values()]).reshape(-1, 2))
 
         print("Centroids optimized successfully using Gaussian fit.")
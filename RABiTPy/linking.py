@@ -0,0 +1,495 @@
+"""
+The linking module provides the linkers that link the detections of a video frame by frame, as they
+are produced: the OnlineLinker class, with the same Crocker-Grier linking as trackpy.link_df, and the
+KDTreeLinker class, for dense fields of view.
+"""
+import pickle
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, min_weight_full_bipartite_matching
+from scipy.spatial import cKDTree
+from trackpy.linking.linking import Linker
+from trackpy.linking.utils import Point, TrackUnstored
+
+
+class FrameLinker(ABC):
+    """
+    The FrameLinker class is the abstract base class of the linkers. It links the detections of each frame to the
+    tracks of the previous frames and numbers the particles, while the subclasses link the positions.
+    The linker state can be saved to a checkpoint and loaded in a later session to resume linking.
+    """
+
+    DEFAULT_POSITION_COLUMNS: List[str] = ['centroid_x', 'centroid_y']
+    FRAME_COLUMN = 'frame'
+    PARTICLE_COLUMN = 'particle'
+
+    def __init__(self, max_distance: float, max_memory: int = 0, position_columns: List[str] | None = None):
+        """
+        Initializes a new instance of the FrameLinker class.
+
+        Args:
+          max_distance (float): The maximum distance features can move between frames.
+          max_memory (int, optional): The maximum number of frames during which a feature can vanish. Defaults to 0.
+          position_columns (List[str], optional): The position columns of the detections.
+            Defaults to DEFAULT_POSITION_COLUMNS.
+
+        Raises:
+          ValueError: If the maximum distance is not positive or the maximum memory is negative.
+        """
+        if max_distance is None or max_distance <= 0:
+            raise ValueError('The maximum distance should be positive.')
+        if max_memory is None or max_memory < 0:
+            raise ValueError('The maximum memory should not be negative.')
+
+        self._max_distance: float = float(max_distance)
+        self._max_memory: int = max_memory
+        self._position_columns: List[str] = list(position_columns or FrameLinker.DEFAULT_POSITION_COLUMNS)
+        self._last_frame_number: int | None = None
+
+    def link_frame(self, frame_dataframe: pd.DataFrame, frame_number: int | None = None) -> pd.DataFrame:
+        """
+        Links the detections of the next frame to the tracks of the previous frames.
+
+        Args:
+          frame_dataframe (pd.DataFrame): The detections of the frame, which may be empty.
+          frame_number (int, optional): The frame number, None to read it from the 'frame' column. Defaults to None.
+
+        Returns:
+          pd.DataFrame: A copy of the detections with the 'particle' column added.
+
+        Raises:
+          ValueError: If the frame number is missing, not unique or not after the last linked frame.
+        """
+        if frame_number is None:
+            frame_numbers = frame_dataframe[FrameLinker.FRAME_COLUMN].unique() \
+                if FrameLinker.FRAME_COLUMN in frame_dataframe else []
+            if len(frame_numbers) != 1:
+                raise ValueError('The detections should hold a single frame number, or it should be given.')
+            frame_number = frame_numbers[0]
+
+        particle_ids = self.__link_frame_positions(
+            frame_dataframe[self._position_columns].to_numpy(dtype=np.float64), int(frame_number))
+        linked_dataframe = frame_dataframe.copy()
+        if FrameLinker.FRAME_COLUMN in linked_dataframe:
+            linked_dataframe[FrameLinker.FRAME_COLUMN] = linked_dataframe[FrameLinker.FRAME_COLUMN].astype(np.int64)
+        linked_dataframe[FrameLinker.PARTICLE_COLUMN] = particle_ids
+        return linked_dataframe
+
+    def link_frames(self, region_props_dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Links the detections of the next frames, e.g. a chunk of Identify.iter_region_props or a whole video.
+
+        Args:
+          region_props_dataframe (pd.DataFrame): The detections of one or more frames, with a 'frame' column.
+
+        Returns:
+          pd.DataFrame: A copy of the detections, stably sorted by frame, with the 'particle' column added.
+
+        Raises:
+          ValueError: If a frame is not after the last linked frame.
+        """
+        linked_dataframe = region_props_dataframe.sort_values(FrameLinker.FRAME_COLUMN, kind='mergesort')
+        linked_dataframe[FrameLinker.FRAME_COLUMN] = linked_dataframe[FrameLinker.FRAME_COLUMN].astype(np.int64)
+        frame_numbers, frame_starts = np.unique(linked_dataframe[FrameLinker.FRAME_COLUMN].to_numpy(), return_index=True)
+        positions_of_frames = np.split(
+            linked_dataframe[self._position_columns].to_numpy(dtype=np.float64), frame_starts[1:])
+
+        particle_ids = [self.__link_frame_positions(positions, int(frame_number))
+                        for frame_number, positions in zip(frame_numbers, positions_of_frames)]
+        linked_dataframe[FrameLinker.PARTICLE_COLUMN] = np.concatenate(particle_ids) \
+            if particle_ids else np.empty(0, dtype=np.int64)
+        return linked_dataframe
+
+    def iter_link_frames(self, region_props_chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Links a stream of detections chunk by chunk, so linking runs while the detections are still produced.
+
+        Args:
+          region_props_chunks (Iterable[pd.DataFrame]): The detections of consecutive chunks of frames.
+
+        Yields:
+          pd.DataFrame: The linked detections of each chunk.
+        """
+        for region_props_dataframe in region_props_chunks:
+            yield self.link_frames(region_props_dataframe)
+
+    def get_last_frame_number(self) -> int | None:
+        """
+        Retrieves the number of the last linked frame.
+
+        Returns:
+          int | None: The frame number, None if no frame was linked yet.
+        """
+        return self._last_frame_number
+
+    def save_checkpoint(self, checkpoint_file_path: str) -> None:
+        """
+        Saves the linker state to a checkpoint file.
+
+        Args:
+          checkpoint_file_path (str): The path of the checkpoint file.
+        """
+        with open(checkpoint_file_path, 'wb') as checkpoint_file:
+            pickle.dump(self, checkpoint_file)
+
+    @classmethod
+    def load_checkpoint(cls, checkpoint_file_path: str) -> 'FrameLinker':
+        """
+        Loads a linker from a checkpoint file saved by save_checkpoint.
+
+        Args:
+          checkpoint_file_path (str): The path of the checkpoint file.
+
+        Returns:
+          FrameLinker: The linker, ready to link the frames after the last linked one.
+
+        Raises:
+          TypeError: If the file does not hold a checkpoint of this linker class.
+        """
+        with open(checkpoint_file_path, 'rb') as checkpoint_file:
+            linker = pickle.load(checkpoint_file)
+        if not isinstance(linker, cls):
+            raise TypeError(f'The checkpoint file does not hold a {cls.__name__}.')
+        return linker
+
+    # Protected Methods
+    @abstractmethod
+    def _link_positions(self, positions: np.ndarray, frame_number: int) -> np.ndarray:
+        """
+        Links the positions of the detections of a frame to the tracks. Implemented by the subclasses.
+
+        Args:
+          positions (np.ndarray): The (n, ndim) positions of the detections, which may be empty.
+          frame_number (int): The frame number, after the last linked frame.
+
+        Returns:
+          np.ndarray: The particle id of each detection.
+        """
+
+    # Private Methods
+    def __link_frame_positions(self, positions: np.ndarray, frame_number: int) -> np.ndarray:
+        """
+        Links the positions of the detections of the next frame and records it as the last linked frame.
+
+        Args:
+          positions (np.ndarray): The (n, ndim) positions of the detections, which may be empty.
+          frame_number (int): The frame number.
+
+        Returns:
+          np.ndarray: The particle id of each detection.
+
+        Raises:
+          ValueError: If the frame is not after the last linked frame.
+        """
+        if self._last_frame_number is not None and frame_number <= self._last_frame_number:
+            raise ValueError(
+                f'Frame {frame_number} is not after the last linked frame {self._last_frame_number}.')
+
+        particle_ids = np.asarray(self._link_positions(positions, frame_number), dtype=np.int64)
+        self._last_frame_number = frame_number
+        return particle_ids
+
+
+class OnlineLinker(FrameLinker):
+    """
+    The OnlineLinker class links detections frame by frame with trackpy's Linker, keeping only the
+    detections of the last frame and the remembered ones in memory. The particle ids are the ones
+    trackpy.link_df assigns to the whole table, frames without detections included.
+    """
+
+    def __init__(self, max_distance: float, max_memory: int = 0, position_columns: List[str] | None = None):
+        """
+        Initializes a new instance of the OnlineLinker class.
+
+        Args:
+          max_distance (float): The maximum distance features can move between frames.
+          max_memory (int, optional): The maximum number of frames during which a feature can vanish. Defaults to 0.
+          position_columns (List[str], optional): The position columns of the detections.
+            Defaults to DEFAULT_POSITION_COLUMNS.
+
+        Raises:
+          ValueError: If the maximum distance is not positive or the maximum memory is negative.
+        """
+        super().__init__(max_distance, max_memory, position_columns)
+        self._linker: Linker = Linker(max_distance, memory=max_memory)
+        # trackpy numbers the points and tracks with class-level counters, kept per linker here
+        self._next_point_id: int = 0
+        self._next_track_id: int = 0
+
+    def __getstate__(self) -> dict:
+        # The spatial hash of the last frame holds a lambda, so only its points are saved
+        state = self.__dict__.copy()
+        linker_state = self._linker.__dict__.copy()
+        linker_hash = linker_state.pop('hash')
+        linker_state.pop('subnets', None)
+        linker_state['hash_points'] = linker_hash.points if linker_hash is not None else None
+        state['_linker'] = linker_state
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        linker_state = state['_linker']
+        hash_points = linker_state.pop('hash_points')
+        linker = Linker.__new__(Linker)
+        linker.__dict__.update(linker_state)
+        linker.hash = None if hash_points is None else linker.hash_cls(
+            hash_points, ndim=linker.ndim, to_eucl=linker.to_eucl, dist_func=linker.dist_func)
+        state['_linker'] = linker
+        self.__dict__.update(state)
+
+    # Protected Methods
+    def _link_positions(self, positions: np.ndarray, frame_number: int) -> np.ndarray:
+        self.__restore_counters()
+        try:
+            if self._last_frame_number is None:
+                self._linker.init_level(positions, frame_number)
+            else:
+                # Frames skipped without detections still age the remembered features, as in trackpy.link_df
+                for empty_frame_number in range(self._last_frame_number + 1, frame_number):
+                    self._linker.next_level(np.empty((0, positions.shape[1])), empty_frame_number)
+                self._linker.next_level(positions, frame_number)
+            return np.asarray(self._linker.particle_ids, dtype=np.int64)
+        finally:
+            self.__store_counters()
+
+    # Private Methods
+    def __restore_counters(self) -> None:
+        """
+        Restores the point and track counters of trackpy to the values of this linker.
+        """
+        Point.reset_counter(self._next_point_id)
+        TrackUnstored.reset_counter(self._next_track_id)
+
+    def __store_counters(self) -> None:
+        """
+        Stores the point and track counters of trackpy as the values of this linker.
+        """
+        self._next_point_id = next(Point.counter)
+        self._next_track_id = next(TrackUnstored.counter)
+
+
+class KDTreeLinker(FrameLinker):
+    """
+    The KDTreeLinker class links dense detections frame by frame. The candidate links between the tracks
+    and the detections within the maximum distance are found with KD-trees, from the last positions of the
+    tracks or, if predictive, from the positions extrapolated with their last velocity. Each detection is
+    assigned to at most one track, either greedily by distance or by minimizing the squared distances of
+    each group of competing links. Unlike trackpy.link_df, which enumerates the alternatives of each group
+    and raises SubnetOversizeException in crowded fields, the greedy assignment costs O(L log L) for L
+    candidate links, and the minimization solves a sparse assignment problem, whose memory grows with the
+    number of candidate links of a group rather than with the square of its size.
+    """
+
+    SUPPORTED_ASSIGNMENTS = ['greedy', 'hungarian']
+    DEFAULT_ASSIGNMENT = 'greedy'
+
+    def __init__(self, max_distance: float, max_memory: int = 0, position_columns: List[str] | None = None,
+                 is_predictive: bool = False, assignment: str = DEFAULT_ASSIGNMENT):
+        """
+        Initializes a new instance of the KDTreeLinker class.
+
+        Args:
+          max_distance (float): The maximum distance features can move between frames, from their predicted position.
+          max_memory (int, optional): The maximum number of frames during which a feature can vanish. Defaults to 0.
+          position_columns (List[str], optional): The position columns of the detections.
+            Defaults to DEFAULT_POSITION_COLUMNS.
+          is_predictive (bool, optional): Whether to search for each track around its position extrapolated with
+            its last velocity, rather than around its last position. It helps directed motion, but splits the tracks
+            of diffusive motion, whose last step is noise. Defaults to False, as trackpy.link_df.
+          assignment (str, optional): 'greedy' links the closest pairs first, 'hungarian' minimizes the sum of
+            the squared distances of each group of competing links, at a higher cost. Defaults to DEFAULT_ASSIGNMENT.
+
+        Raises:
+          ValueError: If the maximum distance is not positive, the maximum memory is negative or the assignment
+            is not supported.
+        """
+        super().__init__(max_distance, max_memory, position_columns)
+        if assignment not in KDTreeLinker.SUPPORTED_ASSIGNMENTS:
+            raise ValueError(
+                f'Invalid assignment: {assignment}. Available assignments: {KDTreeLinker.SUPPORTED_ASSIGNMENTS}')
+
+        self._is_predictive: bool = is_predictive
+        self._assignment: str = assignment
+        ndim = len(self._position_columns)
+        self._track_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self._track_positions: np.ndarray = np.empty((0, ndim))
+        self._track_velocities: np.ndarray = np.empty((0, ndim))
+        self._track_last_frame_numbers: np.ndarray = np.empty(0, dtype=np.int64)
+        self._next_track_id: int = 0
+
+    # Protected Methods
+    def _link_positions(self, positions: np.ndarray, frame_number: int) -> np.ndarray:
+        # Forget the tracks that vanished for longer than the memory
+        is_remembered = frame_number - self._track_last_frame_numbers - 1 <= self._max_memory
+        self._track_ids = self._track_ids[is_remembered]
+        self._track_positions = self._track_positions[is_remembered]
+        self._track_velocities = self._track_velocities[is_remembered]
+        self._track_last_frame_numbers = self._track_last_frame_numbers[is_remembered]
+
+        elapsed_frames = (frame_number - self._track_last_frame_numbers)[:, np.newaxis]
+        predicted_positions = self._track_positions + self._track_velocities * elapsed_frames \
+            if self._is_predictive else self._track_positions
+        track_indices, detection_indices = self.__assign(predicted_positions, positions)
+
+        particle_ids = np.empty(len(positions), dtype=np.int64)
+        particle_ids[detection_indices] = self._track_ids[track_indices]
+        is_new_detection = np.ones(len(positions), dtype=bool)
+        is_new_detection[detection_indices] = False
+        new_track_count = int(is_new_detection.sum())
+        new_track_ids = np.arange(self._next_track_id, self._next_track_id + new_track_count, dtype=np.int64)
+        particle_ids[is_new_detection] = new_track_ids
+        self._next_track_id += new_track_count
+
+        # Move the linked tracks and start the new ones
+        self._track_velocities[track_indices] = \
+            (positions[detection_indices] - self._track_positions[track_indices]) / elapsed_frames[track_indices]
+        self._track_positions[track_indices] = positions[detection_indices]
+        self._track_last_frame_numbers[track_indices] = frame_number
+        self._track_ids = np.concatenate([self._track_ids, new_track_ids])
+        self._track_positions = np.concatenate([self._track_positions, positions[is_new_detection]])
+        self._track_velocities = np.concatenate(
+            [self._track_velocities, np.zeros((new_track_count, positions.shape[1]))])
+        self._track_last_frame_numbers = np.concatenate(
+            [self._track_last_frame_numbers, np.full(new_track_count, frame_number, dtype=np.int64)])
+        return particle_ids
+
+    # Private Methods
+    def __assign(self, track_positions: np.ndarray, detection_positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Assigns the detections to the tracks within the maximum distance, each at most once.
+
+        Args:
+          track_positions (np.ndarray): The (predicted) positions of the tracks.
+          detection_positions (np.ndarray): The positions of the detections.
+
+        Returns:
+          tuple[np.ndarray, np.ndarray]: The indices of the linked tracks and of their detections.
+        """
+        if len(track_positions) == 0 or len(detection_positions) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        candidate_links = cKDTree(track_positions).sparse_distance_matrix(
+            cKDTree(detection_positions), self._max_distance, output_type='ndarray')
+        track_indices = candidate_links['i'].astype(np.int64)
+        detection_indices = candidate_links['j'].astype(np.int64)
+        distances = candidate_links['v']
+        if self._assignment == 'hungarian':
+            return self.__assign_by_groups(track_indices, detection_indices, distances,
+                                           len(track_positions), len(detection_positions))
+        return self.__assign_greedily(track_indices, detection_indices, distances,
+                                      len(track_positions), len(detection_positions))
+
+    def __assign_greedily(self, track_indices: np.ndarray, detection_indices: np.ndarray, distances: np.ndarray,
+                          track_count: int, detection_count: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Links the closest pairs first. Each round links every candidate that is the closest one of both its
+        track and its detection, which gives the same links as going through the candidates by distance.
+
+        Args:
+          track_indices (np.ndarray): The track of each candidate link.
+          detection_indices (np.ndarray): The detection of each candidate link.
+          distances (np.ndarray): The distance of each candidate link.
+          track_count (int): The number of tracks.
+          detection_count (int): The number of detections.
+
+        Returns:
+          tuple[np.ndarray, np.ndarray]: The indices of the linked tracks and of their detections.
+        """
+        linked_track_indices = [np.empty(0, dtype=np.int64)]
+        linked_detection_indices = [np.empty(0, dtype=np.int64)]
+        is_track_linked = np.zeros(track_count, dtype=bool)
+        is_detection_linked = np.zeros(detection_count, dtype=bool)
+        # Ties are broken by the candidate order, so every round links at least the closest candidate
+        candidate_ranks = np.empty(len(distances), dtype=np.int64)
+        candidate_ranks[np.argsort(distances, kind='stable')] = np.arange(len(distances))
+        while len(candidate_ranks):
+            is_closest_of_track = self.__get_closest_candidates(track_indices, candidate_ranks)
+            is_closest_of_detection = self.__get_closest_candidates(detection_indices, candidate_ranks)
+            is_linked = is_closest_of_track & is_closest_of_detection
+            linked_track_indices.append(track_indices[is_linked])
+            linked_detection_indices.append(detection_indices[is_linked])
+            is_track_linked[track_indices[is_linked]] = True
+            is_detection_linked[detection_indices[is_linked]] = True
+
+            is_available = ~is_track_linked[track_indices] & ~is_detection_linked[detection_indices]
+            track_indices = track_indices[is_available]
+            detection_indices = detection_indices[is_available]
+            candidate_ranks = candidate_ranks[is_available]
+        return np.concatenate(linked_track_indices), np.concatenate(linked_detection_indices)
+
+    def __get_closest_candidates(self, owner_indices: np.ndarray, candidate_ranks: np.ndarray) -> np.ndarray:
+        """
+        Finds the closest candidate link of each track (or detection).
+
+        Args:
+          owner_indices (np.ndarray): The track (or detection) of each candidate link.
+          candidate_ranks (np.ndarray): The rank of each candidate link by distance.
+
+        Returns:
+          np.ndarray: Whether each candidate link is the closest one of its owner.
+        """
+        candidate_order = np.lexsort((candidate_ranks, owner_indices))
+        is_first_of_owner = np.ones(len(candidate_order), dtype=bool)
+        is_first_of_owner[1:] = owner_indices[candidate_order[1:]] != owner_indices[candidate_order[:-1]]
+        is_closest = np.zeros(len(candidate_order), dtype=bool)
+        is_closest[candidate_order[is_first_of_owner]] = True
+        return is_closest
+
+    def __assign_by_groups(self, track_indices: np.ndarray, detection_indices: np.ndarray, distances: np.ndarray,
+                           track_count: int, detection_count: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Minimizes the sum of the squared distances of each group of competing links, where leaving a track or a
+        detection unlinked costs the squared maximum distance. The isolated links are kept as they are.
+        Each group is solved as a sparse assignment problem: a track can take one of its detections or its own
+        unlinked slot, a detection can take one of its tracks or its own unlinked slot, and the unlinked slots of
+        a track and a detection can only pair if they share a candidate link, as in the cost matrix of Jaqaman et
+        al. (2008). The number of edges is then 2 * links + tracks + detections instead of (tracks + detections) ** 2.
+
+        Args:
+          track_indices (np.ndarray): The track of each candidate link.
+          detection_indices (np.ndarray): The detection of each candidate link.
+          distances (np.ndarray): The distance of each candidate link.
+          track_count (int): The number of tracks.
+          detection_count (int): The number of detections.
+
+        Returns:
+          tuple[np.ndarray, np.ndarray]: The indices of the linked tracks and of their detections.
+        """
+        candidate_graph = coo_matrix((np.ones(len(distances)), (track_indices, track_count + detection_indices)),
+                                     shape=(track_count + detection_count,) * 2)
+        _, group_labels = connected_components(candidate_graph, directed=False)
+        candidate_groups = group_labels[track_indices]
+        is_isolated = np.bincount(candidate_groups)[candidate_groups] == 1
+        linked_track_indices = [track_indices[is_isolated]]
+        linked_detection_indices = [detection_indices[is_isolated]]
+
+        candidate_order = np.flatnonzero(~is_isolated)
+        candidate_order = candidate_order[np.argsort(candidate_groups[candidate_order], kind='stable')]
+        group_starts = np.flatnonzero(np.diff(candidate_groups[candidate_order], prepend=-1))
+        unlinked_cost = self._max_distance ** 2
+        for group_candidates in np.split(candidate_order, group_starts[1:]):
+            group_tracks, local_track_indices = np.unique(track_indices[group_candidates], return_inverse=True)
+            group_detections, local_detection_indices = np.unique(
+                detection_indices[group_candidates], return_inverse=True)
+            group_track_count, group_detection_count = len(group_tracks), len(group_detections)
+            size = group_track_count + group_detection_count
+            track_slots, detection_slots = np.arange(group_track_count), np.arange(group_detection_count)
+            # Rows are the tracks then the unlinked slots of the detections, columns are the detections then
+            # the unlinked slots of the tracks
+            rows = np.concatenate([local_track_indices, track_slots,
+                                   group_track_count + detection_slots, group_track_count + local_detection_indices])
+            columns = np.concatenate([local_detection_indices, group_detection_count + track_slots,
+                                      detection_slots, group_detection_count + local_track_indices])
+            # Every full matching has `size` edges, so adding 1 to each weight keeps the optimum and avoids the
+            # zero weights, which are missing edges for the sparse solver
+            weights = 1 + np.concatenate([distances[group_candidates] ** 2, np.full(size, unlinked_cost),
+                                          np.zeros(len(group_candidates))])
+            rows, columns = min_weight_full_bipartite_matching(
+                coo_matrix((weights, (rows, columns)), shape=(size, size)).tocsr())
+            is_link = (rows < group_track_count) & (columns < group_detection_count)
+            linked_track_indices.append(group_tracks[rows[is_link]])
+            linked_detection_indices.append(group_detections[columns[is_link]])
+        return np.concatenate(linked_track_indices), np.concatenate(linked_detection_indices)
@@ -8,9 +8,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from distfit import distfit
-from tqdm import trange
+from tqdm import tqdm
 
 from .track import Tracker  # type: ignore
+from .track_index import TrackIndex
 
 
 class Stats:
@@ -34,6 +35,7 @@ class Stats:
         self._capture_speed_in_fps = tracker_object._parent._parent._actual_fps
         self.pixel_scale_factor: float = tracker_object._parent._parent.get_pixel_scale_factor()
         self._mean_array: List[float] = []
+        self._track_index: TrackIndex | None = None
 
     def calculate_speed_and_plot_mean(self,
                                       distribution_type: str = DEFAULT_DISTRIBUTION,
@@ -55,15 +57,14 @@ class Stats:
         Returns:
             np.ndarray: Array of mean speeds for each particle.
         """
-        unique_particles = self._sorted_dataframe['particle'].unique()
-        print(f'Total unique particles: {len(unique_particles)}')
+        track_index = self.__get_track_index()
+        print(f'Total unique particles: {len(track_index)}')
         mean_array: List[float] = []
 
-        # For each particle, compute speed and plot its distribution individually
-        for idx in trange(len(unique_particles), desc='Calculating Speed'):
-            each_particle = unique_particles[idx]
-            current_particle = self.__get_particle_data(each_particle)
-            speed = self.__calculate_speed(current_particle)
+        # For each particle (by ascending id), compute speed on views of its rows and plot its distribution individually
+        for each_particle, x, y, frames in tqdm(track_index.iter_track_values(['centroid_x', 'centroid_y', 'frame']),
+                                                total=len(track_index), desc='Calculating Speed'):
+            speed = self.__calculate_speed(x, y, frames)
             # Updated call passes the additional arguments to the new fitting method.
             mean_speed = self.__fit_and_plot_speed_distribution(
                 speed, each_particle, distribution_type=distribution_type,
@@ -75,48 +76,46 @@ class Stats:
         self._mean_array: List[float] = mean_array
         return np.array(mean_array)
 
-    def __get_particle_data(self, particle: int) -> pd.DataFrame:
+    def __get_track_index(self) -> TrackIndex:
         """
-        Get data for a specific particle.
-
-        Args:
-            particle (int): The particle ID.
+        Get the index of the tracks, shared with the tracker if it still holds the same particles.
 
         Returns:
-            pd.DataFrame: DataFrame containing data for the specified particle.
+            TrackIndex: The index of the tracks.
         """
-        return self._sorted_dataframe.loc[self._sorted_dataframe['particle'] == particle, ['centroid_x', 'centroid_y', 'frame', 'particle']]
+        if self._track_index is None:
+            self._track_index = self._parent.get_track_index() \
+                if self._parent._linked_particles_dataframes is self._sorted_dataframe \
+                else TrackIndex(self._sorted_dataframe)
+        return self._track_index
 
-    def __calculate_speed(self, particle_data: pd.DataFrame) -> np.ndarray:
+    def __calculate_speed(self, x: np.ndarray, y: np.ndarray, time: np.ndarray) -> np.ndarray:
         """
         Calculate the speed of a particle.
 
         Args:
-            particle_data (pd.DataFrame): DataFrame containing data for a particle.
+            x (np.ndarray): The centroid_x values of the particle, sorted by frame.
+            y (np.ndarray): The centroid_y values of the particle, sorted by frame.
+            time (np.ndarray): The frames of the particle, sorted.
 
         Returns:
             np.ndarray: Array of speeds for the particle.
         """
         # If there's only one row, speed can't be calculated, so return 0.0 for that single point.
-        if len(particle_data) < 2:
+        if len(x) < 2:
             speed = np.array([0.0])
         else:
-            x = particle_data['centroid_x'].to_numpy()
-            y = particle_data['centroid_y'].to_numpy()
             x_diff = np.diff(x)
             y_diff = np.diff(y)
             distance = np.sqrt(x_diff**2 + y_diff**2)
             distance_in_um = distance * self.pixel_scale_factor
-            time = particle_data['frame']
             time_diff = np.diff(time)
             time_in_seconds = time_diff / self._capture_speed_in_fps
             speed = distance_in_um / time_in_seconds
 
-            # Append 0.0 for the last speed entry to match the length of the particle_data
+            # Append 0.0 for the last speed entry to match the number of rows of the particle
             speed = np.append(speed, 0.0)
 
-        # Assign the speed array back to the DataFrame
-        particle_data['speed'] = speed
         return speed
 
     def __fit_and_plot_speed_distribution(
@@ -0,0 +1,239 @@
+"""
+The tiling module provides the FrameTiler class to split large frames into overlapping tiles
+and to stitch the label masks of the tiles back into one label mask per frame.
+"""
+from typing import List
+
+import numpy as np
+from skimage.segmentation import relabel_sequential
+
+
+class FrameTiler:
+    """
+    The FrameTiler class splits frames into overlapping tiles of the same size and stitches the label
+    masks segmented on the tiles back together. Each pixel of the stitched mask is taken from the tile
+    whose core (the tile without the half of each overlap it shares with a neighbour) contains it, and
+    the labels of neighbouring tiles that cover the same object in their overlap are merged, so an
+    object crossing a seam keeps a single label.
+    """
+
+    DEFAULT_TILE_SIZE = 512
+    DEFAULT_OVERLAP = 64
+    MIN_SEAM_OVERLAP_FRACTION = 0.5
+
+    def __init__(self, tile_size: int = DEFAULT_TILE_SIZE, overlap: int = DEFAULT_OVERLAP):
+        """
+        Initializes a new instance of the FrameTiler class.
+
+        Args:
+          tile_size (int, optional): The height and width of the tiles. Frames smaller than a tile are
+            not split along that axis. Defaults to DEFAULT_TILE_SIZE.
+          overlap (int, optional): The minimum number of pixels shared by neighbouring tiles. It should be
+            larger than the objects, so every object lies whole in at least one tile. Defaults to DEFAULT_OVERLAP.
+
+        Raises:
+          ValueError: If the tile size is not positive or the overlap is not smaller than the tile size.
+        """
+        if tile_size is None or tile_size <= 0:
+            raise ValueError('The tile size should be positive.')
+        if overlap is None or not 0 <= overlap < tile_size:
+            raise ValueError('The tile overlap should be between 0 and the tile size.')
+
+        self._tile_size: int = tile_size
+        self._overlap: int = overlap
+
+    def get_tile_boxes(self, frame_shape: tuple) -> List[tuple]:
+        """
+        Retrieves the boxes of the tiles of a frame, row by row.
+
+        Args:
+          frame_shape (tuple): The (height, width) of the frame.
+
+        Returns:
+          List[tuple]: The (y_start, y_stop, x_start, x_stop) box of each tile.
+        """
+        height, width = frame_shape[:2]
+        return [(y_start, min(y_start + self._tile_size, height), x_start, min(x_start + self._tile_size, width))
+                for y_start in self.__get_tile_starts(height)
+                for x_start in self.__get_tile_starts(width)]
+
+    def split_frame(self, frame: np.ndarray) -> List[np.ndarray]:
+        """
+        Splits a frame into its tiles.
+
+        Args:
+          frame (np.ndarray): The frame to split.
+
+        Returns:
+          List[np.ndarray]: The tiles (views of the frame), in the order of get_tile_boxes.
+        """
+        return [frame[y_start:y_stop, x_start:x_stop]
+                for y_start, y_stop, x_start, x_stop in self.get_tile_boxes(frame.shape)]
+
+    def stitch_masks(self, frame_shape: tuple, tile_masks: List[np.ndarray]) -> np.ndarray:
+        """
+        Stitches the label masks of the tiles of a frame into one label mask with sequential labels.
+
+        Args:
+          frame_shape (tuple): The (height, width) of the frame.
+          tile_masks (List[np.ndarray]): The label mask of each tile, in the order of get_tile_boxes.
+
+        Returns:
+          np.ndarray: The label mask of the frame, in the dtype of the tile masks if the labels fit.
+
+        Raises:
+          ValueError: If the number of tile masks does not match the number of tiles.
+        """
+        height, width = frame_shape[:2]
+        tile_boxes = self.get_tile_boxes(frame_shape)
+        if len(tile_masks) != len(tile_boxes):
+            raise ValueError(f'Expected {len(tile_boxes)} tile masks, got {len(tile_masks)}.')
+
+        # Make the labels unique across tiles
+        label_offsets = np.concatenate([[0], np.cumsum([int(np.max(mask, initial=0)) for mask in tile_masks])])
+        global_tile_masks = [np.where(mask > 0, mask.astype(np.int64) + label_offset, 0)
+                             for mask, label_offset in zip(tile_masks, label_offsets)]
+
+        y_starts = self.__get_tile_starts(height)
+        x_starts = self.__get_tile_starts(width)
+        y_cuts = self.__get_core_cuts(y_starts, height)
+        x_cuts = self.__get_core_cuts(x_starts, width)
+        stitched_mask = np.zeros((height, width), dtype=np.int64)
+        for tile_index, (y_start, _, x_start, _) in enumerate(tile_boxes):
+            row, column = divmod(tile_index, len(x_starts))
+            core_y_start, core_y_stop = y_cuts[row], y_cuts[row + 1]
+            core_x_start, core_x_stop = x_cuts[column], x_cuts[column + 1]
+            stitched_mask[core_y_start:core_y_stop, core_x_start:core_x_stop] = global_tile_masks[tile_index][
+                core_y_start - y_start:core_y_stop - y_start, core_x_start - x_start:core_x_stop - x_start]
+
+        # Merge the labels of neighbouring tiles covering the same object in their overlap
+        parents = np.arange(label_offsets[-1] + 1)
+        for tile_index, other_tile_index in self.__get_neighbouring_tile_pairs(len(y_starts), len(x_starts)):
+            for label, other_label in self.__get_matching_labels(
+                    tile_boxes[tile_index], global_tile_masks[tile_index],
+                    tile_boxes[other_tile_index], global_tile_masks[other_tile_index]):
+                self.__union(parents, label, other_label)
+        roots = np.arange(len(parents))
+        for label in np.flatnonzero(parents != roots):
+            roots[label] = self.__find_root(parents, label)
+
+        stitched_mask, _, _ = relabel_sequential(roots[stitched_mask])
+        mask_dtype = np.result_type(*tile_masks)
+        if np.issubdtype(mask_dtype, np.integer) and np.iinfo(mask_dtype).max >= stitched_mask.max(initial=0):
+            return stitched_mask.astype(mask_dtype)
+        return stitched_mask.astype(np.int32)
+
+    # Private Methods
+    def __get_tile_starts(self, length: int) -> List[int]:
+        """
+        Retrieves the start of the tiles along an axis. The last tile ends on the frame border.
+
+        Args:
+          length (int): The length of the axis.
+
+        Returns:
+          List[int]: The start of each tile.
+        """
+        if length <= self._tile_size:
+            return [0]
+        tile_step = self._tile_size - self._overlap
+        return list(range(0, length - self._tile_size, tile_step)) + [length - self._tile_size]
+
+    def __get_core_cuts(self, tile_starts: List[int], length: int) -> List[int]:
+        """
+        Retrieves the borders of the tile cores along an axis, halfway through each overlap.
+
+        Args:
+          tile_starts (List[int]): The start of each tile.
+          length (int): The length of the axis.
+
+        Returns:
+          List[int]: The len(tile_starts) + 1 borders, the core of tile i spans [cuts[i], cuts[i + 1]).
+        """
+        overlap_middles = [(next_start + min(start + self._tile_size, length)) // 2
+                           for start, next_start in zip(tile_starts, tile_starts[1:])]
+        return [0] + overlap_middles + [length]
+
+    def __get_neighbouring_tile_pairs(self, row_count: int, column_count: int) -> List[tuple]:
+        """
+        Retrieves the pairs of tiles sharing an overlap, including diagonal neighbours.
+
+        Args:
+          row_count (int): The number of tile rows.
+          column_count (int): The number of tile columns.
+
+        Returns:
+          List[tuple]: The indices of the two tiles of each pair.
+        """
+        tile_pairs = []
+        for row in range(row_count):
+            for column in range(column_count):
+                for row_step, column_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    other_row, other_column = row + row_step, column + column_step
+                    if other_row < row_count and 0 <= other_column < column_count:
+                        tile_pairs.append((row * column_count + column, other_row * column_count + other_column))
+        return tile_pairs
+
+    def __get_matching_labels(self, tile_box: tuple, tile_mask: np.ndarray,
+                              other_tile_box: tuple, other_tile_mask: np.ndarray) -> List[tuple]:
+        """
+        Retrieves the pairs of labels of two tiles that cover the same object in the overlap of the tiles.
+        Two labels match if they share at least MIN_SEAM_OVERLAP_FRACTION of the smaller of their areas
+        in the overlap.
+
+        Args:
+          tile_box (tuple): The box of the first tile.
+          tile_mask (np.ndarray): The label mask of the first tile, with labels unique across tiles.
+          other_tile_box (tuple): The box of the second tile.
+          other_tile_mask (np.ndarray): The label mask of the second tile, with labels unique across tiles.
+
+        Returns:
+          List[tuple]: The matching (label, other_label) pairs.
+        """
+        y_start, x_start = max(tile_box[0], other_tile_box[0]), max(tile_box[2], other_tile_box[2])
+        y_stop, x_stop = min(tile_box[1], other_tile_box[1]), min(tile_box[3], other_tile_box[3])
+        if y_start >= y_stop or x_start >= x_stop:
+            return []
+
+        labels = tile_mask[y_start - tile_box[0]:y_stop - tile_box[0], x_start - tile_box[2]:x_stop - tile_box[2]]
+        other_labels = other_tile_mask[y_start - other_tile_box[0]:y_stop - other_tile_box[0],
+                                       x_start - other_tile_box[2]:x_stop - other_tile_box[2]]
+        is_shared = (labels > 0) & (other_labels > 0)
+        if not is_shared.any():
+            return []
+
+        label_areas = dict(zip(*np.unique(labels[labels > 0], return_counts=True)))
+        other_label_areas = dict(zip(*np.unique(other_labels[other_labels > 0], return_counts=True)))
+        label_pairs, shared_areas = np.unique(
+            np.stack([labels[is_shared], other_labels[is_shared]]), axis=1, return_counts=True)
+        return [(label, other_label) for (label, other_label), shared_area in zip(label_pairs.T, shared_areas)
+                if shared_area >= FrameTiler.MIN_SEAM_OVERLAP_FRACTION * min(label_areas[label], other_label_areas[other_label])]
+
+    def __find_root(self, parents: np.ndarray, label: int) -> int:
+        """
+        Finds the root label of the merged labels containing a label, halving the path on the way.
+
+        Args:
+          parents (np.ndarray): The parent of each label.
+          label (int): The label.
+
+        Returns:
+          int: The root label.
+        """
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return int(label)
+
+    def __union(self, parents: np.ndarray, label: int, other_label: int) -> None:
+        """
+        Merges the labels containing two labels, keeping the smaller root.
+
+        Args:
+          parents (np.ndarray): The parent of each label.
+          label (int): The first label.
+          other_label (int): The second label.
+        """
+        root, other_root = self.__find_root(parents, label), self.__find_root(parents, other_label)
+        if root != other_root:
+            parents[max(root, other_root)] = min(root, other_root)
@@ -3,6 +3,8 @@ Module for tracking particles in 2D using trackpy.
 """
 
 import os
+import pickle
+from typing import Iterable, Iterator
 
 import cv2
 import matplotlib.pyplot as plt
@@ -11,9 +13,13 @@ import pandas as pd
 import seaborn as sns
 import trackpy as tp
 from matplotlib import cm
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 from tqdm import tqdm
 
 from .identify import Identify
+from .linking import FrameLinker, KDTreeLinker, OnlineLinker
+from .track_index import TrackIndex
 
 
 class Tracker:
@@ -22,6 +28,10 @@ class Tracker:
     """
     DEFAULT_POSITION_COLUMNS: list[str] = [
         'centroid_x', 'centroid_y']  # Default position columns
+    DEFAULT_ONLINE_LINKING_CHECKPOINT_NAME: str = 'online_linking_checkpoint'
+    SUPPORTED_LINKING_ENGINES: list[str] = ['trackpy', 'kdtree']
+    DEFAULT_LINKING_ENGINE: str = 'trackpy'
+    MAX_LEGEND_PARTICLES: int = 30  # Particles listed in the legend of the trajectory plots at most
 
     def __init__(self, identify_object: Identify) -> None:
         """
@@ -38,35 +48,198 @@ class Tracker:
         self._pixel_scale_factor: float = identify_object._parent.get_pixel_scale_factor()
         self._linked_particles_dataframes: pd.DataFrame = pd.DataFrame()
         self._position_columns: list[str] = self.DEFAULT_POSITION_COLUMNS
+        self._online_linker: FrameLinker | None = None
+        self._online_linked_dataframes: list[pd.DataFrame] = []
+        self._track_index: TrackIndex | None = None
 
-    def link_particles(self, max_distance: float, max_memory: int, position_columns: list[str]) -> pd.DataFrame:
+    def link_particles(self, max_distance: float, max_memory: int, position_columns: list[str], engine: str = DEFAULT_LINKING_ENGINE,
+                       is_predictive: bool = False, assignment: str = KDTreeLinker.DEFAULT_ASSIGNMENT) -> pd.DataFrame:
         """
         Link particles in a DataFrame.
+        The 'trackpy' engine uses trackpy's link_df. The 'kdtree' engine uses KDTreeLinker, which scales to dense
+        fields of view where link_df slows down or raises SubnetOversizeException on large subnetworks.
 
         Args:
             max_distance (float): Maximum distance features can move between frames.
             max_memory (int): Maximum number of frames during which a feature can vanish.
             position_columns (List[str]): List containing the column names for the x and y positions. Default is ['centroid_x', 'centroid_y'].
+            engine (str): The linking engine, 'trackpy' or 'kdtree'. Default is 'trackpy'.
+            is_predictive (bool): Whether the 'kdtree' engine searches around the positions predicted from the last velocities, which suits directed motion. Default is False.
+            assignment (str): The assignment of the 'kdtree' engine, 'greedy' or 'hungarian'. Default is 'greedy'.
 
         Returns:
             pd.DataFrame: DataFrame containing the linked particles.
         """
+        self.__validate_linking_engine(engine)
         if position_columns:
             self._position_columns = position_columns
 
-        linked_dataframe = tp.link_df(self._region_props_dataframe, search_range=max_distance,
-                                      memory=max_memory, pos_columns=self._position_columns)
+        if engine == 'kdtree':
+            linked_dataframe = self.__create_linker(
+                engine, max_distance, max_memory, is_predictive, assignment).link_frames(self._region_props_dataframe)
+        else:
+            linked_dataframe = tp.link_df(self._region_props_dataframe, search_range=max_distance,
+                                          memory=max_memory, pos_columns=self._position_columns)
         self._linked_particles_dataframes = linked_dataframe
         particle_count = linked_dataframe['particle'].nunique()
         print(f'Successfully linked {particle_count} particles.')
         return linked_dataframe
 
-    def filter_particles(self, min_frames: int, min_displacement: float, is_update_particles: bool = True) -> pd.DataFrame:
+    def start_online_linking(self, max_distance: float, max_memory: int, position_columns: list[str] | None = None,
+                             engine: str = DEFAULT_LINKING_ENGINE, is_predictive: bool = False,
+                             assignment: str = KDTreeLinker.DEFAULT_ASSIGNMENT) -> None:
         """
-        Filter particles based on the number of frames they are present in and their displacement.
+        Start linking particles online, frame by frame as the region properties are produced, e.g. by
+        Identify.iter_region_props. The particles are linked as link_particles would link the whole table.
+
+        Args:
+            max_distance (float): Maximum distance features can move between frames.
+            max_memory (int): Maximum number of frames during which a feature can vanish.
+            position_columns (List[str]): List containing the column names for the x and y positions. Default is ['centroid_x', 'centroid_y'].
+            engine (str): The linking engine, 'trackpy' or 'kdtree'. Default is 'trackpy'.
+            is_predictive (bool): Whether the 'kdtree' engine searches around the positions predicted from the last velocities, which suits directed motion. Default is False.
+            assignment (str): The assignment of the 'kdtree' engine, 'greedy' or 'hungarian'. Default is 'greedy'.
+        """
+        self.__validate_linking_engine(engine)
+        if position_columns:
+            self._position_columns = position_columns
+
+        self._online_linker = self.__create_linker(
+            engine, max_distance, max_memory, is_predictive, assignment)
+        self._online_linked_dataframes = []
+
+    def link_particles_online(self, region_props_dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Link the particles of the next frames to the particles linked so far.
+
+        Args:
+            region_props_dataframe (pd.DataFrame): The region properties of one or more frames after the last linked frame.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the linked particles of these frames.
+        """
+        if self._online_linker is None:
+            raise ValueError(
+                "Online linking is not started. Please start online linking first.")
+
+        linked_dataframe = self._online_linker.link_frames(
+            region_props_dataframe)
+        self._online_linked_dataframes.append(linked_dataframe)
+        return linked_dataframe
+
+    def iter_link_particles(self, region_props_chunks: Iterable[pd.DataFrame], max_distance: float, max_memory: int,
+                            position_columns: list[str] | None = None, engine: str = DEFAULT_LINKING_ENGINE,
+                            is_predictive: bool = False, assignment: str = KDTreeLinker.DEFAULT_ASSIGNMENT) -> Iterator[pd.DataFrame]:
+        """
+        Link a stream of region properties chunk by chunk, so identification and tracking run concurrently.
+        The linked particles are available as with link_particles once the stream is exhausted.
+
+        Args:
+            region_props_chunks (Iterable[pd.DataFrame]): The region properties of consecutive chunks of frames, e.g. from Identify.iter_region_props.
+            max_distance (float): Maximum distance features can move between frames.
+            max_memory (int): Maximum number of frames during which a feature can vanish.
+            position_columns (List[str]): List containing the column names for the x and y positions. Default is ['centroid_x', 'centroid_y'].
+            engine (str): The linking engine, 'trackpy' or 'kdtree'. Default is 'trackpy'.
+            is_predictive (bool): Whether the 'kdtree' engine searches around the positions predicted from the last velocities, which suits directed motion. Default is False.
+            assignment (str): The assignment of the 'kdtree' engine, 'greedy' or 'hungarian'. Default is 'greedy'.
+
+        Yields:
+            pd.DataFrame: DataFrame containing the linked particles of each chunk.
+        """
+        self.start_online_linking(max_distance, max_memory, position_columns,
+                                  engine, is_predictive, assignment)
+        for region_props_dataframe in region_props_chunks:
+            yield self.link_particles_online(region_props_dataframe)
+        self.finish_online_linking()
+
+    def finish_online_linking(self) -> pd.DataFrame:
+        """
+        Finish linking particles online and collect the linked particles.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the linked particles.
+        """
+        if self._online_linker is None:
+            raise ValueError(
+                "Online linking is not started. Please start online linking first.")
+
+        linked_dataframe = pd.concat(self._online_linked_dataframes, ignore_index=True) \
+            if self._online_linked_dataframes else pd.DataFrame()
+        self._linked_particles_dataframes = linked_dataframe
+        self._online_linker = None
+        self._online_linked_dataframes = []
+        particle_count = linked_dataframe['particle'].nunique(
+        ) if not linked_dataframe.empty else 0
+        print(f'Successfully linked {particle_count} particles.')
+        return linked_dataframe
+
+    def save_online_linking_checkpoint(self, output_file_name: str = DEFAULT_ONLINE_LINKING_CHECKPOINT_NAME) -> str:
+        """
+        Save the online linking state and the particles linked so far to a checkpoint file.
+
+        Args:
+            output_file_name (str): Name of the checkpoint file. Default is 'online_linking_checkpoint'.
+
+        Returns:
+            str: The path of the checkpoint file.
+        """
+        if self._online_linker is None:
+            raise ValueError(
+                "Online linking is not started. Please start online linking first.")
+
+        checkpoint_path = os.path.join(
+            self._directory, f'{output_file_name}.pkl')
+        linked_dataframe = pd.concat(self._online_linked_dataframes, ignore_index=True) \
+            if self._online_linked_dataframes else pd.DataFrame()
+        with open(checkpoint_path, 'wb') as checkpoint_file:
+            pickle.dump({'online_linker': self._online_linker,
+                         'linked_particles': linked_dataframe,
+                         'position_columns': self._position_columns}, checkpoint_file)
+        print(
+            f'Online linking checkpoint saved to {checkpoint_path} after frame {self._online_linker.get_last_frame_number()}.')
+        return checkpoint_path
+
+    def load_online_linking_checkpoint(self, input_file_name: str = DEFAULT_ONLINE_LINKING_CHECKPOINT_NAME) -> int | None:
+        """
+        Load the online linking state saved by save_online_linking_checkpoint, to resume linking after its last frame.
+
+        Args:
+            input_file_name (str): Name of the checkpoint file. Default is 'online_linking_checkpoint'.
+
+        Returns:
+            int | None: The number of the last linked frame, None if no frame was linked.
+        """
+        checkpoint_path = os.path.join(
+            self._directory, f'{input_file_name}.pkl')
+        if not os.path.exists(checkpoint_path):
+            raise FileNotFoundError(
+                f'No online linking checkpoint found at {checkpoint_path}.')
+
+        with open(checkpoint_path, 'rb') as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+        self._online_linker = checkpoint['online_linker']
+        self._position_columns = checkpoint['position_columns']
+        self._online_linked_dataframes = [
+            checkpoint['linked_particles']] if not checkpoint['linked_particles'].empty else []
+        last_frame_number = self._online_linker.get_last_frame_number()
+        print(
+            f'Online linking checkpoint loaded from {checkpoint_path}, resuming after frame {last_frame_number}.')
+        return last_frame_number
+
+    def filter_particles(self, min_frames: int, min_displacement: float, is_update_particles: bool = True,
+                         min_net_speed: float | None = None, min_path_length: float | None = None,
+                         min_extent: float | None = None) -> pd.DataFrame:
+        """
+        Filter particles based on the number of frames they are present in and their displacement, and optionally
+        on their net speed, path length and extent. The measures of all particles are computed at once from the
+        rows sorted by particle and frame.
         Args:
             min_frames (int): Minimum number of frames a particle must be present in to be kept.
-            min_displacement (float): Minimum displacement a particle must have to be kept. Default is 10.0.
+            min_displacement (float): Minimum displacement (in pixels) between the first and last positions a particle must have to be kept.
+            is_update_particles (bool): Whether to update the linked particles with the filtered particles. Default is True.
+            min_net_speed (float): Minimum displacement per frame a particle must have to be kept, None to not filter on it. Default is None.
+            min_path_length (float): Minimum length (in pixels) of the path a particle must travel to be kept, None to not filter on it. Default is None.
+            min_extent (float): Minimum diagonal (in pixels) of the bounding box of the positions of a particle to be kept, None to not filter on it. Default is None.
         Returns:
             pd.DataFrame: DataFrame containing the filtered particles.
         """
@@ -74,35 +247,33 @@ class Tracker:
             raise ValueError(
                 "No linked dataframes available. Please link particles first.")
 
-        # Filtering the stubs with less than 500 frames
-        filtered_dataframe = tp.filter_stubs(
-            self._linked_particles_dataframes, threshold=min_frames)
-        particle_count_after_filtering = filtered_dataframe['particle'].nunique(
-        )
+        track_measures = self.__measure_tracks(self.get_track_index())
+        linked_dataframe = self._linked_particles_dataframes.reset_index(
+            drop=True)
+
+        # Filtering the stubs present in less than min_frames frames
+        is_kept = track_measures['frame_count'] >= min_frames
         print(
-            f'After filtering based on min {min_frames} frames: {particle_count_after_filtering} unique particles')
+            f'After filtering based on min {min_frames} frames: {is_kept.sum()} unique particles')
 
         # Filtering the particles based on the displacement
-        particle_displacements = filtered_dataframe.groupby('particle').apply(
-            lambda group: np.sqrt(
-                (group[self._position_columns[0]].iloc[-1] - group[self._position_columns[0]].iloc[0])**2 +
-                (group[self._position_columns[1]].iloc[-1] -
-                 group[self._position_columns[1]].iloc[0])**2
-            )
-        )
-        displacement_filtered = particle_displacements[particle_displacements >
-                                                       min_displacement].index
-        result_dataframe = filtered_dataframe[filtered_dataframe['particle'].isin(
-            displacement_filtered)]
+        is_kept &= track_measures['displacement'] > min_displacement
+        print(
+            f'After filtering based on min {min_displacement} displacement filtering: {is_kept.sum()} unique particles')
+
+        for measure_name, min_value in (('net_speed', min_net_speed), ('path_length', min_path_length), ('extent', min_extent)):
+            if min_value is not None:
+                is_kept &= track_measures[measure_name] >= min_value
+                print(
+                    f'After filtering based on min {min_value} {measure_name.replace("_", " ")}: {is_kept.sum()} unique particles')
+
+        # Indexed by frame as trackpy's filter_stubs does
+        result_dataframe = linked_dataframe[linked_dataframe['particle'].isin(
+            track_measures.index[is_kept])].set_index('frame', drop=False)
 
         if is_update_particles:
             self._linked_particles_dataframes = result_dataframe
 
-        particle_count_after_displacement_filtering = result_dataframe['particle'].nunique(
-        )
-        print(
-            f'After filtering based on min {min_displacement} displacement filtering: {particle_count_after_displacement_filtering} unique particles')
-
         return result_dataframe
 
     def compute_plot_save_MSD(self, max_lag_time: int = 100, is_save: bool = False, output_file_name: str = 'Mean_Squared_Difference') -> pd.DataFrame:
@@ -225,64 +396,77 @@ class Tracker:
             1.05, 1), loc='upper left', borderaxespad=0., ncols=n_cols)
         plt.show()
 
-    def visualize_particle_trajectories_from_origin(self, show_axes: bool = True):
+    def visualize_particle_trajectories_from_origin(self, show_axes: bool = True, max_particles: int | None = None,
+                                                    max_points_per_particle: int | None = None):
         """
         Visualize the trajectories of particles initiated from the origin.
+        The trajectories are shifted at once and drawn as a single line collection and a single scatter plot, and the
+        particles are only listed in the legend if there are at most MAX_LEGEND_PARTICLES of them.
         args:
             show_axes: bool: Whether to show the axes lines at the origin to create quadrants.
+            max_particles: int: Maximum number of particles to plot, picked evenly among the particles, None to plot all. Default is None.
+            max_points_per_particle: int: Maximum number of points to plot per particle, keeping every n-th point and the last one, None to plot all. Default is None.
         returns:
             None
         """
-        df = self._linked_particles_dataframes
+        if max_particles is not None and max_particles <= 0:
+            raise ValueError('The maximum number of particles should be positive.')
+        if max_points_per_particle is not None and max_points_per_particle < 2:
+            raise ValueError(
+                'The maximum number of points per particle should be at least 2.')
 
-        # Initialize a new DataFrame to hold the shifted centroids
-        shifted_df = pd.DataFrame()
+        track_index = self.get_track_index()
+        sorted_dataframe = track_index.get_sorted_dataframe()
+        position_columns = ['centroid_x', 'centroid_y']
 
         # Shift centroids so that each particle starts from the origin (0, 0)
-        for particle_id in df['particle'].unique():
-            # Create a copy of the particle's data to avoid SettingWithCopyWarning
-            particle_data = df[df['particle'] == particle_id].copy()
-
-            # Shift the centroids
-            particle_data['shifted_centroid_x'] = particle_data['centroid_x'] - \
-                particle_data['centroid_x'].iloc[0]
-            particle_data['shifted_centroid_y'] = particle_data['centroid_y'] - \
-                particle_data['centroid_y'].iloc[0]
-
-            # Append to the shifted_df DataFrame
-            shifted_df = pd.concat(
-                [shifted_df, particle_data], ignore_index=True)
+        shifted_positions = (sorted_dataframe[position_columns] - sorted_dataframe.groupby(
+            'particle', sort=False)[position_columns].transform('first')).to_numpy(dtype=np.float64)
 
-        sns.scatterplot(data=shifted_df, x='shifted_centroid_y',
-                        y='shifted_centroid_x', hue='particle', palette='bright', s=50)
+        is_track_plotted, is_row_plotted = self.__decimate_tracks(
+            track_index.get_track_lengths(), max_particles, max_points_per_particle)
+        track_of_rows = np.repeat(
+            np.arange(len(track_index)), track_index.get_track_lengths())[is_row_plotted]
+        # Observe the x and y axis are swapped
+        plotted_points = shifted_positions[is_row_plotted][:, ::-1]
+
+        palette = np.array(sns.color_palette('bright'))
+        track_colors = palette[np.arange(len(track_index)) % len(palette)]
+        plotted_track_lengths = np.bincount(
+            track_of_rows, minlength=len(track_index))[is_track_plotted]
+        track_segments = np.split(
+            plotted_points, np.cumsum(plotted_track_lengths)[:-1])
+
+        # Connect the points to show the tracks
+        axes = plt.gca()
+        axes.add_collection(LineCollection(
+            track_segments, colors=track_colors[is_track_plotted], linewidths=1))
+        axes.scatter(plotted_points[:, 0], plotted_points[:, 1],
+                     c=track_colors[track_of_rows], s=50)
+        axes.autoscale_view()
 
         # Add axis titles
         plt.xlabel('Centroid X')
         plt.ylabel('Centroid Y')
 
-        # Connect the points to show the track
-        for particle_id in shifted_df['particle'].unique():
-            particle_data = shifted_df[shifted_df['particle'] == particle_id]
-            plt.plot(particle_data['shifted_centroid_y'],
-                     particle_data['shifted_centroid_x'])
-
         # Invert the y-axis
-        plt.gca().invert_yaxis()
+        axes.invert_yaxis()
 
         # Set the title
-        plt.gca().set_title('Trajectories of Particles initiated from Origin')
+        axes.set_title('Trajectories of Particles initiated from Origin')
 
         if show_axes:
             # Draw the axes lines at the origin to create quadrants
             plt.axhline(0, color='black', linewidth=1)
             plt.axvline(0, color='black', linewidth=1)
 
-        n_cols = len(
-            particle_data) // 20000 if len(particle_data) > 20000 else 1
-
         # Move the legend box outside the plot and give it a title
-        plt.legend(title='Particle ID', bbox_to_anchor=(
-            1.05, 1), loc='upper left', borderaxespad=0., ncols=n_cols)
+        if is_track_plotted.sum() <= self.MAX_LEGEND_PARTICLES:
+            legend_handles = [Line2D([], [], marker='o', linestyle='', color=track_color, label=str(particle_id))
+                              for particle_id, track_color in zip(track_index.get_particle_ids()[is_track_plotted],
+                                                                  track_colors[is_track_plotted])]
+            plt.legend(handles=legend_handles, title='Particle ID', bbox_to_anchor=(
+                1.05, 1), loc='upper left', borderaxespad=0.)
 
         plt.show()
 
@@ -306,6 +490,23 @@ class Tracker:
         plt.gca().invert_yaxis()
         plt.show()
 
+    def get_track_index(self) -> TrackIndex:
+        """
+        Retrieves the index of the tracks of the linked particles, to select the rows of a particle without
+        scanning the whole dataframe. The index is built on first use and rebuilt whenever the linked particles
+        dataframe is replaced, e.g. by link_particles or filter_particles. It is not updated if the dataframe is
+        modified in place.
+        Returns:
+            TrackIndex: The index of the tracks.
+        """
+        if self._linked_particles_dataframes.empty:
+            raise ValueError(
+                "No linked dataframes available. Please link particles first.")
+
+        if self._track_index is None or not self._track_index.is_built_on(self._linked_particles_dataframes):
+            self._track_index = TrackIndex(self._linked_particles_dataframes)
+        return self._track_index
+
     def get_directory(self):
         """
         Retrieves the working directory.
@@ -364,7 +565,7 @@ class Tracker:
 
         # Retrieve captured frames and validate
         frames = self._parent._parent.get_captured_frames()
-        if not frames:
+        if len(frames) == 0:
             raise ValueError(
                 "No captured frames available. Ensure the video is loaded and processed correctly.")
 
@@ -401,6 +602,10 @@ class Tracker:
         # Initialize progress bar
         with tqdm(total=total_frames, desc="Overlaying Tracks on Video") as progress_bar:
             for current_frame_index, frame in enumerate(frames):
+                # Frames served from a frame store are read-only views, so draw on a copy
+                if not frame.flags.writeable:
+                    frame = frame.copy()
+
                 # Adjust frame index based on the offset
                 adjusted_frame_index = current_frame_index + 1 + frame_index_offset
 
@@ -438,6 +643,102 @@ class Tracker:
             f'Processed video with overlaid tracks saved to {output_video_path}')
 
     # Private methods
+    def __validate_linking_engine(self, engine: str) -> None:
+        """
+        Checks if the linking engine is supported.
+        Args:
+            engine (str): The linking engine.
+        Raises:
+            ValueError: If the engine is not supported.
+        """
+        if engine not in Tracker.SUPPORTED_LINKING_ENGINES:
+            raise ValueError(
+                f'Invalid engine: {engine}. Available engines: {Tracker.SUPPORTED_LINKING_ENGINES}')
+
+    def __create_linker(self, engine: str, max_distance: float, max_memory: int, is_predictive: bool, assignment: str) -> FrameLinker:
+        """
+        Creates a frame-by-frame linker of the linking engine.
+        Args:
+            engine (str): The linking engine, 'trackpy' or 'kdtree'.
+            max_distance (float): Maximum distance features can move between frames.
+            max_memory (int): Maximum number of frames during which a feature can vanish.
+            is_predictive (bool): Whether the 'kdtree' engine searches around the predicted positions.
+            assignment (str): The assignment of the 'kdtree' engine.
+        Returns:
+            FrameLinker: The linker.
+        """
+        if engine == 'kdtree':
+            return KDTreeLinker(max_distance, max_memory, self._position_columns, is_predictive, assignment)
+        return OnlineLinker(max_distance, max_memory, self._position_columns)
+
+    def __decimate_tracks(self, track_lengths: np.ndarray, max_particles: int | None,
+                          max_points_per_particle: int | None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Picks the tracks and the points of each track to plot.
+        Args:
+            track_lengths (np.ndarray): The number of rows of each track, in the order of the track index.
+            max_particles (int | None): Maximum number of tracks, picked evenly among the tracks, None for all.
+            max_points_per_particle (int | None): Maximum number of points per track, keeping every n-th point and the last one, None for all.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Whether each track and each sorted row is plotted.
+        """
+        track_count = len(track_lengths)
+        is_track_plotted = np.ones(track_count, dtype=bool)
+        if max_particles is not None and track_count > max_particles:
+            is_track_plotted[:] = False
+            is_track_plotted[np.linspace(
+                0, track_count - 1, max_particles).round().astype(np.int64)] = True
+
+        track_of_rows = np.repeat(np.arange(track_count), track_lengths)
+        is_row_plotted = is_track_plotted[track_of_rows]
+        if max_points_per_particle is not None:
+            track_starts = np.concatenate([[0], np.cumsum(track_lengths)[:-1]])
+            positions_in_track = np.arange(
+                len(track_of_rows)) - track_starts[track_of_rows]
+            point_steps = np.maximum(
+                1, np.ceil((track_lengths - 1) / (max_points_per_particle - 1)).astype(np.int64))
+            is_row_plotted &= (positions_in_track % point_steps[track_of_rows] == 0) | \
+                (positions_in_track == track_lengths[track_of_rows] - 1)
+        return is_track_plotted, is_row_plotted
+
+    def __measure_tracks(self, track_index: TrackIndex) -> pd.DataFrame:
+        """
+        Measures the track of each particle in one pass over the rows sorted by particle and frame.
+        Args:
+            track_index (TrackIndex): The index of the tracks of the linked particles.
+        Returns:
+            pd.DataFrame: The frame count, the displacement between the first and last positions, the displacement
+                per frame (net speed), the path length and the diagonal of the bounding box (extent) of each particle,
+                indexed by particle.
+        """
+        frames = track_index.get_column_values('frame')
+        positions_x = track_index.get_column_values(
+            self._position_columns[0]).astype(np.float64)
+        positions_y = track_index.get_column_values(
+            self._position_columns[1]).astype(np.float64)
+        track_offsets = track_index.get_track_offsets()
+        track_starts, track_ends = track_offsets[:-1], track_offsets[1:] - 1
+
+        displacements = np.hypot(positions_x[track_ends] - positions_x[track_starts],
+                                 positions_y[track_ends] - positions_y[track_starts])
+        durations = frames[track_ends] - frames[track_starts]
+        net_speeds = np.divide(displacements, durations, out=np.zeros_like(
+            displacements), where=durations > 0)
+
+        # The steps from the last position of a track to the first position of the next track are not counted
+        step_lengths = np.zeros(len(frames))
+        step_lengths[1:] = np.hypot(
+            np.diff(positions_x), np.diff(positions_y))
+        step_lengths[track_starts] = 0
+        path_lengths = np.add.reduceat(step_lengths, track_starts)
+        extents = np.hypot(
+            np.maximum.reduceat(positions_x, track_starts) - np.minimum.reduceat(positions_x, track_starts),
+            np.maximum.reduceat(positions_y, track_starts) - np.minimum.reduceat(positions_y, track_starts))
+
+        return pd.DataFrame({'frame_count': track_index.get_track_lengths(), 'displacement': displacements,
+                             'net_speed': net_speeds, 'path_length': path_lengths, 'extent': extents},
+                            index=pd.Index(track_index.get_particle_ids(), name='particle'))
+
     def __shape_and_sort_dataframe(self, dataframe: pd.DataFrame, cols: list[str], sort_by: list[str]) -> pd.DataFrame:
         """
         Shape and sort the dataframe.
@@ -0,0 +1,191 @@
+"""
+The track_index module provides the TrackIndex class to access the rows of each particle of linked
+data without scanning the whole table.
+"""
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+
+class TrackIndex:
+    """
+    The TrackIndex class sorts the rows of linked data by particle and frame once and records where the
+    rows of each particle start and how many there are, as in a CSR matrix. The rows of a particle are then
+    a slice of the sorted rows, so selecting every track costs as much as one pass over the rows, instead
+    of one pass per track with df[df['particle'] == particle_id].
+    """
+
+    PARTICLE_COLUMN = 'particle'
+    FRAME_COLUMN = 'frame'
+
+    def __init__(self, linked_dataframe: pd.DataFrame):
+        """
+        Initializes a new instance of the TrackIndex class.
+
+        Args:
+          linked_dataframe (pd.DataFrame): The linked data, with the 'particle' and 'frame' columns.
+            It should not be modified in place afterwards, as the index is not updated.
+
+        Raises:
+          ValueError: If the 'particle' or 'frame' column is missing.
+        """
+        if TrackIndex.PARTICLE_COLUMN not in linked_dataframe or TrackIndex.FRAME_COLUMN not in linked_dataframe:
+            raise ValueError("The linked data should have the 'particle' and 'frame' columns.")
+
+        self._source_dataframe: pd.DataFrame = linked_dataframe
+        # Factorized, so particle ids of any type (e.g. the strings of Utility) sort alike
+        particle_codes, particle_ids = pd.factorize(linked_dataframe[TrackIndex.PARTICLE_COLUMN], sort=True)
+        frames = linked_dataframe[TrackIndex.FRAME_COLUMN].to_numpy()
+        self._row_order: np.ndarray = np.lexsort((frames, particle_codes))
+        self._sorted_dataframe: pd.DataFrame = linked_dataframe.iloc[self._row_order]
+
+        self._particle_ids: np.ndarray = np.asarray(particle_ids)
+        self._track_lengths: np.ndarray = np.bincount(particle_codes, minlength=len(particle_ids))
+        self._track_offsets: np.ndarray = np.concatenate([[0], np.cumsum(self._track_lengths)]).astype(np.int64)
+        self._track_positions: dict = {particle_id: track_position
+                                       for track_position, particle_id in enumerate(self._particle_ids.tolist())}
+        self._column_values: dict = {}
+
+    def is_built_on(self, linked_dataframe: pd.DataFrame) -> bool:
+        """
+        Checks if the index was built on a DataFrame (the same object, not an equal one).
+
+        Args:
+          linked_dataframe (pd.DataFrame): The linked data.
+
+        Returns:
+          bool: True if the index was built on the DataFrame.
+        """
+        return linked_dataframe is self._source_dataframe
+
+    def get_particle_ids(self) -> np.ndarray:
+        """
+        Retrieves the particle ids, in ascending order.
+
+        Returns:
+          np.ndarray: The particle ids.
+        """
+        return self._particle_ids
+
+    def get_track_offsets(self) -> np.ndarray:
+        """
+        Retrieves the offsets of the tracks in the sorted rows.
+
+        Returns:
+          np.ndarray: The len(particle_ids) + 1 offsets, the rows of the i-th particle span [offsets[i], offsets[i + 1]).
+        """
+        return self._track_offsets
+
+    def get_track_lengths(self) -> np.ndarray:
+        """
+        Retrieves the number of rows of each track.
+
+        Returns:
+          np.ndarray: The number of rows of each particle, in the order of get_particle_ids.
+        """
+        return self._track_lengths
+
+    def get_row_order(self) -> np.ndarray:
+        """
+        Retrieves the positions of the sorted rows in the linked data.
+
+        Returns:
+          np.ndarray: The position in the linked data of each sorted row.
+        """
+        return self._row_order
+
+    def get_sorted_dataframe(self) -> pd.DataFrame:
+        """
+        Retrieves the linked data sorted by particle and frame.
+
+        Returns:
+          pd.DataFrame: The sorted rows, with the index of the linked data.
+        """
+        return self._sorted_dataframe
+
+    def get_column_values(self, column: str) -> np.ndarray:
+        """
+        Retrieves the values of a column in the sorted rows. The array is computed once and shared, so it is read-only.
+
+        Args:
+          column (str): The column name.
+
+        Returns:
+          np.ndarray: The read-only values of the sorted rows.
+        """
+        if column not in self._column_values:
+            column_values = self._sorted_dataframe[column].to_numpy().copy()
+            column_values.setflags(write=False)
+            self._column_values[column] = column_values
+        return self._column_values[column]
+
+    def get_track_slice(self, particle_id: int) -> slice:
+        """
+        Retrieves the sorted rows of a particle.
+
+        Args:
+          particle_id (int): The particle id.
+
+        Returns:
+          slice: The slice of the sorted rows of the particle.
+
+        Raises:
+          KeyError: If the particle is not in the index.
+        """
+        track_position = self._track_positions[particle_id]
+        return slice(int(self._track_offsets[track_position]), int(self._track_offsets[track_position + 1]))
+
+    def get_track(self, particle_id: int, columns: List[str] | None = None) -> pd.DataFrame:
+        """
+        Retrieves the rows of a particle, sorted by frame.
+
+        Args:
+          particle_id (int): The particle id.
+          columns (List[str], optional): The columns to retrieve, None for all columns. Defaults to None.
+
+        Returns:
+          pd.DataFrame: The rows of the particle.
+
+        Raises:
+          KeyError: If the particle is not in the index.
+        """
+        track_rows = self._sorted_dataframe.iloc[self.get_track_slice(particle_id)]
+        return track_rows if columns is None else track_rows[columns]
+
+    def get_track_values(self, particle_id: int, column: str) -> np.ndarray:
+        """
+        Retrieves the values of a column for a particle, sorted by frame, without copying them.
+
+        Args:
+          particle_id (int): The particle id.
+          column (str): The column name.
+
+        Returns:
+          np.ndarray: A read-only view of the values of the particle.
+
+        Raises:
+          KeyError: If the particle is not in the index.
+        """
+        return self.get_column_values(column)[self.get_track_slice(particle_id)]
+
+    def iter_track_values(self, columns: List[str]) -> Iterator[tuple]:
+        """
+        Iterates over the tracks, yielding views of their column values.
+
+        Args:
+          columns (List[str]): The column names.
+
+        Yields:
+          tuple: The particle id followed by a read-only view of the values of each column.
+        """
+        column_values = [self.get_column_values(column) for column in columns]
+        for track_position, particle_id in enumerate(self._particle_ids.tolist()):
+            track_start, track_stop = self._track_offsets[track_position], self._track_offsets[track_position + 1]
+            yield (particle_id, *(values[track_start:track_stop] for values in column_values))
+
+    def __contains__(self, particle_id: int) -> bool:
+        return particle_id in self._track_positions
+
+    def __len__(self) -> int:
+        return len(self._particle_ids)
@@ -0,0 +1,178 @@
+"""
+The writer module provides the BackgroundWriter class to write images to disk on background
+threads, so the loops producing the images (video decoding, segmentation) do not wait on disk.
+"""
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+import tifffile
+
+
+class BackgroundWriter:
+    """
+    The BackgroundWriter class writes images to disk on background threads. Images are handed over
+    through a bounded queue, so a slow disk applies back-pressure instead of buffering the whole video.
+    All queued images are written once the writer is flushed or closed, and the first write error is
+    raised again on the next submit, flush or close.
+    """
+
+    SUPPORTED_BACKENDS = ['tifffile', 'cv2']
+    DEFAULT_BACKEND = 'tifffile'
+    DEFAULT_MAX_WORKERS = 1
+    DEFAULT_MAX_QUEUE_SIZE = 64
+    TIFF_FILE_EXTENSIONS = ['tif', 'tiff']
+    CV2_TIFF_DEFLATE_COMPRESSION = 8
+
+    def __init__(self, backend: str = DEFAULT_BACKEND, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, compression_level: int | None = None):
+        """
+        Initializes a new instance of the BackgroundWriter class and starts its writer threads.
+
+        Args:
+          backend (str, optional): The library to encode the images with. 'cv2' writes the images like
+            cv2.imwrite (BGR color order), 'tifffile' writes the raw arrays as TIFF. Defaults to DEFAULT_BACKEND.
+          max_workers (int, optional): Number of writer threads. Defaults to DEFAULT_MAX_WORKERS.
+          max_queue_size (int, optional): Maximum number of images waiting to be written.
+            Defaults to DEFAULT_MAX_QUEUE_SIZE.
+          compression_level (int, optional): Deflate compression level from 0 to 9, None to keep the default
+            encoding of the backend (uncompressed for 'tifffile'). OpenCV only supports the level for PNG files
+            and writes TIFF files with its default deflate level. Defaults to None.
+
+        Raises:
+          ValueError: If the backend is not supported or the number of workers is not positive.
+        """
+        if backend not in BackgroundWriter.SUPPORTED_BACKENDS:
+            raise ValueError(
+                f'Invalid backend: {backend}. Available backends: {BackgroundWriter.SUPPORTED_BACKENDS}')
+        if max_workers is None or max_workers <= 0:
+            raise ValueError('The number of writer threads should be positive.')
+
+        self._backend: str = backend
+        self._compression_level: int | None = compression_level
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._error: Exception | None = None
+        self._error_lock = threading.Lock()
+        self._is_closed: bool = False
+        self._threads: list[threading.Thread] = [
+            threading.Thread(target=self.__write_queued_images, daemon=True) for _ in range(max_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, file_path: str, image: np.ndarray) -> None:
+        """
+        Queues an image to be written. Blocks while the queue is full.
+
+        Args:
+          file_path (str): The path of the file to write.
+          image (np.ndarray): The image to write. It must not be modified until it is written.
+
+        Raises:
+          ValueError: If the writer is closed.
+        """
+        if self._is_closed:
+            raise ValueError('The background writer is closed.')
+        self.__raise_write_error()
+        self._queue.put((file_path, image))
+
+    def flush(self) -> None:
+        """
+        Waits until all queued images are written.
+        """
+        self._queue.join()
+        self.__raise_write_error()
+
+    def close(self) -> None:
+        """
+        Writes the remaining queued images and stops the writer threads.
+        """
+        if self._is_closed:
+            return
+        self._is_closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self.__raise_write_error()
+
+    def __enter__(self) -> 'BackgroundWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # Private Methods
+    def __write_queued_images(self) -> None:
+        """
+        Writes the queued images until the writer is closed.
+        """
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                if self._error is None:
+                    file_path, image = task
+                    self.__write_image(file_path, image)
+            except Exception as e:  # pylint: disable=W0703
+                with self._error_lock:
+                    if self._error is None:
+                        self._error = e
+            finally:
+                self._queue.task_done()
+
+    def __write_image(self, file_path: str, image: np.ndarray) -> None:
+        """
+        Writes a single image with the configured backend and compression.
+
+        Args:
+          file_path (str): The path of the file to write.
+          image (np.ndarray): The image to write.
+
+        Raises:
+          IOError: If OpenCV could not write the image.
+        """
+        if self._backend == 'tifffile':
+            if self._compression_level is None:
+                tifffile.imwrite(file_path, image)
+            else:
+                tifffile.imwrite(file_path, image, compression='zlib',
+                                 compressionargs={'level': self._compression_level})
+            return
+
+        # cv2.imwrite reports most failures (bad path, unsupported extension, full disk) by returning False
+        if not cv2.imwrite(file_path, image, self.__get_cv2_write_params(file_path)):
+            raise IOError(f'Could not write {file_path}')
+
+    def __get_cv2_write_params(self, file_path: str) -> list:
+        """
+        Retrieves the OpenCV write parameters for the compression of the given file type.
+
+        Args:
+          file_path (str): The path of the file to write.
+
+        Returns:
+          list: The OpenCV write parameters.
+        """
+        if self._compression_level is None:
+            return []
+        file_type = os.path.splitext(file_path)[1].lstrip('.').lower()
+        if file_type in BackgroundWriter.TIFF_FILE_EXTENSIONS:
+            return [cv2.IMWRITE_TIFF_COMPRESSION, BackgroundWriter.CV2_TIFF_DEFLATE_COMPRESSION]
+        if file_type == 'png':
+            return [cv2.IMWRITE_PNG_COMPRESSION, self._compression_level]
+        return []
+
+    def __raise_write_error(self) -> None:
+        """
+        Raises the first error raised while writing an image.
+
+        Raises:
+          Exception: The write error.
+        """
+        with self._error_lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
@@ -0,0 +1,96 @@
+"""
+Benchmark comparing the sequential and seeking decode modes of
+Capture.process_video_into_frames on a synthetic video.
+
+Usage:
+    python -m benchmarks.capture_decode_benchmark --frames 600 --fps 30 --capture-fps 15
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from RABiTPy import Capture
+
+SYNTHETIC_VIDEO_FILE_NAME = 'synthetic_video.avi'
+
+
+def write_synthetic_video(video_path: str, total_frames: int, fps: float, frame_size: tuple) -> None:
+    """
+    Writes a synthetic MJPG video with a few moving blobs.
+
+    Args:
+        video_path (str): The path of the video file to write.
+        total_frames (int): The number of frames to write.
+        fps (float): The frame rate of the video.
+        frame_size (tuple): The (width, height) of the video frames.
+    """
+    width, height = frame_size
+    video_writer = cv2.VideoWriter(
+        video_path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    random_generator = np.random.default_rng(0)
+    positions = random_generator.uniform(0, 1, size=(20, 2)) * (width, height)
+    velocities = random_generator.normal(0, 2, size=(20, 2))
+    try:
+        for _ in range(total_frames):
+            frame = np.full((height, width, 3), 200, dtype=np.uint8)
+            positions = (positions + velocities) % (width, height)
+            for x, y in positions.astype(int):
+                cv2.circle(frame, (int(x), int(y)), 6, (40, 40, 40), -1)
+            video_writer.write(frame)
+    finally:
+        video_writer.release()
+
+
+def time_decode_mode(working_directory: str, decode_mode: str, capture_speed_in_fps: float) -> tuple[float, int]:
+    """
+    Times processing the synthetic video into frames with the given decode mode.
+
+    Args:
+        working_directory (str): The directory holding the synthetic video.
+        decode_mode (str): The decode mode to benchmark.
+        capture_speed_in_fps (float): The capture speed in frames per second.
+
+    Returns:
+        tuple[float, int]: The elapsed seconds and the number of captured frames.
+    """
+    capture = Capture(working_directory=working_directory)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        capture.load_video(SYNTHETIC_VIDEO_FILE_NAME)
+        tic = time.perf_counter()
+        frames = capture.process_video_into_frames(
+            capture_speed_in_fps=capture_speed_in_fps, decode_mode=decode_mode)
+        elapsed = time.perf_counter() - tic
+    return elapsed, len(frames)
+
+
+def main() -> None:
+    """
+    Runs the decode mode benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=600, help='Number of frames in the synthetic video.')
+    parser.add_argument('--fps', type=float, default=30, help='Frame rate of the synthetic video.')
+    parser.add_argument('--capture-fps', type=float, default=15, help='Capture speed in frames per second.')
+    parser.add_argument('--width', type=int, default=640, help='Width of the synthetic video.')
+    parser.add_argument('--height', type=int, default=480, help='Height of the synthetic video.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        write_synthetic_video(os.path.join(working_directory, SYNTHETIC_VIDEO_FILE_NAME),
+                              args.frames, args.fps, (args.width, args.height))
+        print(f'Synthetic video: {args.frames} frames at {args.fps} FPS, '
+              f'{args.width}x{args.height}, captured at {args.capture_fps} FPS')
+        for decode_mode in ('seek', 'sequential'):
+            elapsed, frame_count = time_decode_mode(working_directory, decode_mode, args.capture_fps)
+            print(f'{decode_mode:>10}: {frame_count} frames in {elapsed:.3f}s '
+                  f'({frame_count / elapsed:.1f} frames/s)')
+
+
+if __name__ == '__main__':
+    main()